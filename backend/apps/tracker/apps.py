@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class TrackerConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.tracker"
+
+    def ready(self):
+        from . import instrumentation, replicas, signals  # noqa: F401
@@ -0,0 +1,150 @@
+"""
+ASGI-native read endpoints for issues. They run on the event loop under
+daphne instead of in the sync thread pool, and answer like the list and
+detail routes of IssueViewSet: same scoping, filters, search, ordering,
+keyset pagination, sparse fieldsets and serializer output.
+"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils.dateparse import parse_date
+from rest_framework import filters
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.request import Request
+
+from .filters import IssueSearchFilter
+from .middlewares import get_user_from_token
+from .models import Issue, IssueAttachment
+from .pagination import KeysetPagination
+from .permissions import IsOrgMember, aget_membership_roles
+from .replicas import awrote_recently, pin_primary
+from .row_serializers import IssueRowSerializer
+from .serializers import IssueSerializer
+from .views import IssueViewSet
+
+
+def json_response(data, status=200):
+    # compact, like DRF's JSONRenderer
+    return JsonResponse(data, status=status, json_dumps_params={"separators": (",", ":"), "ensure_ascii": False})
+
+
+def error(detail, status):
+    return json_response({"detail": detail}, status)
+
+
+async def authenticate(request):
+    """
+    Resolve the Bearer token through the shared token cache, or return None.
+    Users who wrote recently read from the primary (see replicas.py).
+    """
+    header = request.headers.get("Authorization", "").split()
+    if len(header) != 2 or header[0] != "Bearer":
+        return None
+    user = await get_user_from_token(header[1], run_sync=sync_to_async)
+    if not user.is_authenticated:
+        return None
+    if await awrote_recently(user):
+        pin_primary()
+    return user
+
+
+def exact_filters(params):
+    """
+    The `filterset_fields` of IssueViewSet as plain lookups. django-filter
+    validates `assigned_to` with a query, which can't run on the event loop.
+    """
+    lookups, errors = {}, {}
+    for name, choices in (("status", Issue.STATUS_CHOICES), ("priority", Issue.PRIORITY_CHOICES)):
+        value = params.get(name)
+        if value:
+            if value in dict(choices):
+                lookups[name] = value
+            else:
+                errors[name] = [f"Select a valid choice. {value} is not one of the available choices."]
+    if params.get("due_date"):
+        try:
+            due_date = parse_date(params["due_date"])
+        except ValueError:
+            due_date = None
+        if due_date is None:
+            errors["due_date"] = ["Enter a valid date."]
+        else:
+            lookups["due_date"] = due_date
+    if params.get("assigned_to"):
+        if params["assigned_to"].isdecimal():
+            lookups["assigned_to_id"] = int(params["assigned_to"])
+        else:
+            errors["assigned_to"] = ["Select a valid choice. That choice is not one of the available choices."]
+    return lookups, errors
+
+
+async def attach_attachments(issues):
+    """Async stand-in for the attachments Prefetch of `IssueSerializer.setup_eager_loading`, for detail."""
+    by_issue = {issue.pk: [] for issue in issues}
+    attachments = IssueAttachment.objects.filter(issue_id__in=list(by_issue)).select_related("uploaded_by").order_by("pk")
+    async for attachment in attachments.aiterator():
+        by_issue[attachment.issue_id].append(attachment)
+    for issue in issues:
+        cached = issue.attachments.all()
+        cached._result_cache = by_issue[issue.pk]
+        cached._prefetch_done = True
+        issue._prefetched_objects_cache = {"attachments": cached}
+
+
+def scoped_issues(request):
+    return Issue.objects.filter(organization_id__in=list(request._tracker_roles)).select_related("assigned_to")
+
+
+async def issue_list(request):
+    if request.method != "GET":
+        return error(f'Method "{request.method}" not allowed.', 405)
+    request.user = await authenticate(request)
+    if request.user is None:
+        return error("Authentication credentials were not provided.", 401)
+    await aget_membership_roles(request)
+
+    # a DRF request and viewset only supply query params and view attributes
+    # to the shared filter and pagination classes; nothing is parsed or queried
+    drf_request = Request(request)
+    view = IssueViewSet(request=drf_request, format_kwarg=None, action="list")
+    lookups, errors = exact_filters(drf_request.query_params)
+    if errors:
+        return json_response(errors, 400)
+    try:
+        row_serializer = IssueRowSerializer.from_request(drf_request)
+    except ValidationError as exc:
+        return json_response(exc.detail, 400)
+    queryset = scoped_issues(request).filter(**lookups)
+    for backend in (IssueSearchFilter, filters.OrderingFilter):
+        queryset = backend().filter_queryset(drf_request, queryset, view)
+    queryset = row_serializer.select(queryset)
+
+    paginator = KeysetPagination()
+    try:
+        page = paginator.page_queryset(queryset, drf_request, view)
+    except NotFound as exc:
+        return error(str(exc.detail), 404)
+    rows = paginator.set_page([row async for row in page.aiterator()])
+    attachment_rows = None
+    if row_serializer.attachments is not None:
+        queryset = row_serializer.attachment_queryset([row["id"] for row in rows])
+        attachment_rows = [attachment async for attachment in queryset]
+    data = row_serializer.render(rows, attachment_rows)
+    return json_response(paginator.get_paginated_response(data).data)
+
+
+async def issue_detail(request, pk):
+    if request.method != "GET":
+        return error(f'Method "{request.method}" not allowed.', 405)
+    request.user = await authenticate(request)
+    if request.user is None:
+        return error("Authentication credentials were not provided.", 401)
+    await aget_membership_roles(request)
+
+    issue = await scoped_issues(request).filter(pk=pk).afirst()
+    if issue is None:
+        return error("No Issue matches the given query.", 404)
+    # roles are already loaded, so the object check runs without a query
+    if not IsOrgMember().has_object_permission(request, None, issue):
+        return error("You do not have permission to perform this action.", 403)
+    await attach_attachments([issue])
+    return json_response(IssueSerializer(issue, context={"request": request}).data)
@@ -0,0 +1,183 @@
+import hashlib
+import os
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header
+
+# bytes read per step when hashing, appending or streaming files
+IO_CHUNK_SIZE = 1024 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Filesystem storage that names files after the SHA-256 of their content
+    (`blobs/ab/cd/abcd...`), so identical uploads share one file. It lives under
+    MEDIA_ROOT, so attachments stored before it keep resolving.
+    """
+
+    def blob_name(self, digest):
+        return f"blobs/{digest[:2]}/{digest[2:4]}/{digest}"
+
+    def partial_path(self, session_id):
+        return self.path(f"partial/{session_id}")
+
+    def store_file(self, path, digest):
+        """Move the complete file at `path` to its blob, or drop it if the blob exists."""
+        name = self.blob_name(digest)
+        target = self.path(name)
+        if os.path.exists(target):
+            os.remove(path)
+            return name
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # a concurrent upload of the same content writes the same bytes
+        file_move_safe(path, target, allow_overwrite=True)
+        return name
+
+
+attachment_storage = ContentAddressedStorage()
+
+
+def get_attachment_storage():
+    return attachment_storage
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """Spool uploads to disk like Django's handler, hashing each chunk as it arrives."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.sha256 = self.hasher.hexdigest()
+        return upload
+
+
+def file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(IO_CHUNK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def append_chunk(path, stream, offset, length):
+    """
+    Append `length` bytes from `stream` at `offset`, discarding anything a failed
+    earlier request left past it. Returns the new size of the partial file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a+b") as f:
+        f.truncate(offset)
+        remaining = length
+        while remaining:
+            block = stream.read(min(IO_CHUNK_SIZE, remaining))
+            if not block:
+                break
+            f.write(block)
+            remaining -= len(block)
+        return f.tell()
+
+
+def parse_range(header, size):
+    """
+    Return `(start, end)` for a single `bytes=` range, None when the header is
+    absent or not one we serve partially, and raise ValueError if unsatisfiable.
+    """
+    match = RANGE_RE.match(header or "")
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if not start:
+        if not int(end):
+            raise ValueError("empty suffix range")
+        return max(size - int(end), 0), size - 1
+    start, end = int(start), int(end) if end else size - 1
+    if start >= size or end < start:
+        raise ValueError("range outside the file")
+    return start, min(end, size - 1)
+
+
+def read_range(path, start, end):
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining:
+            block = f.read(min(IO_CHUNK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+async def aread_range(path, start, end):
+    """
+    `read_range` for ASGI, where Django reads a sync streaming body to the end
+    before sending it. Each block is read in a worker thread.
+    """
+    blocks = read_range(path, start, end)
+    pull = sync_to_async(next, thread_sensitive=False)
+    try:
+        while (block := await pull(blocks, None)) is not None:
+            yield block
+    finally:
+        blocks.close()
+
+
+def serve_attachment(request, attachment):
+    """
+    Send an attachment. With ATTACHMENT_SERVE_MODE "x-accel" or "sendfile" the
+    web server streams the file; otherwise Django does, honoring single ranges.
+    """
+    storage = attachment.file.storage
+    name = attachment.file.name
+    filename = attachment.filename or os.path.basename(name)
+    content_type = attachment.content_type or "application/octet-stream"
+    # content-addressed blobs never change, so the digest is a strong validator
+    etag = f'"{attachment.sha256}"' if attachment.sha256 else None
+    if etag and get_conditional_response(request, etag=etag) is not None:
+        return HttpResponse(status=304, headers={"ETag": etag})
+
+    mode = settings.ATTACHMENT_SERVE_MODE
+    if mode in ("x-accel", "sendfile"):
+        response = HttpResponse(content_type=content_type)
+        if mode == "x-accel":
+            response["X-Accel-Redirect"] = settings.ATTACHMENT_ACCEL_PREFIX.rstrip("/") + "/" + name
+        else:
+            response["X-Sendfile"] = storage.path(name)
+    else:
+        path = storage.path(name)
+        size = os.path.getsize(path)
+        try:
+            byte_range = parse_range(request.headers.get("Range"), size)
+        except ValueError:
+            return HttpResponse(status=416, headers={"Content-Range": f"bytes */{size}"})
+        asgi = isinstance(request, ASGIRequest)
+        if byte_range is None and not asgi:
+            response = FileResponse(open(path, "rb"), content_type=content_type)
+        else:
+            start, end = byte_range or (0, size - 1)
+            blocks = aread_range(path, start, end) if asgi else read_range(path, start, end)
+            response = StreamingHttpResponse(blocks, status=200 if byte_range is None else 206, content_type=content_type)
+            if byte_range is not None:
+                response["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response["Content-Length"] = str(end - start + 1)
+        response["Accept-Ranges"] = "bytes"
+    response["Content-Disposition"] = content_disposition_header(True, filename)
+    if etag:
+        response["ETag"] = etag
+    return response
@@ -0,0 +1,6 @@
+"""
+Performance benchmarking helpers for the tracker app.
+
+These modules are only used by the `benchmark_*` management commands and are
+meant to be run against a scratch database, never production.
+"""
@@ -0,0 +1,114 @@
+import hashlib
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from ..attachments import attachment_storage
+from ..models import Organization, Membership, Project, Issue, IssueAttachment
+
+BENCH_PREFIX = "bench-"
+
+STATUSES = [choice for choice, _ in Issue.STATUS_CHOICES]
+PRIORITIES = [choice for choice, _ in Issue.PRIORITY_CHOICES]
+
+
+def bench_organizations():
+    return Organization.objects.filter(name__startswith=BENCH_PREFIX)
+
+
+def generate_issues(count, orgs=20, projects_per_org=5, users=200, batch_size=10000, seed=42, stdout=None):
+    """
+    Bulk-load `count` synthetic issues spread over `orgs` organizations.
+    Rows are written in batches so memory stays flat for millions of issues.
+    """
+    rnd = random.Random(seed)
+    today = timezone.localdate()
+
+    User.objects.bulk_create(
+        [User(username=f"{BENCH_PREFIX}user-{n}", email=f"user-{n}@bench.example") for n in range(users)],
+        ignore_conflicts=True,
+    )
+    user_ids = list(User.objects.filter(username__startswith=BENCH_PREFIX).values_list("id", flat=True))
+
+    organizations = Organization.objects.bulk_create(
+        [Organization(name=f"{BENCH_PREFIX}org-{n}") for n in range(orgs)]
+    )
+    projects = Project.objects.bulk_create(
+        [Project(organization=org, name=f"project-{n}") for org in organizations for n in range(projects_per_org)]
+    )
+    project_ids = [p.id for p in projects]
+    project_orgs = {p.id: p.organization_id for p in projects}
+
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        batch = []
+        for _ in range(size):
+            project_id = rnd.choice(project_ids)
+            batch.append(Issue(
+                project_id=project_id,
+                organization_id=project_orgs[project_id],
+                title=f"Synthetic issue {created + len(batch)}",
+                status=rnd.choice(STATUSES),
+                priority=rnd.choice(PRIORITIES),
+                due_date=today + timedelta(days=rnd.randint(-180, 180)) if rnd.random() < 0.8 else None,
+                assigned_to_id=rnd.choice(user_ids) if rnd.random() < 0.9 else None,
+            ))
+        Issue.objects.bulk_create(batch)
+        created += size
+        if stdout:
+            stdout.write(f"  loaded {created}/{count} issues")
+    return project_ids, user_ids
+
+
+def bench_issues():
+    return Issue.objects.filter(organization__in=bench_organizations())
+
+
+def generate_memberships(user_ids, members_per_org=20, seed=42):
+    """Make `members_per_org` random bench users members of every bench organization, the first as owner."""
+    rnd = random.Random(seed)
+    memberships = []
+    for org_id in bench_organizations().values_list("id", flat=True):
+        members = rnd.sample(user_ids, min(members_per_org, len(user_ids)))
+        for n, user_id in enumerate(members):
+            role = Membership.ROLE_OWNER if n == 0 else Membership.ROLE_MEMBER
+            memberships.append(Membership(organization_id=org_id, user_id=user_id, role=role))
+    Membership.objects.bulk_create(memberships, batch_size=10000, ignore_conflicts=True)
+    return len(memberships)
+
+
+def generate_attachments(count, distinct_files=20, file_size=4096, batch_size=10000, seed=42):
+    """
+    Attach `count` files to random bench issues. Their content repeats over
+    `distinct_files` blobs, as content-addressed storage would share them.
+    """
+    rnd = random.Random(seed)
+    issue_ids = list(bench_issues().values_list("id", flat=True))
+    if not issue_ids or not count:
+        return 0
+    blobs = []
+    for n in range(distinct_files):
+        content = rnd.randbytes(file_size)
+        digest = hashlib.sha256(content).hexdigest()
+        name = attachment_storage.blob_name(digest)
+        if not attachment_storage.exists(name):
+            attachment_storage.save(name, ContentFile(content))
+        blobs.append((name, digest))
+
+    created = 0
+    while created < count:
+        size = min(batch_size, count - created)
+        batch = []
+        for n in range(created, created + size):
+            name, digest = rnd.choice(blobs)
+            batch.append(IssueAttachment(
+                issue_id=rnd.choice(issue_ids), file=name, filename=f"file-{n}.bin",
+                content_type="application/octet-stream", size=file_size, sha256=digest,
+            ))
+        IssueAttachment.objects.bulk_create(batch)
+        created += size
+    return created
@@ -0,0 +1,278 @@
+"""
+Scenarios and measurement for the `benchmark_suite` command.
+
+Each scenario is timed `repeat` times after a warm-up run, recording latency
+percentiles and the queries it ran on every database connection, and run
+once more under tracemalloc for its peak Python memory. Reports are
+plain dicts, so they can be written as JSON and compared against a stored
+baseline.
+"""
+import asyncio
+import math
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+from types import SimpleNamespace
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import urlencode
+from rest_framework_simplejwt.tokens import AccessToken
+
+from ..cache import project_membership_cache, token_user_cache
+from ..middlewares import JWTAuthMiddlewareStack
+from ..models import Issue, TaskWatermark
+from ..permissions import IsOrgMember, get_membership_roles
+from ..routing import websocket_urlpatterns
+from ..tasks import REMINDER_WATERMARK, send_overdue_reminders
+from ..views import IssueViewSet
+from .data import bench_issues
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of the sorted `values`."""
+    return values[max(0, math.ceil(len(values) * pct / 100) - 1)]
+
+
+def summarize(latencies):
+    latencies = sorted(latencies)
+    summary = {f"p{pct}": percentile(latencies, pct) for pct in PERCENTILES}
+    summary.update(mean=statistics.fmean(latencies), min=latencies[0], max=latencies[-1])
+    return {key: round(value * 1000, 3) for key, value in summary.items()}
+
+
+class Scenario:
+    """One timed operation. `prepare`/`finish` bracket the runs; `reset` precedes each run."""
+
+    name = ""
+
+    def prepare(self):
+        pass
+
+    def reset(self):
+        pass
+
+    def run(self):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+
+def measure(scenario, repeat):
+    scenario.prepare()
+    try:
+        scenario.reset()
+        scenario.run()  # warm-up: imports, caches, connections
+        latencies, queries, sql = [], [], []
+        for _ in range(repeat):
+            scenario.reset()
+            with ExitStack() as stack:
+                # the debug cursor also sees queries made from the sockets' own contexts
+                captured = [stack.enter_context(CaptureQueriesContext(connection)) for connection in connections.all()]
+                started = time.perf_counter()
+                scenario.run()
+                latencies.append(time.perf_counter() - started)
+            run_queries = [query for capture in captured for query in capture.captured_queries]
+            queries.append(len(run_queries))
+            sql.append(sum(float(query["time"]) for query in run_queries))
+
+        scenario.reset()
+        tracemalloc.start()
+        try:
+            scenario.run()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    finally:
+        scenario.finish()
+    return {
+        "runs": repeat,
+        "latency_ms": summarize(latencies),
+        "queries": max(queries),
+        "sql_ms": round(statistics.median(sql) * 1000, 3),
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+class ApiScenario(Scenario):
+    """GET an API endpoint as the viewer, with a JWT like a real client."""
+
+    def __init__(self, name, url_name, viewer, params=None):
+        self.name = name
+        self.url = reverse(url_name)
+        self.params = params or {}
+        self.client = Client(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(viewer)}")
+        self.counter = 0
+
+    def run(self):
+        self.counter += 1
+        # a distinct query string per run keeps the list response cache out of the picture
+        response = self.client.get(f"{self.url}?{urlencode({**self.params, 'n': self.counter})}")
+        if response.status_code != 200:
+            raise RuntimeError(f"{self.url} answered {response.status_code}")
+
+
+class PermissionScenario(Scenario):
+    """Scope a fresh request and check object permissions on a page of issues."""
+
+    name = "permission_checks"
+
+    def __init__(self, viewer, page_size=50):
+        self.viewer = viewer
+        self.page_size = page_size
+
+    def prepare(self):
+        self.issues = list(bench_issues().select_related("project")[:self.page_size])
+        self.permission = IsOrgMember()
+
+    def run(self):
+        request = SimpleNamespace(user=self.viewer)
+        get_membership_roles(request)
+        for issue in self.issues:
+            self.permission.has_object_permission(request, None, issue)
+
+
+class ScopingScenario(Scenario):
+    """Scope the issue queryset for a fresh request and fetch the visible ids."""
+
+    name = "issue_scoping"
+
+    def __init__(self, viewer):
+        self.viewer = viewer
+
+    def run(self):
+        view = IssueViewSet(action="list", format_kwarg=None)
+        view.request = SimpleNamespace(user=self.viewer)
+        list(view.get_queryset().values_list("id", flat=True))
+
+
+class WebSocketConnectScenario(Scenario):
+    """Connect and disconnect a project socket with cold auth and membership caches."""
+
+    name = "ws_connect"
+
+    def __init__(self, viewer, project_id):
+        self.path = f"/ws/projects/{project_id}/?token={AccessToken.for_user(viewer)}"
+        self.application = JWTAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+
+    def reset(self):
+        token_user_cache.clear()
+        project_membership_cache.clear()
+
+    def run(self):
+        async_to_sync(self.connect)()
+
+    async def connect(self):
+        communicator = WebsocketCommunicator(self.application, self.path)
+        connected, _ = await communicator.connect(timeout=10)
+        await communicator.disconnect()
+        if not connected:
+            raise RuntimeError("websocket connection was refused")
+
+
+class WebSocketBroadcastScenario(Scenario):
+    """Send one issue event to a project group and wait until every client has it."""
+
+    name = "ws_broadcast"
+
+    def __init__(self, viewer, project_id, clients=20):
+        self.path = f"/ws/projects/{project_id}/?token={AccessToken.for_user(viewer)}"
+        self.group = f"project_{project_id}"
+        self.clients = clients
+        self.application = JWTAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+
+    def prepare(self):
+        # the sockets live across runs, so they need a loop of their own
+        self.loop = asyncio.new_event_loop()
+        self.communicators = self.loop.run_until_complete(self.connect_all())
+        self.counter = 0
+
+    async def connect_all(self):
+        communicators = [WebsocketCommunicator(self.application, self.path) for _ in range(self.clients)]
+        for communicator in communicators:
+            connected, _ = await communicator.connect(timeout=10)
+            if not connected:
+                raise RuntimeError("websocket connection was refused")
+        return communicators
+
+    def run(self):
+        self.counter += 1
+        self.loop.run_until_complete(self.broadcast(self.counter))
+
+    async def broadcast(self, issue_id):
+        await get_channel_layer().group_send(self.group, {"type": "issue.created", "issue_id": issue_id, "title": "bench"})
+        await asyncio.gather(*(communicator.receive_json_from(timeout=10) for communicator in self.communicators))
+
+    async def disconnect_all(self):
+        await asyncio.gather(*(communicator.disconnect() for communicator in self.communicators))
+
+    def finish(self):
+        self.loop.run_until_complete(self.disconnect_all())
+        self.loop.close()
+
+
+class ReminderScenario(Scenario):
+    """A full `send_overdue_reminders` run, as if it were the first one."""
+
+    name = "send_overdue_reminders"
+
+    def prepare(self):
+        self.conf = send_overdue_reminders.app.conf
+        self.eager = self.conf.task_always_eager
+        # large organizations fan out to subtasks; run them inline so they are timed
+        self.conf.task_always_eager = True
+
+    def reset(self):
+        TaskWatermark.objects.filter(name=REMINDER_WATERMARK).delete()
+        Issue.objects.filter(id__in=bench_issues().values("id")).update(last_reminded_at=None)
+
+    def run(self):
+        send_overdue_reminders()
+
+    def finish(self):
+        self.conf.task_always_eager = self.eager
+
+
+def build_scenarios(viewer, project_id, ws_clients=20):
+    return [
+        ApiScenario("issue_list", "issue-list", viewer),
+        ApiScenario("issue_filter", "issue-list", viewer, {"status": "open", "priority": "high", "ordering": "due_date"}),
+        ApiScenario("issue_search", "issue-list", viewer, {"search": "synthetic issue 42"}),
+        ApiScenario("project_list", "project-list", viewer),
+        ScopingScenario(viewer),
+        PermissionScenario(viewer),
+        WebSocketConnectScenario(viewer, project_id),
+        WebSocketBroadcastScenario(viewer, project_id, clients=ws_clients),
+        ReminderScenario(),
+    ]
+
+
+def compare(report, baseline, tolerance):
+    """
+    Compare scenario results with a baseline report. A p95 latency more than
+    `tolerance` (a fraction) above the baseline, or any extra query, is a
+    regression. Returns `(rows, regressions)`.
+    """
+    rows, regressions = [], []
+    for name, result in report["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            rows.append((name, None, result["latency_ms"]["p95"], None, result["queries"]))
+            continue
+        old_p95, new_p95 = before["latency_ms"]["p95"], result["latency_ms"]["p95"]
+        rows.append((name, old_p95, new_p95, before["queries"], result["queries"]))
+        if new_p95 > old_p95 * (1 + tolerance):
+            regressions.append(f"{name}: p95 {old_p95:.2f}ms -> {new_p95:.2f}ms")
+        if result["queries"] > before["queries"]:
+            regressions.append(f"{name}: {before['queries']} -> {result['queries']} queries")
+    return rows, regressions
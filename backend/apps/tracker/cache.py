@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache whose entries expire after `ttl` seconds.
+
+    Meant for hot per-worker lookups such as WebSocket authentication and
+    membership checks. Entries are not shared between processes. With a
+    `version_key`, `invalidate` also bumps a counter in the shared cache after
+    commit; `aget` compares it at most every `check_interval` seconds and drops
+    every local entry once it moved, so other workers stop serving invalidated
+    entries within that window rather than when they expire.
+    """
+
+    def __init__(self, maxsize=10000, ttl=60, version_key=None, check_interval=1.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version_key = version_key
+        self.check_interval = check_interval
+        self._version = None
+        self._checked_at = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def aget(self, key, default=None):
+        await self._acheck_version()
+        return self.get(key, default)
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard_where(self, predicate):
+        """Drop every entry for which `predicate(key, value)` is true."""
+        with self._lock:
+            stale = [key for key, (value, _) in self._data.items() if predicate(key, value)]
+            for key in stale:
+                del self._data[key]
+
+    def invalidate(self, predicate):
+        """`discard_where` here, and in every other process sharing `version_key`."""
+        self.discard_where(predicate)
+        if self.version_key is not None:
+            transaction.on_commit(lambda: bump_version(self.version_key))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    async def _acheck_version(self):
+        now = time.monotonic()
+        if self.version_key is None or (self._checked_at is not None and now - self._checked_at < self.check_interval):
+            return
+        self._checked_at = now
+        try:
+            version = await cache.aget(self.version_key)
+        except Exception:
+            # shared cache down: entries still expire after their TTL
+            return
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+    def __len__(self):
+        return len(self._data)
+
+
+# validated WebSocket token -> user, never outliving the token itself
+token_user_cache = TTLCache(maxsize=10000, ttl=300, version_key="localcache:token-user")
+# (user_id, project_id) -> whether the user may join the project's channel group
+project_membership_cache = TTLCache(maxsize=50000, ttl=60, version_key="localcache:project-membership")
+
+
+ORG_VERSION_KEY = "orgver:{}"
+RECENT_WRITE_KEY = "orgwrite:{}"
+
+
+def get_org_versions(org_ids):
+    """
+    Return `{org_id: version}` for the given organizations. Versions start from a
+    nanosecond timestamp rather than 1, so a counter evicted from Redis can never
+    come back with a value an older cached response was stored under.
+    """
+    keys = {ORG_VERSION_KEY.format(org_id): org_id for org_id in org_ids}
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), timeout=None)
+        found.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def bump_org_versions(org_ids):
+    org_ids = set(org_ids)
+    if getattr(settings, "DATABASE_REPLICAS", ()):
+        # replicas may not show the write yet (see orgs_written_recently); marked
+        # before the bump, so no reader sees the new version without the mark
+        cache.set_many({RECENT_WRITE_KEY.format(org_id): 1 for org_id in org_ids}, settings.REPLICA_STICKY_SECONDS)
+    for org_id in org_ids:
+        bump_version(ORG_VERSION_KEY.format(org_id))
+
+
+def orgs_written_recently(org_ids):
+    """Whether any of these organizations was written within REPLICA_STICKY_SECONDS."""
+    return bool(cache.get_many([RECENT_WRITE_KEY.format(org_id) for org_id in org_ids]))
+
+
+def invalidate_orgs(org_ids):
+    """
+    Invalidate cached reads of these organizations once the current transaction
+    commits; bumping earlier would let a concurrent reader cache pre-commit data
+    under the new version.
+    """
+    org_ids = {org_id for org_id in org_ids if org_id is not None}
+    if org_ids:
+        transaction.on_commit(lambda: bump_org_versions(org_ids))
@@ -0,0 +1,137 @@
+"""
+Delta sync: the issues upserted and deleted since a cursor, walking issues
+in (updated_at, id) order and IssueTombstone rows in (deleted_at, id) order.
+An issue moved to another organization leaves a tombstone in the old one.
+"""
+import base64
+import hashlib
+import json
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Issue, IssueTombstone
+from .pagination import build_keys, order_by_keys, row_position, seek_filter
+
+# updated_at/deleted_at are stamped before the writing transaction commits, so a
+# row can become visible with a slightly older timestamp. Changes younger than
+# the lag are held back, so a cursor never moves past a row still in flight.
+CHANGES_SAFETY_LAG = timedelta(seconds=5)
+# tombstones are purged after this; older cursors must sync from scratch
+TOMBSTONE_RETENTION = timedelta(days=30)
+CHANGES_PAGE_SIZE = 200
+CHANGES_MAX_PAGE_SIZE = 1000
+
+ISSUE_KEYS = build_keys(Issue.objects.all(), ["updated_at"])
+TOMBSTONE_KEYS = build_keys(IssueTombstone.objects.all(), ["deleted_at"])
+
+
+class CursorExpired(Exception):
+    pass
+
+
+class ChangesPage:
+    def __init__(self, issues, tombstones, upsert_position, delete_position, has_more, scope):
+        self.issues = issues
+        self.tombstones = tombstones
+        self.upsert_position = upsert_position
+        self.delete_position = delete_position
+        self.has_more = has_more
+        self.scope = scope
+
+    @property
+    def cursor(self):
+        return encode_changes_cursor(self.upsert_position, self.delete_position, self.scope)
+
+
+def record_moves(rows):
+    """Tombstones for issues leaving an organization; `rows` are their `(id, project_id, organization_id)` before the move."""
+    IssueTombstone.objects.bulk_create(
+        IssueTombstone(issue_id=issue_id, project_id=project_id, organization_id=org_id)
+        for issue_id, project_id, org_id in rows
+    )
+
+
+def org_scope(org_ids):
+    """
+    Digest of the caller's organizations. A cursor is only valid for the set it
+    was issued for: issues of a newly joined organization lie behind it, and
+    those of a left one would never be deleted, so either way the client resyncs.
+    """
+    raw = ",".join(str(org_id) for org_id in sorted(set(org_ids)))
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def encode_changes_cursor(upsert_position, delete_position, scope):
+    payload = {
+        "u": upsert_position and [key.encode(value) for key, value in zip(ISSUE_KEYS, upsert_position)],
+        "d": [key.encode(value) for key, value in zip(TOMBSTONE_KEYS, delete_position)],
+        "o": scope,
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_changes_cursor(encoded, scope, now=None):
+    """
+    Return `(upsert_position, delete_position)`. Without a cursor, every issue is
+    sent and deletions are tracked from now on. Raise ValueError for a malformed
+    cursor and CursorExpired when its tombstones may have been purged or it was
+    issued for another `org_scope`.
+    """
+    now = now or timezone.now()
+    if not encoded:
+        return None, [now - CHANGES_SAFETY_LAG, 0]
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        upsert = payload["u"] and [key.decode(value) for key, value in zip(ISSUE_KEYS, payload["u"])]
+        delete = [key.decode(value) for key, value in zip(TOMBSTONE_KEYS, payload["d"])]
+        if (upsert is not None and len(upsert) != 2) or len(delete) != 2 or None in delete:
+            raise ValueError("malformed cursor")
+    except (TypeError, KeyError, ValueError) as exc:
+        raise ValueError(str(exc))
+    if delete[0] < now - TOMBSTONE_RETENTION or payload.get("o") != scope:
+        raise CursorExpired()
+    return upsert or None, delete
+
+
+def changes_page(issues, tombstones, position, limit, scope, now=None):
+    """
+    The next `limit` changes after `position` from the scoped `issues` and
+    `tombstones` querysets, merged in timestamp order. Tombstones of issues
+    still in `issues` (moved between two of the caller's organizations) are
+    skipped.
+    """
+    horizon = (now or timezone.now()) - CHANGES_SAFETY_LAG
+    upsert_position, delete_position = position
+
+    in_scope = issues
+    issues = issues.filter(updated_at__lte=horizon)
+    if upsert_position:
+        issues = issues.filter(seek_filter(ISSUE_KEYS, upsert_position))
+    issues = list(issues.order_by(*order_by_keys(ISSUE_KEYS))[:limit + 1])
+    tombstones = tombstones.filter(deleted_at__lte=horizon).filter(seek_filter(TOMBSTONE_KEYS, delete_position))
+    tombstones = list(tombstones.order_by(*order_by_keys(TOMBSTONE_KEYS))[:limit + 1])
+
+    # each stream holds its first limit + 1 rows, enough to pick the merged first `limit`
+    merged = sorted(
+        [(issue.updated_at, 0, issue.pk, issue) for issue in issues]
+        + [(tombstone.deleted_at, 1, tombstone.pk, tombstone) for tombstone in tombstones],
+        key=lambda change: change[:3],
+    )
+    taken = [change[3] for change in merged[:limit]]
+    taken_issues = [row for row in taken if isinstance(row, Issue)]
+    taken_tombstones = [row for row in taken if isinstance(row, IssueTombstone)]
+
+    if taken_issues:
+        upsert_position = row_position(ISSUE_KEYS, taken_issues[-1])
+    if taken_tombstones:
+        delete_position = row_position(TOMBSTONE_KEYS, taken_tombstones[-1])
+    if len(taken_tombstones) == len(tombstones) and delete_position[0] < horizon:
+        # no deletions left up to the horizon: move up to it so a quiet
+        # organization's cursor doesn't age past the tombstone retention
+        delete_position = [horizon, delete_position[1]]
+    if taken_tombstones:
+        visible = set(in_scope.filter(pk__in=[row.issue_id for row in taken_tombstones]).values_list("pk", flat=True))
+        taken_tombstones = [row for row in taken_tombstones if row.issue_id not in visible]
+    return ChangesPage(taken_issues, taken_tombstones, upsert_position, delete_position, len(merged) > limit, scope)
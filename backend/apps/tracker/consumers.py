@@ -3,14 +3,101 @@
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 
+import asyncio
+
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
+from .cache import project_membership_cache
+from .instrumentation import InstrumentedConsumerMixin
+
+def _is_project_member(user_id, project_id):
+    from .models import Membership
+    return Membership.objects.filter(user_id=user_id, organization__projects__id=project_id).exists()
+
+async def is_project_member(user, project_id):
+    """Membership check for joining a project group, cached per (user, project)."""
+    key = (user.pk, int(project_id))
+    is_member = await project_membership_cache.aget(key)
+    if is_member is None:
+        # DB check in thread
+        is_member = await database_sync_to_async(_is_project_member)(*key)
+        project_membership_cache.set(key, is_member)
+    return is_member
+
+def merge_events(previous, event):
+    """Fold `event` into the pending event for the same issue; None drops both."""
+    if previous is None:
+        return event
+    if event["type"] == "issue.deleted":
+        # the client never saw an issue created and deleted in one window
+        return None if previous["type"] == "issue.created" else event
+    if previous["type"] == "issue.created":
+        return {**previous, **event, "type": "issue.created"}
+    return {**previous, **event}
+
+
+class CoalescingSendMixin:
+    """
+    Buffer outgoing issue events for `coalesce_window` seconds, merge the ones
+    for the same issue, and send what is left as a single frame. Handlers
+    return immediately, so the channel layer queue drains even when the client
+    reads slowly. If more than `max_pending_events` issues are waiting, the
+    buffer is dropped and the client is told to resync instead.
+    """
+
+    coalesce_window = 0.05
+    max_pending_events = 500
+
+    async def queue_event(self, event):
+        if self.coalesce_window <= 0:
+            await self.send_json(event)
+            return
+        if not hasattr(self, "_pending_events"):
+            self._pending_events, self._flush_task, self._overflowed = {}, None, False
+        if not self._overflowed:
+            # events that name no issue are never merged
+            key = event.get("issue_id") or object()
+            merged = merge_events(self._pending_events.get(key), event)
+            if merged is None:
+                self._pending_events.pop(key)
+            elif key in self._pending_events or len(self._pending_events) < self.max_pending_events:
+                self._pending_events[key] = merged
+            else:
+                self._pending_events.clear()
+                self._overflowed = True
+        if self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._flush_events())
 
-class ProjectConsumer(AsyncJsonWebsocketConsumer):
+    def _take_frame(self):
+        if self._overflowed:
+            self._overflowed = False
+            return {"type": "resync.required", "reason": "too many pending events"}
+        events = list(self._pending_events.values())
+        self._pending_events.clear()
+        if not events:
+            return None
+        return events[0] if len(events) == 1 else {"type": "issue.batch", "events": events}
+
+    async def _flush_events(self):
+        # one flusher per connection; events queued while a send is in flight
+        # wait for the next window, so frames stay in order
+        while True:
+            await asyncio.sleep(self.coalesce_window)
+            frame = self._take_frame()
+            if frame is None:
+                break
+            await self.send_json(frame)
+        self._flush_task = None
+
+    def stop_coalescing(self):
+        task = getattr(self, "_flush_task", None)
+        if task is not None:
+            task.cancel()
+
+class ProjectConsumer(InstrumentedConsumerMixin, CoalescingSendMixin, AsyncJsonWebsocketConsumer):
     async def connect(self):
         # lazy import to avoid AppRegistryNotReady
         from django.contrib.auth.models import AnonymousUser
-        from .models import Membership
 
         user = self.scope.get("user", AnonymousUser())
         if not user or user.is_anonymous:
@@ -19,15 +106,7 @@ class ProjectConsumer(AsyncJsonWebsocketConsumer):
 
         self.project_id = self.scope["url_route"]["kwargs"]["project_id"]
 
-        # DB check in thread
-        is_member = await database_sync_to_async(
-            lambda: Membership.objects.filter(
-                user=user,
-                organization__projects__id=self.project_id
-            ).exists()
-        )()
-
-        if not is_member:
+        if not await is_project_member(user, self.project_id):
             await self.close(code=4003)
             return
 
@@ -37,32 +116,128 @@ class ProjectConsumer(AsyncJsonWebsocketConsumer):
 
 
     async def disconnect(self, close_code):
+        self.stop_coalescing()
         if hasattr(self, "group_name"):
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
     async def issue_created(self, event):
-        await self.send_json({
+        await self.queue_event({
             "type": "issue.created",
             "issue_id": event.get("issue_id"),
             "title": event.get("title")
         })
 
     async def issue_updated(self, event):
-        await self.send_json({
+        await self.queue_event({
             "type": "issue.updated",
             **event
         })
 
-import json
-from channels.generic.websocket import AsyncWebsocketConsumer
+    async def issue_deleted(self, event):
+        await self.queue_event({
+            "type": "issue.deleted",
+            "issue_id": event.get("issue_id")
+        })
+
+    async def issue_batch(self, event):
+        for item in event.get("events", []):
+            handler = getattr(self, item.get("type", "").replace(".", "_"), None)
+            if handler is not None and item["type"] != "issue.batch":
+                await handler(item)
+
+def _member_project_ids(user_id, project_ids):
+    from .models import Project
+    return set(
+        Project.objects.filter(pk__in=project_ids, organization__members__user_id=user_id).values_list("pk", flat=True)
+    )
+
+async def member_projects(user, project_ids):
+    """
+    Membership check for many projects at once: cached answers first, then a
+    single query for the rest, whose answers are cached as well.
+    """
+    allowed, unknown = set(), []
+    for project_id in project_ids:
+        is_member = await project_membership_cache.aget((user.pk, project_id))
+        if is_member is None:
+            unknown.append(project_id)
+        elif is_member:
+            allowed.add(project_id)
+    if unknown:
+        found = await database_sync_to_async(_member_project_ids)(user.pk, unknown)
+        for project_id in unknown:
+            project_membership_cache.set((user.pk, project_id), project_id in found)
+        allowed |= found
+    return allowed
+
+class NotificationConsumer(InstrumentedConsumerMixin, CoalescingSendMixin, AsyncJsonWebsocketConsumer):
+    """
+    One socket for many projects. Authenticated clients send
+    `{"action": "subscribe" | "unsubscribe", "projects": [ids]}` and receive the
+    issue events of every subscribed project, each tagged with its `project_id`.
+    """
+
+    max_subscriptions = 200
 
-class NotificationConsumer(AsyncWebsocketConsumer):
     async def connect(self):
+        self.projects = set()
         await self.accept()
-        await self.send(text_data=json.dumps({
+        await self.send_json({
             "message": "Connected to notifications ✅"
-        }))
+        })
 
     async def disconnect(self, close_code):
-        # Disconnect logic
-        pass
\ No newline at end of file
+        self.stop_coalescing()
+        await self.leave(self.projects)
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get("action") if isinstance(content, dict) else None
+        projects = content.get("projects") if isinstance(content, dict) else None
+        if action not in ("subscribe", "unsubscribe") or not isinstance(projects, list):
+            await self.send_json({"type": "error", "detail": "expected {\"action\": \"subscribe\"|\"unsubscribe\", \"projects\": [...]}"})
+            return
+        # isdecimal, not isdigit: "²" is a digit that int() rejects
+        project_ids = {
+            int(pid) for pid in projects
+            if (isinstance(pid, int) and not isinstance(pid, bool)) or (isinstance(pid, str) and pid.isdecimal())
+        }
+        if action == "unsubscribe":
+            left = project_ids & self.projects
+            await self.leave(left)
+            await self.send_json({"type": "unsubscribed", "projects": sorted(left)})
+            return
+
+        user = self.scope.get("user")
+        if user is None or user.is_anonymous:
+            await self.send_json({"type": "error", "detail": "authentication required"})
+            return
+        new = project_ids - self.projects
+        if len(self.projects) + len(new) > self.max_subscriptions:
+            await self.send_json({"type": "error", "detail": f"at most {self.max_subscriptions} projects per connection"})
+            return
+        allowed = await member_projects(user, new)
+        await asyncio.gather(*(self.channel_layer.group_add(f"project_{pid}", self.channel_name) for pid in allowed))
+        self.projects |= allowed
+        await self.send_json({
+            "type": "subscribed",
+            "projects": sorted(self.projects & project_ids),
+            "denied": sorted(new - allowed),
+        })
+
+    async def leave(self, project_ids):
+        await asyncio.gather(*(self.channel_layer.group_discard(f"project_{pid}", self.channel_name) for pid in project_ids))
+        self.projects -= set(project_ids)
+
+    async def issue_created(self, event):
+        await self.queue_event(event)
+
+    async def issue_updated(self, event):
+        await self.queue_event(event)
+
+    async def issue_deleted(self, event):
+        await self.queue_event(event)
+
+    async def issue_batch(self, event):
+        for item in event.get("events", []):
+            if item.get("type") in ("issue.created", "issue.updated", "issue.deleted"):
+                await self.queue_event(item)
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+def issue_event(event_type, issue, **extra):
+    """Build the `(project_id, payload)` pair for an event about `issue`."""
+    payload = {"type": event_type, "issue_id": issue.id, "project_id": issue.project_id, "title": issue.title}
+    payload.update(extra)
+    return issue.project_id, payload
+
+
+def record_events(events):
+    """
+    Store `(project_id, payload)` events in the outbox as part of the current
+    transaction and schedule a dispatch once it commits. Nothing is sent if
+    the transaction rolls back.
+    """
+    if not events:
+        return
+    OutboxEvent.objects.bulk_create([OutboxEvent(project_id=pid, payload=payload) for pid, payload in events])
+    transaction.on_commit(schedule_dispatch, robust=True)
+
+
+def schedule_dispatch():
+    # lazy import: tasks imports this module
+    from .tasks import dispatch_outbox
+    try:
+        dispatch_outbox.delay()
+    except Exception:
+        # the periodic sweep picks the rows up
+        logger.warning("could not schedule outbox dispatch", exc_info=True)
+
+
+def project_message(events):
+    """A single event goes out as itself; several are wrapped in one `issue.batch`."""
+    if len(events) == 1:
+        return events[0]
+    return {"type": "issue.batch", "events": events}
+
+
+def send_project_events(events_by_project):
+    """Send one channel-layer message per project, concurrently."""
+    channel_layer = get_channel_layer()
+
+    async def send_all():
+        await asyncio.gather(*(
+            channel_layer.group_send(f"project_{project_id}", project_message(events))
+            for project_id, events in events_by_project.items()
+        ))
+
+    async_to_sync(send_all)()
+
+
+def dispatch_pending(batch_size=500):
+    """
+    Broadcast pending outbox events in batches and delete them. Rows are claimed
+    with SKIP LOCKED so concurrent dispatchers never send the same event twice;
+    a failed send rolls back and leaves the batch for the next run.
+    """
+    dispatched = 0
+    while True:
+        with transaction.atomic():
+            batch = list(OutboxEvent.objects.select_for_update(skip_locked=True).order_by("id")[:batch_size])
+            if not batch:
+                return dispatched
+            events_by_project = {}
+            for event in batch:
+                events_by_project.setdefault(event.project_id, []).append(event.payload)
+            send_project_events(events_by_project)
+            OutboxEvent.objects.filter(id__in=[event.id for event in batch]).delete()
+        dispatched += len(batch)
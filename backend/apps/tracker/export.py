@@ -0,0 +1,91 @@
+import csv
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+# columns of an issue export; foreign keys are exported as ids
+EXPORT_FIELDS = [
+    "id", "project", "title", "description", "status", "priority", "due_date",
+    "assigned_to", "created_by", "created_at", "updated_at",
+]
+EXPORT_COLUMNS = [
+    "id", "project_id", "title", "description", "status", "priority", "due_date",
+    "assigned_to_id", "created_by_id", "created_at", "updated_at",
+]
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+# rows fetched per round trip from the server-side cursor
+EXPORT_CHUNK_SIZE = 2000
+# rows encoded into one chunk of the response body
+EXPORT_WRITE_BATCH = 500
+
+
+class LineBuffer:
+    """File-like sink for csv.writer that hands back what was written."""
+
+    def write(self, value):
+        return value
+
+
+def csv_chunks(rows):
+    writer = csv.writer(LineBuffer())
+    yield writer.writerow(EXPORT_FIELDS)
+    batch = []
+    for row in rows:
+        batch.append(writer.writerow([
+            value.isoformat() if hasattr(value, "isoformat") else value for value in row
+        ]))
+        if len(batch) >= EXPORT_WRITE_BATCH:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def ndjson_chunks(rows):
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    batch = []
+    for row in rows:
+        batch.append(encoder.encode(dict(zip(EXPORT_FIELDS, row))) + "\n")
+        if len(batch) >= EXPORT_WRITE_BATCH:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(queryset, export_format, compress=False):
+    """
+    Encode `queryset` as a stream of byte chunks. Rows come from a server-side
+    cursor as tuples, so memory stays flat however many issues are exported.
+    """
+    rows = queryset.values_list(*EXPORT_COLUMNS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    encode = csv_chunks if export_format == "csv" else ndjson_chunks
+    chunks = (chunk.encode() for chunk in encode(rows))
+    return gzip_chunks(chunks) if compress else chunks
+
+
+async def aiter_chunks(chunks):
+    """
+    Async iterator over the sync iterator `chunks`, for ASGI: Django reads a sync
+    streaming body to the end before sending it there. Each chunk is pulled in
+    the request's sync thread, which holds the database connection and cursor.
+    """
+    pull = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await pull(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
@@ -0,0 +1,55 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import DecimalField, F, Q
+from django.db.models.functions import Cast, Greatest
+from rest_framework import filters
+
+# ranks are cast to a fixed-precision numeric so keyset cursors compare exactly
+RANK_FIELD = DecimalField(max_digits=12, decimal_places=6)
+
+
+class IssueSearchFilter(filters.SearchFilter):
+    """
+    Full-text `?search=` for issues, backed by the trigger-maintained
+    `Issue.search_vector` column and its GIN index, ordered by rank.
+
+    `?search_mode=trigram` switches to pg_trgm word similarity on title and
+    description for prefix/typo matching. On databases other than PostgreSQL
+    it falls back to DRF's icontains search over `view.search_fields`.
+    """
+
+    search_mode_param = "search_mode"
+    search_config = "english"
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, "").strip()
+        if not text or connections[queryset.db].vendor != "postgresql":
+            return super().filter_queryset(request, queryset, view)
+        if request.query_params.get(self.search_mode_param) == "trigram":
+            return self.trigram_search(queryset, text)
+        return self.fulltext_search(queryset, text)
+
+    def fulltext_search(self, queryset, text):
+        query = SearchQuery(text, search_type="websearch", config=self.search_config)
+        rank = Cast(SearchRank(F("search_vector"), query), RANK_FIELD)
+        return queryset.filter(search_vector=query).annotate(search_rank=rank).order_by("-search_rank")
+
+    def trigram_search(self, queryset, text):
+        similarity = Greatest(TrigramWordSimilarity(text, "title"), TrigramWordSimilarity(text, "description"))
+        return (
+            queryset
+            .filter(Q(title__trigram_word_similar=text) | Q(description__trigram_word_similar=text))
+            .annotate(search_rank=Cast(similarity, RANK_FIELD))
+            .order_by("-search_rank")
+        )
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.search_mode_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to `trigram` for fuzzy prefix/typo matching.",
+                "schema": {"type": "string", "enum": ["trigram"]},
+            },
+        ]
@@ -0,0 +1,36 @@
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import JsonResponse
+
+
+def check_database(alias):
+    """Run `SELECT 1` on `alias`; returns `(ok, latency in ms)`."""
+    started = time.perf_counter()
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except Exception:
+        return False, None
+    return True, round((time.perf_counter() - started) * 1000, 2)
+
+
+def database_health_view(request):
+    """
+    Connectivity of the primary and every replica, with this process's pool
+    counters when the pooled backend is used. 503 when the primary is down;
+    a replica being down only degrades the report.
+    """
+    pools = {}
+    if any(db["ENGINE"].endswith("pooled_postgresql") for db in settings.DATABASES.values()):
+        from .pooled_postgresql.base import process_pools
+        pools = process_pools()
+    report = {}
+    for alias in settings.DATABASES:
+        ok, latency = check_database(alias)
+        report[alias] = {"ok": ok, "latency_ms": latency}
+        if alias in pools:
+            report[alias]["pool"] = pools[alias].stats()
+    healthy = report[DEFAULT_DB_ALIAS]["ok"]
+    return JsonResponse({"ok": healthy, "databases": report}, status=200 if healthy else 503)
@@ -0,0 +1,324 @@
+"""
+Opt-in request, task and consumer instrumentation (INSTRUMENTATION_ENABLED).
+
+Each unit of work gets a `Timings` record in a context variable; a DB
+execute_wrapper counts queries and SQL time into it, and the DRF mixin adds
+serializer and permission time. Requests report it as a `Server-Timing`
+header, and everything is summed into a per-process registry. Registries
+add their totals to a Redis hash every few seconds, so `metrics_view`
+exposes the sums of all web and worker processes in the Prometheus text format.
+"""
+import functools
+import hmac
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+import redis
+from asgiref.sync import sync_to_async
+from celery.signals import task_postrun, task_prerun, worker_process_shutdown, worker_shutdown
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+current_timings = ContextVar("tracker_timings", default=None)
+
+
+def enabled():
+    return getattr(settings, "INSTRUMENTATION_ENABLED", False)
+
+
+class Timings:
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.serialize = 0.0
+        self.permissions = 0.0
+
+
+class QueryTimer:
+    """`connection.execute_wrapper` hook adding every query to the current Timings."""
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            timings = current_timings.get()
+            if timings is not None:
+                timings.queries += 1
+                timings.sql += time.perf_counter() - started
+
+
+query_timer = QueryTimer()
+
+
+class Measured:
+    """Context manager that tracks one unit of work: Timings plus the DB hooks."""
+
+    def __enter__(self):
+        self.timings = Timings()
+        self.token = current_timings.set(self.timings)
+        self.stack = ExitStack()
+        for connection in connections.all():
+            self.stack.enter_context(connection.execute_wrapper(query_timer))
+        self.started = time.perf_counter()
+        return self.timings
+
+    def __exit__(self, *exc_info):
+        self.elapsed = time.perf_counter() - self.started
+        self.stack.close()
+        current_timings.reset(self.token)
+
+
+@contextmanager
+def timing(attribute):
+    """Add the time spent in the block to `attribute` of the current Timings, if any."""
+    timings = current_timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(timings, attribute, getattr(timings, attribute) + time.perf_counter() - started)
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+@functools.cache
+def shared_redis():
+    return redis.Redis.from_url(settings.METRICS_REDIS_URL)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and summaries, rendered in the Prometheus text format.
+    `flush` adds what changed since the previous flush to the `shared_key`
+    hash, which `render_shared` reads back.
+    """
+
+    shared_key = "tracker:metrics"
+
+    def __init__(self, flush_interval=5.0):
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._types = {}
+        self._help = {}
+        self._values = defaultdict(float)
+        self._flushed = {}
+        self._flushed_at = time.monotonic()
+
+    def describe(self, name, kind, help_text):
+        self._types[name] = kind
+        self._help[name] = help_text
+
+    def inc(self, name, value=1.0, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] += value
+
+    def observe(self, name, value, **labels):
+        self.inc(f"{name}_sum", value, **labels)
+        self.inc(f"{name}_count", 1, **labels)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+            self._flushed.clear()
+
+    def flush_due(self):
+        return time.monotonic() - self._flushed_at >= self.flush_interval
+
+    def flush(self):
+        """Add the increments since the last flush to the shared hash."""
+        with self._lock:
+            deltas = {
+                key: value - self._flushed.get(key, 0.0)
+                for key, value in self._values.items() if value != self._flushed.get(key, 0.0)
+            }
+            self._flushed = dict(self._values)
+            self._flushed_at = time.monotonic()
+        if not deltas:
+            return
+        try:
+            pipe = shared_redis().pipeline(transaction=False)
+            for (name, labels), delta in deltas.items():
+                pipe.hincrbyfloat(self.shared_key, json.dumps([name, labels]), delta)
+            pipe.execute()
+        except redis.RedisError:
+            # carried over to the next flush
+            with self._lock:
+                for key, delta in deltas.items():
+                    self._flushed[key] -= delta
+
+    def maybe_flush(self):
+        if self.flush_due():
+            self.flush()
+
+    def render(self):
+        """This process's totals."""
+        with self._lock:
+            values = dict(self._values)
+        return self._render(values)
+
+    def render_shared(self):
+        """Totals of every process, as of their last flush."""
+        values = {}
+        for field, value in shared_redis().hgetall(self.shared_key).items():
+            name, labels = json.loads(field)
+            values[(name, tuple(tuple(label) for label in labels))] = float(value)
+        return self._render(values)
+
+    def _render(self, values):
+        lines, described = [], set()
+        for (name, labels), value in sorted(values.items()):
+            family = name[:-4] if name.endswith("_sum") else name[:-6] if name.endswith("_count") else name
+            if family in self._types and family not in described:
+                described.add(family)
+                lines.append(f"# HELP {family} {self._help[family]}")
+                lines.append(f"# TYPE {family} {self._types[family]}")
+            label_text = ",".join(f'{key}="{escape_label(value)}"' for key, value in labels)
+            lines.append(f"{name}{{{label_text}}} {value:g}" if labels else f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+registry.describe("tracker_http_request_seconds", "summary", "Request wall time by view.")
+registry.describe("tracker_http_db_queries_total", "counter", "Queries run by requests.")
+registry.describe("tracker_http_db_seconds_total", "counter", "SQL time spent by requests.")
+registry.describe("tracker_http_serialize_seconds_total", "counter", "Serializer time spent by DRF views.")
+registry.describe("tracker_http_permission_seconds_total", "counter", "Permission check time spent by DRF views.")
+registry.describe("tracker_task_seconds", "summary", "Celery task run time.")
+registry.describe("tracker_task_db_queries_total", "counter", "Queries run by Celery tasks.")
+registry.describe("tracker_task_db_seconds_total", "counter", "SQL time spent by Celery tasks.")
+registry.describe("tracker_ws_handler_seconds", "summary", "Channels consumer handler time by message type.")
+
+
+def view_label(request):
+    match = getattr(request, "resolver_match", None)
+    return (match.view_name if match else None) or "unresolved"
+
+
+class InstrumentationMiddleware:
+    """Measure each request; add a `Server-Timing` header and feed the registry."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not enabled():
+            return self.get_response(request)
+        measured = Measured()
+        with measured as timings:
+            response = self.get_response(request)
+            if hasattr(response, "render") and not response.is_rendered:
+                # rendering is part of the request cost
+                response.render()
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={timings.sql * 1000:.1f};desc="{timings.queries} queries"',
+            f"serialize;dur={timings.serialize * 1000:.1f}",
+            f"permissions;dur={timings.permissions * 1000:.1f}",
+            f"total;dur={measured.elapsed * 1000:.1f}",
+        ])
+        view = view_label(request)
+        registry.observe("tracker_http_request_seconds", measured.elapsed, view=view, method=request.method, status=response.status_code)
+        registry.inc("tracker_http_db_queries_total", timings.queries, view=view)
+        registry.inc("tracker_http_db_seconds_total", timings.sql, view=view)
+        registry.inc("tracker_http_serialize_seconds_total", timings.serialize, view=view)
+        registry.inc("tracker_http_permission_seconds_total", timings.permissions, view=view)
+        registry.maybe_flush()
+        return response
+
+
+class InstrumentedViewMixin:
+    """DRF mixin adding permission-check and serializer time to the request's Timings."""
+
+    def _timed(self, attribute, func, *args, **kwargs):
+        with timing(attribute):
+            return func(*args, **kwargs)
+
+    def check_permissions(self, request):
+        return self._timed("permissions", super().check_permissions, request)
+
+    def check_object_permissions(self, request, obj):
+        return self._timed("permissions", super().check_object_permissions, request, obj)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if current_timings.get() is not None:
+            # the top-level call only: nested serializers run inside it
+            represent = serializer.to_representation
+            serializer.to_representation = lambda instance: self._timed("serialize", represent, instance)
+        return serializer
+
+
+class InstrumentedConsumerMixin:
+    """Time every channels message handler of a consumer."""
+
+    async def dispatch(self, message):
+        if not enabled():
+            return await super().dispatch(message)
+        started = time.perf_counter()
+        try:
+            return await super().dispatch(message)
+        finally:
+            registry.observe(
+                "tracker_ws_handler_seconds", time.perf_counter() - started,
+                consumer=type(self).__name__, message=message.get("type", ""),
+            )
+            if registry.flush_due():
+                await sync_to_async(registry.flush, thread_sensitive=False)()
+
+
+_running_tasks = {}
+
+
+@task_prerun.connect
+def start_task_timing(task_id=None, task=None, **kwargs):
+    if enabled():
+        measured = Measured()
+        measured.__enter__()
+        _running_tasks[task_id] = measured
+
+
+@task_postrun.connect
+def finish_task_timing(task_id=None, task=None, state=None, **kwargs):
+    measured = _running_tasks.pop(task_id, None)
+    if measured is None:
+        return
+    measured.__exit__(None, None, None)
+    name = getattr(task, "name", "unknown")
+    registry.observe("tracker_task_seconds", measured.elapsed, task=name, state=state or "")
+    registry.inc("tracker_task_db_queries_total", measured.timings.queries, task=name)
+    registry.inc("tracker_task_db_seconds_total", measured.timings.sql, task=name)
+    registry.maybe_flush()
+
+
+@worker_shutdown.connect
+@worker_process_shutdown.connect
+def flush_task_metrics(**kwargs):
+    if enabled():
+        registry.flush()
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint for the totals of every process; requires
+    `Bearer METRICS_TOKEN`, and is refused outright while no token is set.
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if not token or not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponseForbidden()
+    registry.flush()
+    try:
+        body = registry.render_shared()
+    except redis.RedisError:
+        return HttpResponse("metrics store unavailable\n", status=503, content_type="text/plain")
+    return HttpResponse(body, content_type="text/plain; version=0.0.4")
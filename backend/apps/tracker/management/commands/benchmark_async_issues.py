@@ -0,0 +1,76 @@
+import asyncio
+import statistics
+import time
+
+from channels.testing import HttpCommunicator
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils.http import urlencode
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.tracker.benchmarks.data import BENCH_PREFIX, bench_organizations, generate_issues
+from apps.tracker.models import Issue, Membership
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the issue list through the ASGI handler, comparing the sync "
+        "IssueViewSet with the async endpoint, and report requests/sec and latency "
+        "percentiles per concurrency level within one worker process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--issues", type=int, default=5000)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+        parser.add_argument("--page-size", type=int, default=50)
+
+    def handle(self, *args, **opts):
+        if Issue.objects.filter(organization__in=bench_organizations()).count() < opts["issues"]:
+            generate_issues(opts["issues"], stdout=self.stdout)
+        user, _ = User.objects.get_or_create(username=f"{BENCH_PREFIX}async-user")
+        for org in bench_organizations():
+            Membership.objects.get_or_create(user=user, organization=org)
+        headers = [(b"authorization", f"Bearer {AccessToken.for_user(user)}".encode()), (b"host", b"testserver")]
+        params = {"page_size": opts["page_size"], "status": "open"}
+
+        # requests go through Django's ASGI handler, as under daphne
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            for concurrency in opts["concurrency"]:
+                for label, url in (("sync", reverse("issue-list")), ("async", reverse("async-issue-list"))):
+                    # a bare event loop, as under daphne: async_to_sync would funnel every
+                    # thread-sensitive ORM call onto this thread and serialize the requests
+                    asyncio.run(self.load(url, params, headers, concurrency, concurrency))  # warm-up
+                    latencies, elapsed = asyncio.run(self.load(url, params, headers, opts["requests"], concurrency))
+                    self.report(label, concurrency, latencies, elapsed)
+
+    def report(self, label, concurrency, latencies, elapsed):
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f"{label:>5} c={concurrency:<4} {len(latencies) / elapsed:8.1f} req/s  "
+            f"p50 {statistics.median(latencies) * 1000:7.1f}ms  p95 {p95 * 1000:7.1f}ms"
+        )
+
+    async def load(self, url, params, headers, total, concurrency):
+        application = get_asgi_application()
+        semaphore = asyncio.Semaphore(concurrency)
+        run = time.time_ns()
+        latencies = []
+
+        async def one(n):
+            async with semaphore:
+                started = time.perf_counter()
+                # a distinct query string per request keeps the sync list's response cache out of the picture
+                path = f"{url}?{urlencode({**params, 'n': f'{run}-{n}'})}"
+                response = await HttpCommunicator(application, "GET", path, headers=headers).get_response(timeout=60)
+                if response["status"] != 200:
+                    raise RuntimeError(f"{url} answered {response['status']}")
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(n) for n in range(total)))
+        return latencies, time.perf_counter() - started
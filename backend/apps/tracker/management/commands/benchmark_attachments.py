@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from apps.tracker.benchmarks.data import BENCH_PREFIX
+from apps.tracker.models import Issue, IssueAttachment, Membership, Organization, Project
+
+MB = 1024 * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure attachment throughput in MB/s: multipart uploads (new and duplicate "
+        "content), resumable chunked uploads and full/range downloads. Files are "
+        "written to a throwaway MEDIA_ROOT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size-mb", type=int, default=64)
+        parser.add_argument("--chunk-mb", type=int, default=8)
+        parser.add_argument("--repeat", type=int, default=3)
+
+    def handle(self, *args, **opts):
+        size = opts["size_mb"] * MB
+        user, _ = User.objects.get_or_create(username=f"{BENCH_PREFIX}files-user")
+        org, _ = Organization.objects.get_or_create(name=f"{BENCH_PREFIX}files-org")
+        Membership.objects.get_or_create(user=user, organization=org)
+        project, _ = Project.objects.get_or_create(organization=org, name="files-project")
+        issue, _ = Issue.objects.get_or_create(project=project, title="files-issue")
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        media_root = tempfile.mkdtemp()
+        try:
+            # the in-process test client talks to "testserver"
+            with override_settings(MEDIA_ROOT=media_root, ATTACHMENT_SERVE_MODE="django", ALLOWED_HOSTS=["testserver"]):
+                self.run_phases(client, issue, size, opts["chunk_mb"] * MB, opts["repeat"])
+                blobs = sum(len(files) for _, _, files in os.walk(os.path.join(media_root, "blobs")))
+                self.stdout.write(f"attachments: {issue.attachments.count()}, blobs on disk: {blobs}")
+        finally:
+            IssueAttachment.objects.filter(issue=issue).delete()
+            shutil.rmtree(media_root, ignore_errors=True)
+
+    def report(self, label, nbytes, elapsed):
+        self.stdout.write(f"{label}: {nbytes / MB / elapsed:.1f} MB/s ({elapsed:.2f}s)")
+
+    def run_phases(self, client, issue, size, chunk_size, repeat):
+        upload_url = reverse("issue-upload", kwargs={"pk": issue.id})
+        payloads = [os.urandom(size) for _ in range(repeat)]
+
+        started = time.perf_counter()
+        ids = []
+        for n, payload in enumerate(payloads):
+            response = client.post(upload_url, {"file": SimpleUploadedFile(f"new-{n}.bin", payload)}, format="multipart")
+            ids.append(response.data["id"])
+        self.report("upload (new content)", size * repeat, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for n in range(repeat):
+            client.post(upload_url, {"file": SimpleUploadedFile(f"dup-{n}.bin", payloads[0])}, format="multipart")
+        self.report("upload (duplicate content)", size * repeat, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for n, payload in enumerate(payloads):
+            session = client.post(
+                reverse("issue-start-upload", kwargs={"pk": issue.id}),
+                {"filename": f"chunked-{n}.bin", "size": size}, format="json",
+            ).data
+            chunk_url = reverse("issue-upload-chunk", kwargs={"pk": issue.id, "session_id": session["id"]})
+            for offset in range(0, size, chunk_size):
+                client.generic(
+                    "PATCH", chunk_url, payload[offset:offset + chunk_size],
+                    content_type="application/offset+octet-stream", HTTP_UPLOAD_OFFSET=str(offset),
+                )
+        self.report(f"chunked upload ({chunk_size // MB} MB chunks)", size * repeat, time.perf_counter() - started)
+
+        download_url = reverse("issue-download", kwargs={"pk": issue.id, "attachment_id": ids[0]})
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for _ in client.get(download_url).streaming_content:
+                pass
+        self.report("download (full)", size * repeat, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for n in range(repeat):
+            start = (n * chunk_size) % max(size - chunk_size, 1)
+            for _ in client.get(download_url, HTTP_RANGE=f"bytes={start}-{start + chunk_size - 1}").streaming_content:
+                pass
+        self.report("download (range)", min(chunk_size, size) * repeat, time.perf_counter() - started)
@@ -0,0 +1,118 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.tracker.benchmarks.data import BENCH_PREFIX
+from apps.tracker.cache import project_membership_cache, token_user_cache
+from apps.tracker.middlewares import JWTAuthMiddlewareStack
+from apps.tracker.models import Membership, Organization, Project
+from apps.tracker.routing import websocket_urlpatterns
+
+# (ENGINE, CONN_MAX_AGE) of each compared setup
+MODES = {
+    "direct": ("django.db.backends.postgresql", 0),
+    "persistent": ("django.db.backends.postgresql", 600),
+    "pooled": ("apps.tracker.pooled_postgresql", 0),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure database connection churn during WebSocket connect bursts: physical "
+        "Postgres connections opened and connects/sec with a new connection per "
+        "query, persistent connections and the connection pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+        parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+
+    def handle(self, *args, **opts):
+        if connections[DEFAULT_DB_ALIAS].vendor != "postgresql":
+            raise CommandError("connection churn is measured against PostgreSQL")
+        org, _ = Organization.objects.get_or_create(name=f"{BENCH_PREFIX}ws-org")
+        project, _ = Project.objects.get_or_create(organization=org, name="ws-project")
+        users = []
+        for n in range(opts["users"]):
+            user, _ = User.objects.get_or_create(username=f"{BENCH_PREFIX}ws-user-{n}")
+            Membership.objects.get_or_create(user=user, organization=org)
+            users.append(user)
+        tokens = [str(AccessToken.for_user(users[n % len(users)])) for n in range(opts["connections"])]
+        application = JWTAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+
+        # database_sync_to_async runs in this thread, so swapping the wrapper here covers every query
+        db_settings = connections.settings[DEFAULT_DB_ALIAS]
+        original = (db_settings["ENGINE"], db_settings["CONN_MAX_AGE"])
+        report = []
+        try:
+            for mode in opts["modes"]:
+                report.append(self.run_mode(mode, application, project.id, tokens, opts["concurrency"]))
+        finally:
+            self.use_backend(*original)
+
+        for row in report:
+            self.stdout.write(
+                f"{row['mode']}: {row['connected']}/{len(tokens)} connected in {row['seconds']:.2f}s "
+                f"({row['connects_per_sec']:.0f} connects/sec), {row['django_connects']} connection checkouts, "
+                f"{row['physical_connections']} Postgres connections opened"
+            )
+        if opts["json_path"]:
+            with open(opts["json_path"], "w") as fh:
+                json.dump(report, fh, indent=2)
+
+    def use_backend(self, engine, max_age):
+        connections[DEFAULT_DB_ALIAS].close()
+        del connections[DEFAULT_DB_ALIAS]
+        db_settings = connections.settings[DEFAULT_DB_ALIAS]
+        db_settings["ENGINE"], db_settings["CONN_MAX_AGE"] = engine, max_age
+
+    def run_mode(self, mode, application, project_id, tokens, concurrency):
+        self.use_backend(*MODES[mode])
+        # every connect authenticates and checks membership against the database
+        token_user_cache.clear()
+        project_membership_cache.clear()
+        opened = []
+
+        def record(sender, connection, **kwargs):
+            opened.append(connection.connection)
+
+        connection_created.connect(record)
+        try:
+            connected, elapsed = async_to_sync(self.burst)(application, project_id, tokens, concurrency)
+        finally:
+            connection_created.disconnect(record)
+        return {
+            "mode": mode,
+            "connected": connected,
+            "seconds": round(elapsed, 3),
+            "connects_per_sec": round(len(tokens) / elapsed, 1),
+            "django_connects": len(opened),
+            # a pooled connection is handed out many times but opened once
+            "physical_connections": len({id(raw) for raw in opened}),
+        }
+
+    async def burst(self, application, project_id, tokens, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def client(token):
+            async with semaphore:
+                communicator = WebsocketCommunicator(application, f"/ws/projects/{project_id}/?token={token}")
+                connected, _ = await communicator.connect(timeout=10)
+                await communicator.disconnect()
+                return connected
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(client(token) for token in tokens))
+        return sum(results), time.perf_counter() - started
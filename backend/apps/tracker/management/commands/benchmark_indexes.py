@@ -0,0 +1,98 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from apps.tracker.benchmarks.data import bench_organizations, generate_issues
+from apps.tracker.models import Issue, Project
+
+
+class Command(BaseCommand):
+    help = (
+        "Load synthetic issues and report EXPLAIN plans and timings for the issue "
+        "filter/order/overdue queries with and without the Issue indexes. "
+        "Run against a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--issues", type=int, default=1_000_000)
+        parser.add_argument("--orgs", type=int, default=20)
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5, help="runs per query; the median is reported")
+        parser.add_argument("--reuse", action="store_true", help="reuse previously loaded bench data")
+        parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+
+    def handle(self, *args, **opts):
+        if opts["reuse"] and bench_organizations().exists():
+            self.stdout.write("Reusing existing bench data")
+        else:
+            self.stdout.write(f"Loading {opts['issues']} synthetic issues...")
+            generate_issues(opts["issues"], orgs=opts["orgs"], batch_size=opts["batch_size"], stdout=self.stdout)
+
+        queries = self.build_queries()
+        indexes = Issue._meta.indexes
+
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.remove_index(Issue, index)
+        self.analyze()
+        before = self.run_queries(queries, opts["repeat"])
+
+        with connection.schema_editor() as editor:
+            for index in indexes:
+                editor.add_index(Issue, index)
+        self.analyze()
+        after = self.run_queries(queries, opts["repeat"])
+
+        report = []
+        for label in queries:
+            report.append({"query": label, "before": before[label], "after": after[label]})
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            for phase, result in (("before", before[label]), ("after", after[label])):
+                self.stdout.write(f"  {phase}: {result['median_ms']:.2f} ms")
+                for line in result["plan"].splitlines():
+                    self.stdout.write(f"    {line}")
+
+        if opts["json_path"]:
+            with open(opts["json_path"], "w") as fh:
+                json.dump(report, fh, indent=2)
+
+    def build_queries(self):
+        project = Project.objects.filter(organization__in=bench_organizations()).first()
+        assignee_id = (
+            Issue.objects.filter(project=project, assigned_to__isnull=False)
+            .values_list("assigned_to_id", flat=True).first()
+        )
+        today = timezone.localdate()
+        return {
+            "project status filter ordered by due_date": (
+                Issue.objects.filter(project=project, status="open").order_by("due_date")[:50]
+            ),
+            "project priority filter": Issue.objects.filter(project=project, priority="high")[:50],
+            "project ordered by created_at": Issue.objects.filter(project=project).order_by("-created_at")[:50],
+            "assignee open issues": Issue.objects.filter(assigned_to_id=assignee_id).exclude(status="done")[:50],
+            "overdue scan": Issue.objects.filter(due_date__lt=today).exclude(status="done").values("id"),
+        }
+
+    def run_queries(self, queries, repeat):
+        explain_options = {"analyze": True} if connection.vendor == "postgresql" else {}
+        results = {}
+        for label, qs in queries.items():
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(qs.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[label] = {
+                "median_ms": statistics.median(timings),
+                "plan": qs.explain(**explain_options),
+            }
+        return results
+
+    def analyze(self):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Issue._meta.db_table}")
@@ -0,0 +1,84 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from apps.tracker.benchmarks.data import bench_issues, generate_attachments, generate_issues
+from apps.tracker.models import IssueAttachment
+from apps.tracker.row_serializers import IssueRowSerializer
+from apps.tracker.serializers import IssueSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare IssueSerializer with the values()-based IssueRowSerializer on pages "
+        "of synthetic issues: fetch + render time, render time alone and queries, "
+        "for the full shape and a sparse fieldset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--issues", type=int, default=20000)
+        parser.add_argument("--attachments", type=int, default=5000)
+        parser.add_argument("--page-size", type=int, nargs="+", default=[50, 500])
+        parser.add_argument("--repeat", type=int, default=20, help="runs per variant; the median is reported")
+        parser.add_argument(
+            "--fields", default="id,title,status,priority,due_date",
+            help="sparse fieldset measured with expand= (no nested objects)",
+        )
+
+    def handle(self, *args, **opts):
+        if bench_issues().count() < opts["issues"]:
+            generate_issues(opts["issues"], stdout=self.stdout)
+        if IssueAttachment.objects.filter(issue__in=bench_issues()).count() < opts["attachments"]:
+            generate_attachments(opts["attachments"])
+
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            request = RequestFactory().get("/api/v1/issues/")
+            queryset = bench_issues().order_by("-created_at", "-id")
+            variants = {
+                "IssueSerializer": self.drf_page,
+                "IssueRowSerializer": self.rows_page(IssueRowSerializer(context={"request": request})),
+                "IssueRowSerializer sparse": self.rows_page(
+                    IssueRowSerializer(fields=opts["fields"].split(","), expand=[], context={"request": request})
+                ),
+            }
+            for page_size in opts["page_size"]:
+                self.stdout.write(self.style.MIGRATE_HEADING(f"page of {page_size} issues"))
+                baseline = None
+                for label, page in variants.items():
+                    total, render, queries = self.measure(page, queryset, page_size, request, opts["repeat"])
+                    baseline = baseline or total
+                    self.stdout.write(
+                        f"  {label:<26} {total:8.2f} ms total  {render:8.2f} ms render  "
+                        f"{render * 1000 / page_size:7.1f} us/issue  {queries} queries  x{baseline / total:.1f}"
+                    )
+
+    def drf_page(self, queryset, page_size, request):
+        rows = list(IssueSerializer.setup_eager_loading(queryset)[:page_size])
+        started = time.perf_counter()
+        IssueSerializer(rows, many=True, context={"request": request}).data
+        return time.perf_counter() - started
+
+    def rows_page(self, serializer):
+        def page(queryset, page_size, request):
+            rows = list(serializer.select(queryset)[:page_size])
+            attachment_rows = None
+            if serializer.attachments is not None:
+                attachment_rows = list(serializer.attachment_queryset([row["id"] for row in rows]))
+            started = time.perf_counter()
+            serializer.render(rows, attachment_rows)
+            return time.perf_counter() - started
+        return page
+
+    def measure(self, page, queryset, page_size, request, repeat):
+        page(queryset, page_size, request)  # warm-up
+        totals, renders = [], []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                renders.append(page(queryset, page_size, request))
+                totals.append(time.perf_counter() - started)
+        return statistics.median(totals) * 1000, statistics.median(renders) * 1000, len(queries)
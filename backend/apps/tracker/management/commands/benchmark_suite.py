@@ -0,0 +1,126 @@
+import json
+import platform
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.tracker.benchmarks.data import (
+    BENCH_PREFIX, bench_issues, bench_organizations, generate_attachments, generate_issues, generate_memberships,
+)
+from apps.tracker.benchmarks.suite import build_scenarios, compare, measure
+from apps.tracker.models import Membership, Project
+
+
+class Command(BaseCommand):
+    help = (
+        "Load synthetic orgs, memberships, projects, issues and attachments, then time "
+        "the hot paths (issue list/filter/search, project list, permission checks, "
+        "WebSocket connect/broadcast, send_overdue_reminders). Reports latency "
+        "percentiles, query counts and peak memory as JSON and compares them with a "
+        "baseline report. Run against a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--orgs", type=int, default=20)
+        parser.add_argument("--projects-per-org", type=int, default=5)
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--members-per-org", type=int, default=20)
+        parser.add_argument("--issues", type=int, default=100_000)
+        parser.add_argument("--attachments", type=int, default=10_000)
+        parser.add_argument("--viewer-orgs", type=int, default=3, help="organizations the timed user belongs to")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--reuse", action="store_true", help="reuse previously loaded bench data")
+        parser.add_argument("--repeat", type=int, default=20, help="timed runs per scenario")
+        parser.add_argument("--ws-clients", type=int, default=20)
+        parser.add_argument("--scenario", action="append", help="run only these scenarios (repeatable)")
+        parser.add_argument("--output", help="write the JSON report to this file")
+        parser.add_argument("--baseline", help="compare with this JSON report")
+        parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p95 slowdown over the baseline")
+        parser.add_argument("--fail-on-regression", action="store_true")
+
+    def handle(self, *args, **opts):
+        if opts["reuse"] and bench_organizations().exists():
+            self.stdout.write("Reusing existing bench data")
+        else:
+            self.load(opts)
+        viewer = self.viewer(opts["viewer_orgs"])
+        project_id = Project.objects.filter(organization__members__user=viewer).values_list("id", flat=True).first()
+
+        scenarios = build_scenarios(viewer, project_id, ws_clients=opts["ws_clients"])
+        if opts["scenario"]:
+            unknown = set(opts["scenario"]) - {scenario.name for scenario in scenarios}
+            if unknown:
+                raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+            scenarios = [scenario for scenario in scenarios if scenario.name in opts["scenario"]]
+
+        report = {"meta": self.meta(opts), "scenarios": {}}
+        with override_settings(ALLOWED_HOSTS=["testserver"], EMAIL_BACKEND="django.core.mail.backends.dummy.EmailBackend"):
+            for scenario in scenarios:
+                result = measure(scenario, opts["repeat"])
+                report["scenarios"][scenario.name] = result
+                latency = result["latency_ms"]
+                self.stdout.write(
+                    f"{scenario.name:<24} p50 {latency['p50']:8.2f}ms  p95 {latency['p95']:8.2f}ms  "
+                    f"p99 {latency['p99']:8.2f}ms  {result['queries']:4d} queries  "
+                    f"peak {result['peak_memory_kb']:9.1f} KiB"
+                )
+
+        if opts["output"]:
+            with open(opts["output"], "w") as fh:
+                json.dump(report, fh, indent=2)
+        if opts["baseline"]:
+            self.compare(report, opts)
+
+    def load(self, opts):
+        self.stdout.write(f"Loading {opts['issues']} synthetic issues...")
+        _, user_ids = generate_issues(
+            opts["issues"], orgs=opts["orgs"], projects_per_org=opts["projects_per_org"],
+            users=opts["users"], seed=opts["seed"], stdout=self.stdout,
+        )
+        generate_memberships(user_ids, opts["members_per_org"], seed=opts["seed"])
+        generate_attachments(opts["attachments"], seed=opts["seed"])
+
+    def viewer(self, org_count):
+        user, _ = User.objects.get_or_create(username=f"{BENCH_PREFIX}viewer")
+        for org in bench_organizations().order_by("id")[:org_count]:
+            Membership.objects.get_or_create(user=user, organization=org)
+        return user
+
+    def meta(self, opts):
+        return {
+            "created_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "issues": bench_issues().count(),
+            "organizations": bench_organizations().count(),
+            "repeat": opts["repeat"],
+            "seed": opts["seed"],
+        }
+
+    def compare(self, report, opts):
+        with open(opts["baseline"]) as fh:
+            baseline = json.load(fh)
+        for key in ("database", "issues"):
+            if baseline.get("meta", {}).get(key) != report["meta"][key]:
+                self.stdout.write(self.style.WARNING(
+                    f"Baseline {key} {baseline.get('meta', {}).get(key)!r} differs from {report['meta'][key]!r}"
+                ))
+        rows, regressions = compare(report, baseline, opts["tolerance"])
+        self.stdout.write(self.style.MIGRATE_HEADING("Against baseline (p95 ms, queries)"))
+        for name, old_p95, new_p95, old_queries, new_queries in rows:
+            if old_p95 is None:
+                self.stdout.write(f"  {name:<24} new: {new_p95:.2f}ms, {new_queries} queries")
+            else:
+                self.stdout.write(
+                    f"  {name:<24} {old_p95:8.2f} -> {new_p95:8.2f} ({(new_p95 / old_p95 - 1) * 100 if old_p95 else 0:+.0f}%)"
+                    f"  {old_queries} -> {new_queries}"
+                )
+        for regression in regressions:
+            self.stdout.write(self.style.ERROR(f"Regression: {regression}"))
+        if regressions and opts["fail_on_regression"]:
+            raise CommandError(f"{len(regressions)} regression(s) against {opts['baseline']}")
@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+from asgiref.sync import async_to_sync
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.tracker.benchmarks.data import BENCH_PREFIX
+from apps.tracker.cache import project_membership_cache, token_user_cache
+from apps.tracker.middlewares import JWTAuthMiddlewareStack
+from apps.tracker.models import Membership, Organization, Project
+from apps.tracker.routing import websocket_urlpatterns
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate a WebSocket reconnect storm against ProjectConsumer and report "
+        "connects/sec with cold and warm auth/membership caches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--connections", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument("--users", type=int, default=50)
+
+    def handle(self, *args, **opts):
+        org, _ = Organization.objects.get_or_create(name=f"{BENCH_PREFIX}ws-org")
+        project, _ = Project.objects.get_or_create(organization=org, name="ws-project")
+        users = []
+        for n in range(opts["users"]):
+            user, _ = User.objects.get_or_create(username=f"{BENCH_PREFIX}ws-user-{n}")
+            Membership.objects.get_or_create(user=user, organization=org)
+            users.append(user)
+        # one token per client, as after a deploy every client reconnects once
+        tokens = [str(AccessToken.for_user(users[n % len(users)])) for n in range(opts["connections"])]
+        application = JWTAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+
+        token_user_cache.clear()
+        project_membership_cache.clear()
+        for phase in ("cold", "warm"):
+            connected, elapsed = async_to_sync(self.storm)(application, project.id, tokens, opts["concurrency"])
+            self.stdout.write(
+                f"{phase}: {connected}/{len(tokens)} connected in {elapsed:.2f}s "
+                f"({len(tokens) / elapsed:.0f} connects/sec)"
+            )
+
+    async def storm(self, application, project_id, tokens, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def client(token):
+            async with semaphore:
+                communicator = WebsocketCommunicator(application, f"/ws/projects/{project_id}/?token={token}")
+                connected, _ = await communicator.connect(timeout=10)
+                await communicator.disconnect()
+                return connected
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(client(token) for token in tokens))
+        return sum(results), time.perf_counter() - started
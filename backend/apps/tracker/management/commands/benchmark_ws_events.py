@@ -0,0 +1,84 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.tracker.benchmarks.data import BENCH_PREFIX
+from apps.tracker.consumers import ProjectConsumer
+from apps.tracker.middlewares import JWTAuthMiddlewareStack
+from apps.tracker.models import Membership, Organization, Project
+from apps.tracker.routing import websocket_urlpatterns
+
+
+class Command(BaseCommand):
+    help = (
+        "Flood a project group with issue events and report the frames and bytes "
+        "each ProjectConsumer connection sends per second, with and without the "
+        "coalescing window."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=20)
+        parser.add_argument("--events", type=int, default=2000)
+        parser.add_argument("--issues", type=int, default=50, help="distinct issue ids the events touch")
+        parser.add_argument("--window", type=float, default=ProjectConsumer.coalesce_window)
+
+    def handle(self, *args, **opts):
+        org, _ = Organization.objects.get_or_create(name=f"{BENCH_PREFIX}ws-org")
+        project, _ = Project.objects.get_or_create(organization=org, name="ws-project")
+        user, _ = User.objects.get_or_create(username=f"{BENCH_PREFIX}ws-events-user")
+        Membership.objects.get_or_create(user=user, organization=org)
+        path = f"/ws/projects/{project.id}/?token={AccessToken.for_user(user)}"
+
+        original = ProjectConsumer.coalesce_window
+        try:
+            for label, window in (("per-event frames", 0), (f"coalesced ({opts['window'] * 1000:.0f}ms)", opts["window"])):
+                ProjectConsumer.coalesce_window = window
+                frames, nbytes, events, elapsed = async_to_sync(self.flood)(path, project.id, opts)
+                clients = opts["clients"]
+                self.stdout.write(
+                    f"{label}: per client {frames / clients:.0f} frames, {nbytes / clients / 1024:.1f} KiB, "
+                    f"{events / clients:.0f} issue events; {frames / elapsed:.0f} frames/s, "
+                    f"{nbytes / elapsed / 1024:.0f} KiB/s over {elapsed:.2f}s"
+                )
+        finally:
+            ProjectConsumer.coalesce_window = original
+
+    async def flood(self, path, project_id, opts):
+        application = JWTAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+        clients = [WebsocketCommunicator(application, path) for _ in range(opts["clients"])]
+        for client in clients:
+            await client.connect()
+        layer = get_channel_layer()
+
+        started = time.perf_counter()
+        for n in range(opts["events"]):
+            await layer.group_send(f"project_{project_id}", {
+                "type": "issue.updated", "issue_id": n % opts["issues"], "project_id": project_id,
+                "title": f"Synthetic issue {n % opts['issues']}", "status": "in_progress",
+            })
+
+        async def drain(client):
+            frames = nbytes = events = 0
+            last = started
+            while not await client.receive_nothing(timeout=max(opts["window"] * 4, 0.2)):
+                text = await client.receive_from()
+                last = time.perf_counter()
+                frames += 1
+                nbytes += len(text.encode())
+                events += len(json.loads(text).get("events", [None]))
+            return frames, nbytes, events, last
+
+        totals = await asyncio.gather(*(drain(client) for client in clients))
+        for client in clients:
+            await client.disconnect()
+        # up to the last frame, not the idle wait that detects the end
+        elapsed = max(last for *_, last in totals) - started
+        return [sum(column) for column in list(zip(*totals))[:3]] + [elapsed]
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.tracker.partitioning import STRATEGIES, ReferencedByForeignKeys, plan_conversion
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert tracker_issue into a table partitioned by organization (PostgreSQL). "
+        "Existing issues are copied over in one transaction that locks the table, so "
+        "run it in a maintenance window, after a backup; --dry-run prints the SQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--strategy", choices=STRATEGIES, default="hash")
+        parser.add_argument("--partitions", type=int, default=16, help="number of hash partitions")
+        parser.add_argument(
+            "--org", dest="org_ids", type=int, action="append", default=[],
+            help="organization with a partition of its own (list strategy; repeatable)",
+        )
+        parser.add_argument(
+            "--drop-foreign-keys", action="store_true",
+            help="drop the foreign keys other tables hold on issues; a partitioned table can't be referenced by id alone",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="print the statements without running them")
+
+    def handle(self, *args, **opts):
+        if connection.vendor != "postgresql":
+            raise CommandError("declarative partitioning needs PostgreSQL")
+        if opts["strategy"] == "list" and not opts["org_ids"]:
+            raise CommandError("the list strategy needs at least one --org")
+        try:
+            statements, dropped = plan_conversion(
+                opts["strategy"], opts["partitions"], opts["org_ids"], drop_foreign_keys=opts["drop_foreign_keys"]
+            )
+        except ReferencedByForeignKeys as exc:
+            raise CommandError(f"{exc}; rerun with --drop-foreign-keys to drop them")
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        for table, name in dropped:
+            self.stderr.write(f"foreign key {name} on {table} is dropped")
+        if opts["dry_run"]:
+            for statement in statements:
+                self.stdout.write(f"{statement};")
+            return
+        with transaction.atomic(), connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+        self.stdout.write(self.style.SUCCESS(f"tracker_issue is now partitioned by organization ({opts['strategy']})"))
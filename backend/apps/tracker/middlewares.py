@@ -1,18 +1,37 @@
 # apps/tracker/middlewares.py
+import time
 from channels.auth import AuthMiddlewareStack
 from channels.db import database_sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from urllib.parse import parse_qs
+from .cache import token_user_cache
 
-@database_sync_to_async
-def get_user_from_token(token):
+jwt_authentication = JWTAuthentication()
+
+async def get_user_from_token(token, run_sync=database_sync_to_async):
+    """
+    Resolve a JWT to its user. Validated tokens are cached until they expire
+    (at most `token_user_cache.ttl`), so reconnect storms skip both the
+    signature check and the user query.
+
+    `run_sync` runs the user query. Consumers keep channels'
+    database_sync_to_async; HTTP views pass asgiref's sync_to_async, because
+    closing old connections around the query would close the request's own.
+    """
+    from django.contrib.auth.models import AnonymousUser
+    user = await token_user_cache.aget(token)
+    if user is not None:
+        return user
     try:
-        validated_token = JWTAuthentication().get_validated_token(token)
-        return JWTAuthentication().get_user(validated_token)
-    except (InvalidToken, TokenError):
-        from django.contrib.auth.models import AnonymousUser
+        validated_token = jwt_authentication.get_validated_token(token)
+        user = await run_sync(jwt_authentication.get_user)(validated_token)
+    except (InvalidToken, TokenError, AuthenticationFailed):
         return AnonymousUser()
+    expires_in = validated_token.get("exp", 0) - time.time()
+    token_user_cache.set(token, user, ttl=min(token_user_cache.ttl, expires_in))
+    return user
 
 class JWTAuthMiddleware:
     def __init__(self, app):
@@ -30,4 +49,4 @@ class JWTAuthMiddleware:
         return await self.app(scope, receive, send)
 
 def JWTAuthMiddlewareStack(app):
-    return JWTAuthMiddleware(AuthMiddlewareStack(app))
\ No newline at end of file
+    return JWTAuthMiddleware(AuthMiddlewareStack(app))
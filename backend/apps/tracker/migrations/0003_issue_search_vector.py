@@ -0,0 +1,64 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+# The tsvector trigger and the GIN/trigram indexes are PostgreSQL-only; on other
+# databases the column stays NULL and IssueSearchFilter falls back to icontains.
+FORWARD_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE OR REPLACE FUNCTION tracker_issue_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('pg_catalog.english', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('pg_catalog.english', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER tracker_issue_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF title, description ON tracker_issue
+    FOR EACH ROW EXECUTE FUNCTION tracker_issue_search_vector_update()
+    """,
+    """
+    UPDATE tracker_issue SET search_vector =
+        setweight(to_tsvector('pg_catalog.english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('pg_catalog.english', coalesce(description, '')), 'B')
+    """,
+    "CREATE INDEX issue_search_vector_idx ON tracker_issue USING gin (search_vector)",
+    "CREATE INDEX issue_title_trgm_idx ON tracker_issue USING gin (title gin_trgm_ops)",
+    "CREATE INDEX issue_description_trgm_idx ON tracker_issue USING gin (description gin_trgm_ops)",
+]
+
+REVERSE_SQL = [
+    "DROP INDEX IF EXISTS issue_description_trgm_idx",
+    "DROP INDEX IF EXISTS issue_title_trgm_idx",
+    "DROP INDEX IF EXISTS issue_search_vector_idx",
+    "DROP TRIGGER IF EXISTS tracker_issue_search_vector_trigger ON tracker_issue",
+    "DROP FUNCTION IF EXISTS tracker_issue_search_vector_update()",
+]
+
+
+def run_postgres_sql(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != "postgresql":
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0002_issue_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='issue',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(run_postgres_sql(FORWARD_SQL), run_postgres_sql(REVERSE_SQL)),
+    ]
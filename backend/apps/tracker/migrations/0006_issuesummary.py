@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-17 15:38
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def populate_summaries(apps, schema_editor):
+    Issue = apps.get_model('tracker', 'Issue')
+    IssueSummary = apps.get_model('tracker', 'IssueSummary')
+    today = timezone.localdate()
+    rows = (
+        Issue.objects.values_list('project_id', 'status', 'priority')
+        .annotate(n=Count('id'), overdue=Count('id', filter=Q(due_date__lt=today) & ~Q(status='done')))
+        .order_by()
+    )
+    IssueSummary.objects.bulk_create(
+        [
+            IssueSummary(project_id=project_id, status=status, priority=priority, count=n, overdue=overdue)
+            for project_id, status, priority, n, overdue in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0005_reminder_state'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IssueSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=50)),
+                ('priority', models.CharField(max_length=50)),
+                ('count', models.IntegerField(default=0)),
+                ('overdue', models.IntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='issue_summaries', to='tracker.project')),
+            ],
+            options={
+                'unique_together': {('project', 'status', 'priority')},
+            },
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0008_issue_tombstones'),
+    ]
+
+    operations = [
+        # nullable until 0011 has backfilled it
+        migrations.AddField(
+            model_name='issue',
+            name='organization',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='issues', to='tracker.organization'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+# rows updated per statement while backfilling, so a large table is never locked as a whole
+BACKFILL_BATCH_SIZE = 50000
+
+
+def backfill_issue_organization(apps, schema_editor):
+    Issue = apps.get_model("tracker", "Issue")
+    Project = apps.get_model("tracker", "Project")
+    organization = models.Subquery(Project.objects.filter(pk=models.OuterRef("project_id")).values("organization_id")[:1])
+    pending = Issue.objects.filter(organization__isnull=True)
+    last_id = pending.aggregate(models.Max("id"))["id__max"] or 0
+    for start in range(0, last_id, BACKFILL_BATCH_SIZE):
+        pending.filter(id__gt=start, id__lte=start + BACKFILL_BATCH_SIZE).update(organization_id=organization)
+
+
+class Migration(migrations.Migration):
+    # the backfill commits batch by batch; after a failure, a rerun picks up the
+    # rows still missing their organization
+    atomic = False
+
+    dependencies = [
+        ('tracker', '0010_uploadsession_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_issue_organization, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='issue',
+            name='organization',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='issues', to='tracker.organization'),
+        ),
+    ]
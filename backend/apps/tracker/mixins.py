@@ -0,0 +1,88 @@
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import get_org_versions, orgs_written_recently
+from .instrumentation import timing
+from .permissions import get_user_org_ids
+from .replicas import reading_from_replica
+
+
+class ConditionalResponseMixin:
+    """
+    Answer `If-None-Match` with 304 and tag responses with an ETag for revalidation.
+    No Last-Modified: the newest `updated_at` of a response misses deletes,
+    attachment changes and membership changes, all of which change the ETag.
+    """
+
+    def conditional_response(self, request, data, etag):
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if get_conditional_response(request._request, etag=etag) is not None:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(data, headers=headers)
+
+    def retrieve(self, request, *args, **kwargs):
+        data = self.get_serializer(self.get_object()).data
+        etag = '"%s"' % hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()[:32]
+        return self.conditional_response(request, data, etag)
+
+
+class CachedListMixin(ConditionalResponseMixin):
+    """
+    Read-through cache for `list` responses, keyed by the URL and the caller's
+    `(organization, version)` pairs. Writes bump the versions of the affected
+    organizations (see signals.py), which retires every cached page of theirs
+    at once; the key doubles as the response ETag.
+
+    A page read from a replica right after one of the organizations was
+    written may predate the write, so it is neither cached nor tagged: either
+    would keep serving it under the new version after the replica caught up.
+    """
+
+    list_cache_timeout = 300
+
+    def list_cache_key(self, request, org_ids):
+        versions = get_org_versions(org_ids)
+        raw = json.dumps([
+            self.basename,
+            request.build_absolute_uri(request.path),
+            sorted(request.query_params.lists()),
+            [(org_id, versions[org_id]) for org_id in org_ids],
+        ], default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def list(self, request, *args, **kwargs):
+        org_ids = sorted(get_user_org_ids(request))
+        digest = self.list_cache_key(request, org_ids)
+        key = f"list-page:{digest}"
+        data = cache.get(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            if reading_from_replica() and orgs_written_recently(org_ids):
+                return Response(data, headers={"Cache-Control": "private, no-cache"})
+            cache.set(key, data, self.list_cache_timeout)
+        return self.conditional_response(request, data, f'"{digest[:32]}"')
+
+
+class RowListMixin:
+    """
+    `list` rendered by `row_serializer_class` from `.values()` rows instead of
+    the DRF serializer; the rest of the viewset keeps `serializer_class`.
+    """
+
+    row_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        row_serializer = self.row_serializer_class.from_request(request)
+        queryset = row_serializer.select(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        rows = list(queryset) if page is None else page
+        with timing("serialize"):
+            data = row_serializer.render(rows)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
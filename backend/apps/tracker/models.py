@@ -1,5 +1,10 @@
-from django.db import models
+import uuid
+
+from django.db import models, router, transaction
+from django.utils import timezone
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
+from .attachments import get_attachment_storage
 
 class Organization(models.Model):
     name = models.CharField(max_length=255)
@@ -8,6 +13,12 @@ class Organization(models.Model):
     def __str__(self):
         return self.name
 
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(Organization, instance=self)
+        with transaction.atomic(using=using):
+            delete_issues(Issue.objects.using(using).filter(organization=self))
+            return super().delete(using=using, keep_parents=keep_parents)
+
 class Membership(models.Model):
     ROLE_OWNER = "owner"
     ROLE_MANAGER = "manager"
@@ -34,11 +45,36 @@ class Project(models.Model):
     def __str__(self):
         return f"{self.organization.name} / {self.name}"
 
+    def delete(self, using=None, keep_parents=False):
+        using = using or router.db_for_write(Project, instance=self)
+        with transaction.atomic(using=using):
+            delete_issues(Issue.objects.using(using).filter(project=self))
+            return super().delete(using=using, keep_parents=keep_parents)
+
+class IssueQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk inserts skip save(), so fill the denormalized organization here
+        objs = list(objs)
+        missing = {
+            issue.project_id for issue in objs
+            if issue.organization_id is None and not Issue.project.is_cached(issue)
+        }
+        org_ids = dict(Project.objects.filter(pk__in=missing).values_list("pk", "organization_id")) if missing else {}
+        for issue in objs:
+            if issue.organization_id is None:
+                issue.organization_id = (
+                    issue.project.organization_id if Issue.project.is_cached(issue) else org_ids.get(issue.project_id)
+                )
+        return super().bulk_create(objs, *args, **kwargs)
+
 class Issue(models.Model):
     STATUS_CHOICES = [("open","Open"),("in_progress","In Progress"),("done","Done"),("blocked","Blocked")]
     PRIORITY_CHOICES = [("low","Low"),("medium","Medium"),("high","High"),("critical","Critical")]
 
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="issues")
+    # copied from the project on save, so org scoping needs no join and the
+    # table can be partitioned by organization (see partitioning.py)
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name="issues", editable=False)
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default="open")
@@ -48,12 +84,169 @@ class Issue(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="created_issues")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # maintained by a database trigger on PostgreSQL (see migration 0003), GIN-indexed
+    search_vector = SearchVectorField(null=True, editable=False)
+    # set by the overdue reminder task; an issue is reminded again only after it changes
+    last_reminded_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # project-scoped filters on status, ordered by due date
+            models.Index(fields=["project", "status", "due_date"], name="issue_project_status_due_idx"),
+            models.Index(fields=["project", "priority"], name="issue_project_priority_idx"),
+            models.Index(fields=["project", "created_at"], name="issue_project_created_idx"),
+            models.Index(fields=["assigned_to", "status"], name="issue_assignee_status_idx"),
+            # overdue scans only ever look at issues that are not done
+            models.Index(
+                fields=["due_date"],
+                condition=~models.Q(status="done"),
+                name="issue_open_due_date_idx",
+            ),
+            # incremental reminder runs pick up open issues changed since the last run
+            models.Index(
+                fields=["updated_at"],
+                condition=~models.Q(status="done"),
+                name="issue_open_updated_idx",
+            ),
+            # delta sync walks issues in (updated_at, id) order
+            models.Index(fields=["updated_at", "id"], name="issue_updated_id_idx"),
+        ]
+
+    objects = IssueQuerySet.as_manager()
 
     def __str__(self):
         return f"[{self.project}] {self.title}"
 
+    def save(self, *args, **kwargs):
+        # follow the project: on create, and whenever the project was (re)assigned
+        moved = self.project_id != getattr(self, "_loaded_project_id", None)
+        if self.project_id is not None and (self.organization_id is None or moved or Issue.project.is_cached(self)):
+            self.organization_id = self.project.organization_id
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and {"project", "project_id"} & set(update_fields):
+                kwargs["update_fields"] = {*update_fields, "organization"}
+        super().save(*args, **kwargs)
+        self._loaded_project_id = self.project_id
+        self._loaded_organization_id = self.organization_id
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_project_id = instance.__dict__.get("project_id")
+        # remembered so a move to another organization leaves a tombstone behind
+        instance._loaded_organization_id = instance.__dict__.get("organization_id")
+        # remembered so a save can move the issue between IssueSummary buckets
+        if {"project_id", "status", "priority"} <= set(field_names):
+            instance._loaded_summary_key = (instance.project_id, instance.status, instance.priority)
+        return instance
+
 class IssueAttachment(models.Model):
     issue = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name="attachments")
-    file = models.FileField(upload_to="attachments/%Y/%m/%d/")
+    # new files are content-addressed blobs shared by identical uploads
+    file = models.FileField(upload_to="attachments/%Y/%m/%d/", storage=get_attachment_storage)
+    filename = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.BigIntegerField(null=True, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+
+class UploadSession(models.Model):
+    """
+    A resumable chunked upload. Chunks are appended to a partial file until
+    `offset` reaches `size`, then the file becomes an IssueAttachment.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    issue = models.ForeignKey(Issue, on_delete=models.CASCADE, related_name="upload_sessions")
+    uploaded_by = models.ForeignKey(User, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # time of the last chunk; sessions are abandoned after a day without one
+    updated_at = models.DateTimeField(auto_now=True)
+
+class IssueSummary(models.Model):
+    """
+    Issue counts of one project per (status, priority) bucket. `count` is kept
+    current incrementally on issue writes; `overdue` is refreshed periodically,
+    since issues become overdue without being written. See stats.py.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="issue_summaries")
+    status = models.CharField(max_length=50)
+    priority = models.CharField(max_length=50)
+    count = models.IntegerField(default=0)
+    overdue = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("project", "status", "priority")
+
+    def __str__(self):
+        return f"{self.project_id} {self.status}/{self.priority}: {self.count}"
+
+class IssueTombstone(models.Model):
+    """
+    Deletion log for delta sync: one row per deleted issue, so clients that
+    synced the issue learn to drop it. Purged after a retention period.
+    """
+    issue_id = models.BigIntegerField()
+    project_id = models.BigIntegerField()
+    organization_id = models.BigIntegerField(null=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["deleted_at", "id"], name="tombstone_deleted_id_idx")]
+
+    def __str__(self):
+        return f"issue {self.issue_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+# tombstones per INSERT when a project or organization takes its issues along
+TOMBSTONE_BATCH_SIZE = 1000
+
+def delete_issues(issues):
+    """
+    Delete `issues` with a few set-based queries, leaving their tombstones. A
+    cascade from a project or organization would go through the collector,
+    which loads every issue because of the Issue receivers in signals.py and
+    then writes one tombstone and one summary update per row. Summaries need
+    no update here: they are deleted with their projects.
+    """
+    using = issues.db
+    rows = issues.order_by().values_list("id", "project_id", "organization_id")
+    IssueTombstone.objects.using(using).bulk_create(
+        (
+            IssueTombstone(issue_id=issue_id, project_id=project_id, organization_id=org_id)
+            for issue_id, project_id, org_id in rows.iterator()
+        ),
+        batch_size=TOMBSTONE_BATCH_SIZE,
+    )
+    # no receiver needs these rows: the caller's own delete invalidates the organization's reads
+    IssueAttachment.objects.using(using).filter(issue__in=issues)._raw_delete(using)
+    UploadSession.objects.using(using).filter(issue__in=issues).delete()
+    return issues._raw_delete(using)
+
+class OutboxEvent(models.Model):
+    """
+    Real-time event recorded in the same transaction as the write that caused it,
+    and broadcast to the project's channel group only after that transaction commits.
+    Rows are deleted once dispatched.
+    """
+    project_id = models.BigIntegerField()
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.payload.get('type')} -> project_{self.project_id}"
+
+class TaskWatermark(models.Model):
+    """
+    Progress marker of an incremental periodic task: `value` is the start time
+    of its last completed run, so the next run only looks at what changed since.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    value = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.value}"
@@ -0,0 +1,238 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.db.models import F, Q
+from rest_framework import filters
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetKey:
+    """
+    One column of a keyset ordering. Nullable columns always sort their NULLs
+    last in the forward direction, so the seek predicate can be derived from
+    the direction alone.
+    """
+
+    def __init__(self, name, descending, field):
+        self.name = name
+        self.descending = descending
+        self.field = field
+        self.nullable = getattr(field, "null", False)
+        self.attname = getattr(field, "attname", name)
+
+    def order_by(self, reverse=False):
+        descending = self.descending != reverse
+        expression = F(self.name)
+        if not self.nullable:
+            return expression.desc() if descending else expression.asc()
+        nulls = {"nulls_first": True} if reverse else {"nulls_last": True}
+        return expression.desc(**nulls) if descending else expression.asc(**nulls)
+
+    def equals(self, value):
+        if value is None:
+            return Q(**{f"{self.name}__isnull": True})
+        return Q(**{self.name: value})
+
+    def after(self, value, reverse=False):
+        """Rows strictly after `value` in this column, or None if there can be none."""
+        nulls_at_end = self.nullable and not reverse
+        if value is None:
+            if nulls_at_end:
+                return None
+            return Q(**{f"{self.name}__isnull": False})
+        lookup = "lt" if self.descending != reverse else "gt"
+        clause = Q(**{f"{self.name}__{lookup}": value})
+        if nulls_at_end:
+            clause |= Q(**{f"{self.name}__isnull": True})
+        return clause
+
+    def value_of(self, row):
+        if isinstance(row, dict):
+            return row[self.name] if self.name in row else row[self.attname]
+        return getattr(row, self.attname)
+
+    def encode(self, value):
+        if isinstance(value, (datetime, date)):
+            # full precision: the cursor must compare equal to the stored value
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return str(value)
+        return value
+
+    def decode(self, value):
+        if value is None or self.field is None:
+            return value
+        return self.field.to_python(value)
+
+
+def build_keys(queryset, ordering):
+    """
+    Turn ordering terms such as ["-due_date"] into keyset keys, appending an
+    `id` tie-breaker so every position in the ordering is unique.
+    """
+    model = queryset.model
+    annotations = queryset.query.annotations
+    keys = []
+    for term in ordering:
+        name = term.lstrip("-")
+        if name == "pk":
+            name = model._meta.pk.name
+        if name in annotations:
+            field = annotations[name].output_field
+        else:
+            field = model._meta.get_field(name)
+        keys.append(KeysetKey(name, term.startswith("-"), field))
+    pk = model._meta.pk
+    if not any(key.name == pk.name for key in keys):
+        descending = keys[0].descending if keys else False
+        keys.append(KeysetKey(pk.name, descending, pk))
+    return keys
+
+
+def order_by_keys(keys, reverse=False):
+    return [key.order_by(reverse) for key in keys]
+
+
+def seek_filter(keys, values, reverse=False):
+    """Lexicographic `(k1, k2, ...) > (v1, v2, ...)` honouring each key's direction."""
+    clauses = []
+    equal = Q()
+    for key, value in zip(keys, values):
+        after = key.after(value, reverse)
+        if after is not None:
+            clauses.append(equal & after)
+        equal &= key.equals(value)
+    if not clauses:
+        return Q(pk__in=[])
+    return reduce(or_, clauses)
+
+
+def row_position(keys, row):
+    return [key.value_of(row) for key in keys]
+
+
+def encode_cursor(keys, values, reverse=False):
+    payload = {
+        "k": [("-" if key.descending else "") + key.name for key in keys],
+        "v": [key.encode(value) for key, value in zip(keys, values)],
+        "r": int(reverse),
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(keys, encoded):
+    """Return `(values, reverse)` for a cursor, or raise ValueError if it does not fit `keys`."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        signature = [("-" if key.descending else "") + key.name for key in keys]
+        if payload["k"] != signature or len(payload["v"]) != len(keys):
+            raise ValueError("cursor was issued for a different ordering")
+        values = [key.decode(value) for key, value in zip(keys, payload["v"])]
+        return values, bool(payload["r"])
+    except (TypeError, KeyError, ValueError) as exc:
+        raise ValueError(str(exc))
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset (seek) pagination that stays stable under the view's OrderingFilter.
+
+    Unlike DRF's CursorPagination, which positions on the first ordering field
+    and skips ties with an offset, the cursor holds the full ordering tuple plus
+    the id tie-breaker, so every page is a single index seek and page N costs
+    the same as page 1.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = "-created_at"
+
+    def get_ordering(self, request, queryset, view):
+        for backend in getattr(view, "filter_backends", []):
+            if issubclass(backend, filters.OrderingFilter):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    return list(ordering)
+                break
+        # keep an ordering applied upstream (e.g. by search rank)
+        explicit = [term for term in queryset.query.order_by if isinstance(term, str)]
+        if explicit:
+            return explicit
+        return [self.ordering] if isinstance(self.ordering, str) else list(self.ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page = self.page_queryset(queryset, request, view)
+        if page is None:
+            return None
+        return self.set_page(list(page))
+
+    def page_queryset(self, queryset, request, view=None):
+        """
+        Return the unevaluated queryset for the requested page (one row more than
+        the page size, to detect a next page). Evaluate it, sync or async, and
+        pass the rows to `set_page`.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.keys = build_keys(queryset, self.get_ordering(request, queryset, view))
+
+        self.position, self.reverse = None, False
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            try:
+                self.position, self.reverse = decode_cursor(self.keys, encoded)
+            except ValueError:
+                raise NotFound(self.invalid_cursor_message)
+            queryset = queryset.filter(seek_filter(self.keys, self.position, self.reverse))
+
+        queryset = queryset.order_by(*order_by_keys(self.keys, self.reverse))
+        if getattr(queryset, "_fields", None) is not None:
+            # values() rows must carry every key column
+            missing = [key.name for key in self.keys if key.name not in queryset._fields]
+            if missing:
+                queryset = queryset.values(*queryset._fields, *missing)
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        position, reverse = self.position, self.reverse
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if rows:
+            self.next_position = row_position(self.keys, rows[-1])
+            self.previous_position = row_position(self.keys, rows[0])
+        else:
+            # nothing left on this side: point back at the cursor we came from
+            self.next_position = self.previous_position = position
+        self.has_next = has_more if not reverse else True
+        self.has_previous = position is not None if not reverse else has_more
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or self.next_position is None:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encode_cursor(self.keys, self.next_position)
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous or self.previous_position is None:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encode_cursor(self.keys, self.previous_position, reverse=True)
+        )
@@ -0,0 +1,139 @@
+"""
+Conversion of `tracker_issue` into a PostgreSQL table partitioned by
+`organization_id`, so each tenant's issues (and their indexes) live in their own
+partition and organization-scoped queries only touch the partitions they name.
+
+Two layouts are supported:
+- "hash": `partitions` partitions, organizations spread by hash.
+- "list": one partition per given organization (the large tenants), plus a
+  default partition for everyone else.
+
+A partitioned table's primary key has to include the partition key, so the new
+table's key is `(id, organization_id)`; ids still come from one sequence. The
+foreign keys other tables hold on `tracker_issue.id` cannot point at a
+partitioned table without that column, so they have to be dropped, which is
+only done when asked for: Django performs the cascades of IssueAttachment,
+UploadSession and the like itself, but the database no longer checks them.
+"""
+from django.db import connection
+
+ISSUE_TABLE = "tracker_issue"
+STRATEGIES = ("hash", "list")
+
+
+class ReferencedByForeignKeys(ValueError):
+    """The conversion would drop these `(table, constraint)` foreign keys, and wasn't allowed to."""
+
+    def __init__(self, referencing):
+        self.referencing = referencing
+        names = ", ".join(f"{table}.{name}" for table, name in referencing)
+        super().__init__(f"foreign keys reference {ISSUE_TABLE} and would be dropped: {names}")
+
+
+def partition_bounds(strategy, partitions=8, org_ids=()):
+    """`(partition table, bound clause)` pairs of the layout, e.g. `("tracker_issue_p0", "FOR VALUES ...")`."""
+    if strategy == "hash":
+        if partitions < 1:
+            raise ValueError("at least one hash partition is needed")
+        return [
+            (f"{ISSUE_TABLE}_p{remainder}", f"FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})")
+            for remainder in range(partitions)
+        ]
+    if strategy == "list":
+        bounds = [(f"{ISSUE_TABLE}_org_{int(org_id)}", f"FOR VALUES IN ({int(org_id)})") for org_id in sorted(set(org_ids))]
+        return bounds + [(f"{ISSUE_TABLE}_default", "DEFAULT")]
+    raise ValueError(f"unknown partitioning strategy {strategy!r}")
+
+
+def is_partitioned(cursor):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = %s::regclass", [ISSUE_TABLE])
+    return cursor.fetchone()[0] == "p"
+
+
+def introspect(cursor):
+    """
+    What has to be carried over to the new table: index and trigger definitions,
+    outgoing foreign keys, and the `(table, constraint)` foreign keys pointing at it.
+    """
+    cursor.execute(
+        """
+        SELECT indexdef FROM pg_indexes i
+        WHERE tablename = %s AND NOT EXISTS (
+            SELECT 1 FROM pg_constraint c WHERE c.conname = i.indexname AND c.contype = 'p'
+        )
+        ORDER BY indexname
+        """,
+        [ISSUE_TABLE],
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f' ORDER BY conname",
+        [ISSUE_TABLE],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(
+        "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+        "WHERE confrelid = %s::regclass AND contype = 'f' ORDER BY 1, 2",
+        [ISSUE_TABLE],
+    )
+    referencing = cursor.fetchall()
+    cursor.execute(
+        "SELECT pg_get_triggerdef(oid) FROM pg_trigger WHERE tgrelid = %s::regclass AND NOT tgisinternal ORDER BY tgname",
+        [ISSUE_TABLE],
+    )
+    triggers = [row[0] for row in cursor.fetchall()]
+    return {"indexes": indexes, "foreign_keys": foreign_keys, "referencing": referencing, "triggers": triggers}
+
+
+def conversion_statements(strategy, bounds, indexes=(), foreign_keys=(), referencing=(), triggers=(), drop_foreign_keys=False):
+    """
+    SQL that rebuilds `tracker_issue` as a table partitioned by organization,
+    copies the rows over and recreates what `introspect` found on the old table.
+    Meant to run in one transaction; the table is locked for its duration.
+    Raises ReferencedByForeignKeys unless `drop_foreign_keys` allows dropping
+    the foreign keys that reference the table.
+    """
+    for indexdef in indexes:
+        if indexdef.startswith("CREATE UNIQUE"):
+            raise ValueError(f"unique indexes must include organization_id on a partitioned table: {indexdef}")
+    if referencing and not drop_foreign_keys:
+        raise ReferencedByForeignKeys(referencing)
+    new, seq = f"{ISSUE_TABLE}_partitioned", f"{ISSUE_TABLE}_partitioned_id_seq"
+    method = "HASH" if strategy == "hash" else "LIST"
+    statements = [
+        f"LOCK TABLE {ISSUE_TABLE} IN ACCESS EXCLUSIVE MODE",
+        # identity columns can't be declared on partitioned tables before PostgreSQL 17
+        f"CREATE SEQUENCE {seq} AS bigint",
+        f"SELECT setval('{seq}', coalesce((SELECT max(id) FROM {ISSUE_TABLE}), 0) + 1, false)",
+        f"CREATE TABLE {new} (LIKE {ISSUE_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) "
+        f"PARTITION BY {method} (organization_id)",
+        f"ALTER TABLE {new} ALTER COLUMN id SET DEFAULT nextval('{seq}')",
+        f"ALTER TABLE {new} ADD CONSTRAINT {new}_pkey PRIMARY KEY (id, organization_id)",
+    ]
+    statements += [f"CREATE TABLE {name} PARTITION OF {new} {bound}" for name, bound in bounds]
+    statements.append(f"INSERT INTO {new} SELECT * FROM {ISSUE_TABLE}")
+    statements += [f"ALTER TABLE {table} DROP CONSTRAINT {name}" for table, name in referencing]
+    statements += [
+        f"DROP TABLE {ISSUE_TABLE}",
+        f"ALTER TABLE {new} RENAME TO {ISSUE_TABLE}",
+        f"ALTER TABLE {ISSUE_TABLE} RENAME CONSTRAINT {new}_pkey TO {ISSUE_TABLE}_pkey",
+        f"ALTER SEQUENCE {seq} RENAME TO {ISSUE_TABLE}_id_seq",
+        f"ALTER SEQUENCE {ISSUE_TABLE}_id_seq OWNED BY {ISSUE_TABLE}.id",
+    ]
+    # created on the parent, indexes and row triggers cascade to every partition
+    statements += list(indexes)
+    statements += [f"ALTER TABLE {ISSUE_TABLE} ADD CONSTRAINT {name} {definition}" for name, definition in foreign_keys]
+    statements += list(triggers)
+    statements.append(f"ANALYZE {ISSUE_TABLE}")
+    return statements
+
+
+def plan_conversion(strategy, partitions=8, org_ids=(), drop_foreign_keys=False):
+    """Inspect the live table; return the statements converting it and the `(table, constraint)` foreign keys they drop."""
+    with connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            raise ValueError(f"{ISSUE_TABLE} is already partitioned")
+        found = introspect(cursor)
+    bounds = partition_bounds(strategy, partitions, org_ids)
+    return conversion_statements(strategy, bounds, drop_foreign_keys=drop_foreign_keys, **found), found["referencing"]
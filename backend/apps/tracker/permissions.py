@@ -1,5 +1,35 @@
 from rest_framework import permissions
-from .models import Membership, Project
+from .models import Issue, Membership, Project
+
+def get_membership_roles(request):
+    """
+    Return the requesting user's `{organization_id: role}` map.
+    Loaded with a single query and memoized on the request, so scoping and every
+    permission check in the same request share one membership lookup.
+    """
+    roles = getattr(request, "_tracker_roles", None)
+    if roles is None:
+        roles = dict(Membership.objects.filter(user=request.user).values_list("organization_id", "role"))
+        request._tracker_roles = roles
+    return roles
+
+async def aget_membership_roles(request):
+    """Async `get_membership_roles`; memoizes on the same attribute, so sync checks reuse it."""
+    roles = getattr(request, "_tracker_roles", None)
+    if roles is None:
+        roles = {
+            org_id: role
+            async for org_id, role in Membership.objects.filter(user=request.user).values_list("organization_id", "role")
+        }
+        request._tracker_roles = roles
+    return roles
+
+def get_user_org_ids(request):
+    """
+    Return the ids of the organizations the requesting user belongs to, so
+    viewsets can scope with `organization_id__in` instead of joining memberships.
+    """
+    return list(get_membership_roles(request))
 
 class IsOrgMember(permissions.BasePermission):
     """
@@ -11,14 +41,15 @@ class IsOrgMember(permissions.BasePermission):
         return True
 
     def has_object_permission(self, request, view, obj):
-        # If object is Project
-        if isinstance(obj, Project):
-            return Membership.objects.filter(user=request.user, organization=obj.organization).exists()
-        # If object has project attribute (Issue, etc.)
-        org = getattr(obj, "project").organization if hasattr(obj, "project") else None
-        if org:
-            return Membership.objects.filter(user=request.user, organization=org).exists()
-        return False
+        # Projects and issues carry their organization id, so no related object is loaded
+        if isinstance(obj, (Project, Issue)):
+            org_id = obj.organization_id
+        # If object has project attribute
+        elif hasattr(obj, "project"):
+            org_id = obj.project.organization_id
+        else:
+            return False
+        return org_id in get_membership_roles(request)
 
 class RolePermission(permissions.BasePermission):
     """
@@ -34,4 +65,8 @@ class RolePermission(permissions.BasePermission):
         org_id = request.data.get("organization") or request.query_params.get("organization")
         if not org_id:
             return True
-        return Membership.objects.filter(user=request.user, organization_id=org_id, role__in=allowed).exists()
+        try:
+            org_id = int(org_id)
+        except (TypeError, ValueError):
+            return False
+        return get_membership_roles(request).get(org_id) in allowed
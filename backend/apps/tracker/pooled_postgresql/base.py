@@ -0,0 +1,80 @@
+"""
+PostgreSQL backend (psycopg2) whose connections come from a per-process
+ConnectionPool. With CONN_MAX_AGE = 0, Django closes its connection at the end
+of every request, Celery task and channels `database_sync_to_async` call; here
+that hands the connection back to the pool instead, so the next caller, in
+whatever thread, skips the TCP and authentication round trips.
+
+Pool options go in the database's "POOL" dict (ConnectionPool arguments).
+"""
+import os
+import threading
+
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from ..pooling import ConnectionPool, PoolTimeout
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict, conn_params):
+    # keyed by the connection parameters too: tests switch NAME to the test database
+    key = (alias, os.getpid(), repr(sorted(conn_params.items())))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(**settings_dict.get("POOL", {}))
+        return pool
+
+
+def process_pools():
+    """`{alias: pool}` of the current process, for health checks and benchmarks."""
+    with _pools_lock:
+        return {alias: pool for (alias, pid, _), pool in _pools.items() if pid == os.getpid()}
+
+
+def reset(connection):
+    """Leave `connection` idle outside any transaction; False if it is unusable."""
+    if connection.closed:
+        return False
+    try:
+        if connection.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            connection.rollback()
+    except base.Database.Error:
+        return False
+    return connection.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE
+
+
+def ping(connection):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except base.Database.Error:
+        return False
+    return reset(connection)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    _pool = None
+
+    def get_new_connection(self, conn_params):
+        self._pool = get_pool(self.alias, self.settings_dict, conn_params)
+        try:
+            return self._pool.acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params), check=ping)
+        except PoolTimeout as exc:
+            raise self.Database.OperationalError(str(exc)) from exc
+
+    def _close(self):
+        pool = self._pool
+        if pool is None:
+            return super()._close()
+        if pool.pid != os.getpid():
+            # inherited by a forked worker: the parent still owns the session
+            return None
+        if self.in_atomic_block or not reset(self.connection):
+            pool.discard(self.connection)
+        else:
+            pool.release(self.connection)
+        return None
@@ -0,0 +1,132 @@
+import os
+import threading
+import time
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of open DB-API connections, shared by the threads of one
+    process (see pooled_postgresql for the Django backend using it).
+
+    At most `max_size` connections are open at once; `acquire` waits up to
+    `timeout` seconds for one to come back before giving up. Idle connections
+    are reused most-recently-released first, so surplus ones sit unused and are
+    closed after `max_idle` seconds. Every connection is replaced after
+    `max_lifetime` seconds, and one that sat idle for more than `check_after`
+    seconds is checked before it is handed out.
+    """
+
+    def __init__(self, max_size=10, timeout=10.0, max_idle=300.0, max_lifetime=1800.0, check_after=30.0):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        # pools are per process; a forked child must not touch its parent's connections
+        self.pid = os.getpid()
+        self._idle = []  # (connection, opened_at, released_at), most recent last
+        self._opened_at = {}
+        self._size = 0
+        self._cond = threading.Condition()
+        self.opened = self.reused = self.discarded = self.waits = 0
+
+    def acquire(self, connect, check=None):
+        """Return an idle connection, or a new one from `connect()` while the pool has room."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                entry = self._take_idle()
+                if entry is None and self._size >= self.max_size:
+                    self.waits += 1
+                    while entry is None and self._size >= self.max_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise PoolTimeout(f"no database connection free within {self.timeout:g}s ({self.max_size} in use)")
+                        self._cond.wait(remaining)
+                        entry = self._take_idle()
+                if entry is None:
+                    self._size += 1
+            if entry is None:
+                return self._open(connect)
+            connection, _, released_at = entry
+            if check is not None and time.monotonic() - released_at > self.check_after and not check(connection):
+                self.discard(connection)
+                continue
+            self.reused += 1
+            return connection
+
+    def release(self, connection):
+        """Give a connection back for reuse; it must be idle, outside any transaction."""
+        with self._cond:
+            opened_at = self._opened_at.get(id(connection))
+            if opened_at is None:
+                return
+            self._idle.append((connection, opened_at, time.monotonic()))
+            self._cond.notify()
+
+    def discard(self, connection):
+        """Close a connection instead of reusing it (broken, mid-transaction, too old)."""
+        with self._cond:
+            if self._opened_at.pop(id(connection), None) is None:
+                return
+            self._size -= 1
+            self.discarded += 1
+            self._cond.notify()
+        self._close(connection)
+
+    def close_idle(self):
+        """Close every idle connection, e.g. before a deploy or after a failover."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            for connection, _, _ in idle:
+                self._opened_at.pop(id(connection), None)
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for connection, _, _ in idle:
+            self._close(connection)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self._size, "idle": len(self._idle), "max_size": self.max_size,
+                "opened": self.opened, "reused": self.reused, "discarded": self.discarded, "waits": self.waits,
+            }
+
+    def _open(self, connect):
+        try:
+            connection = connect()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._opened_at[id(connection)] = time.monotonic()
+            self.opened += 1
+        return connection
+
+    def _take_idle(self):
+        # called with the lock held; expired connections are dropped on the way
+        now = time.monotonic()
+        keep = []
+        for connection, opened_at, released_at in self._idle:
+            if now - opened_at < self.max_lifetime and now - released_at < self.max_idle:
+                keep.append((connection, opened_at, released_at))
+            else:
+                self._opened_at.pop(id(connection), None)
+                self._size -= 1
+                self.discarded += 1
+                self._close(connection)
+        self._idle = keep
+        return self._idle.pop() if self._idle else None
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
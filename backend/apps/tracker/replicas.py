@@ -0,0 +1,193 @@
+"""
+Read-replica routing (DATABASE_REPLICAS).
+
+Each unit of work (request, Celery task) gets a `RoutingState` in a context
+variable. Reads go to one replica picked for the whole unit when the state
+allows it: safe-method requests, and the tasks in REPLICA_READ_TASKS. Writes
+always go to the primary and pin the rest of a request there, so it reads its
+own writes. A user who wrote stays on the primary for REPLICA_STICKY_SECONDS
+afterwards, which covers the follow-up reads of a client while replicas catch up.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+current_routing = ContextVar("tracker_db_routing", default=None)
+
+
+def replica_aliases():
+    return list(getattr(settings, "DATABASE_REPLICAS", ()))
+
+
+class RoutingState:
+    def __init__(self, pin_on_write=True):
+        replicas = replica_aliases()
+        # one replica per unit of work, so its reads see a single snapshot
+        self.replica = random.choice(replicas) if replicas else None
+        self.pin_on_write = pin_on_write
+        self.pinned = self.replica is None
+        self.wrote = False
+
+
+@contextmanager
+def replica_reads(pin_on_write=True):
+    """
+    Route the block's reads to a replica. Unless `pin_on_write` is false, the
+    first write sends every later read of the block to the primary as well.
+    """
+    state = RoutingState(pin_on_write)
+    token = current_routing.set(state)
+    try:
+        yield state
+    finally:
+        current_routing.reset(token)
+
+
+def pin_primary():
+    """Send the remaining reads of the current unit of work to the primary."""
+    state = current_routing.get()
+    if state is not None:
+        state.pinned = True
+
+
+def reading_from_replica():
+    """Whether reads of the current unit of work go to a replica."""
+    state = current_routing.get()
+    return state is not None and not state.pinned
+
+
+def sticky_key(user_id):
+    return f"db-primary:{user_id}"
+
+
+def wrote_recently(user):
+    if not replica_aliases() or not (user and user.is_authenticated):
+        return False
+    return bool(cache.get(sticky_key(user.pk)))
+
+
+async def awrote_recently(user):
+    if not replica_aliases() or not (user and user.is_authenticated):
+        return False
+    return bool(await cache.aget(sticky_key(user.pk)))
+
+
+class PrimaryReplicaRouter:
+    """Database router for DATABASE_ROUTERS; migrations only ever run on the primary."""
+
+    def db_for_read(self, model, **hints):
+        state = current_routing.get()
+        if state is None or state.pinned:
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            # related objects are read from wherever their instance came from
+            return instance._state.db
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = current_routing.get()
+        if state is not None:
+            state.wrote = True
+            if state.pin_on_write:
+                state.pinned = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the primary's data, so objects from any of them may be related
+        aliases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Let safe-method requests read from a replica; remember users whose request
+    wrote, so their next requests read from the primary for a while. Whether
+    the user wrote recently is checked once they are authenticated, by
+    ReplicaRoutingViewMixin and the async views. Only installed while
+    DATABASE_REPLICAS is set (see settings.py).
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with replica_reads() as state:
+            if request.method not in SAFE_METHODS:
+                state.pinned = True
+            response = self.get_response(request)
+        if state.wrote:
+            self.remember_write(request)
+        return response
+
+    async def __acall__(self, request):
+        with replica_reads() as state:
+            if request.method not in SAFE_METHODS:
+                state.pinned = True
+            response = await self.get_response(request)
+        if state.wrote:
+            # request.user may still be lazy and load from the database
+            await sync_to_async(self.remember_write)(request)
+        return response
+
+    @staticmethod
+    def remember_write(request):
+        if not replica_aliases():
+            return
+        # DRF copies the user it authenticated onto the Django request
+        user = getattr(request, "user", None)
+        if user is not None and user.is_authenticated:
+            cache.set(sticky_key(user.pk), 1, settings.REPLICA_STICKY_SECONDS)
+
+
+class ReplicaRoutingViewMixin:
+    """
+    DRF mixin that keeps a request on the primary once its user is known to
+    have written recently, and for the actions in `primary_read_actions`.
+    """
+
+    primary_read_actions = ()
+
+    def perform_authentication(self, request):
+        super().perform_authentication(request)
+        if getattr(self, "action", None) in self.primary_read_actions or wrote_recently(request.user):
+            pin_primary()
+
+
+_task_routing = {}
+
+
+@task_prerun.connect
+def start_task_routing(task_id=None, task=None, **kwargs):
+    if replica_aliases() and getattr(task, "name", None) in getattr(settings, "REPLICA_READ_TASKS", ()):
+        # a task's reads never depend on its own writes
+        routing = replica_reads(pin_on_write=False)
+        routing.__enter__()
+        _task_routing[task_id] = routing
+
+
+@task_postrun.connect
+def finish_task_routing(task_id=None, **kwargs):
+    routing = _task_routing.pop(task_id, None)
+    if routing is not None:
+        routing.__exit__(None, None, None)
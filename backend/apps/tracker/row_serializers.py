@@ -0,0 +1,178 @@
+"""
+Read-only list rendering from `.values()` rows.
+
+IssueSerializer binds field objects and nested serializers for every issue,
+which dominates list CPU time once the SQL is cheap. `IssueRowSerializer`
+selects only the columns a response needs and maps them to the same JSON
+as IssueSerializer through a field plan compiled once per fieldset.
+`?fields=` picks the keys and `?expand=` the relations that are rendered
+as nested objects rather than ids.
+"""
+from functools import lru_cache
+
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from .models import Issue, IssueAttachment
+from .serializers import IssueAttachmentSerializer, IssueSerializer, UserSerializer
+
+
+def date_value(value, tz):
+    return value.isoformat() if value is not None else None
+
+
+def datetime_value(value, tz):
+    # DRF's ISO 8601 output: in the current time zone, UTC written as "Z"
+    if value is None:
+        return None
+    if timezone.is_aware(value):
+        value = value.astimezone(tz)
+    value = value.isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+def column_plan(model, names, prefix=""):
+    """`(key, column, converter)` for plain fields of `model`; FKs render their id."""
+    plan = []
+    for name in names:
+        field = model._meta.get_field(name)
+        converter = None
+        if field.get_internal_type() == "DateTimeField":
+            converter = datetime_value
+        elif field.get_internal_type() == "DateField":
+            converter = date_value
+        plan.append((name, prefix + (field.attname if field.is_relation else name), converter))
+    return tuple(plan)
+
+
+def build_object(row, plan, tz):
+    return {key: row[column] if converter is None else converter(row[column], tz) for key, column, converter in plan}
+
+
+ATTACHMENT_PLAN = column_plan(
+    IssueAttachment, [name for name in IssueAttachmentSerializer.Meta.fields if name not in ("file", "uploaded_by")]
+)
+UPLOADER_PLAN = column_plan(UserSerializer.Meta.model, UserSerializer.Meta.fields, prefix="uploaded_by__")
+ASSIGNEE_PLAN = column_plan(UserSerializer.Meta.model, UserSerializer.Meta.fields, prefix="assigned_to__")
+
+
+def value_getter(column, converter):
+    if converter is None:
+        return lambda row, tz: row[column]
+    return lambda row, tz: converter(row[column], tz)
+
+
+def nested_user(row, tz):
+    # the LEFT JOIN columns of the assignee
+    return build_object(row, ASSIGNEE_PLAN, tz) if row["assigned_to__id"] is not None else None
+
+
+class IssueRowSerializer:
+    """
+    `IssueSerializer` output for lists, built from `.values()` rows.
+
+    `select(queryset)` narrows a queryset to the needed columns; the evaluated
+    (and paginated) rows then go to `render`, which loads the attachments of
+    the page in one more query unless they were passed in.
+    """
+
+    relations = ("assigned_to", "attachments")
+    fields = tuple(
+        name for name in IssueSerializer.Meta.fields
+        if not getattr(IssueSerializer._declared_fields.get(name), "write_only", False)
+    )
+
+    def __init__(self, fields=None, expand=None, context=None):
+        self.context = context or {}
+        self.plan, self.columns, self.attachments = self.compile(
+            tuple(fields) if fields is not None else self.fields,
+            frozenset(expand) if expand is not None else frozenset(self.relations),
+        )
+
+    @classmethod
+    def from_request(cls, request):
+        """Read the `?fields=` and `?expand=` comma-separated lists; unknown names are a 400."""
+        errors, selected = {}, {}
+        for param, allowed in (("fields", cls.fields), ("expand", cls.relations)):
+            value = request.query_params.get(param)
+            if value is None or (param == "fields" and not value.strip()):
+                selected[param] = None
+                continue
+            names = [name.strip() for name in value.split(",") if name.strip()]
+            unknown = [name for name in names if name not in allowed]
+            if unknown:
+                errors[param] = [f"Unknown {param}: {', '.join(unknown)}. Choose from: {', '.join(allowed)}."]
+            selected[param] = [name for name in allowed if name in names]
+        if errors:
+            raise ValidationError(errors)
+        return cls(selected["fields"], selected["expand"], context={"request": request})
+
+    @classmethod
+    @lru_cache(maxsize=128)
+    def compile(cls, fields, expand):
+        """
+        Return `(plan, columns, attachments)` for a fieldset. The plan holds a
+        `(key, getter)` per output key, the getter None for attachments, which
+        are loaded per page; `attachments` is None, "ids" or "objects".
+        """
+        plan, columns = [], {"id"}
+        for name in fields:
+            if name == "attachments":
+                plan.append((name, None))
+            elif name == "assigned_to" and name in expand:
+                plan.append((name, nested_user))
+                columns.update(column for _, column, _ in ASSIGNEE_PLAN)
+            else:
+                (_, column, converter), = column_plan(Issue, [name])
+                plan.append((name, value_getter(column, converter)))
+                columns.add(column)
+        attachments = None
+        if "attachments" in fields:
+            attachments = "objects" if "attachments" in expand else "ids"
+        return tuple(plan), tuple(sorted(columns)), attachments
+
+    def select(self, queryset):
+        # annotations such as the search rank stay selected: values() would
+        # hide them from the keyset pagination that orders and seeks on them
+        return queryset.prefetch_related(None).values(*self.columns, *queryset.query.annotations)
+
+    def attachment_queryset(self, issue_ids):
+        """The attachments of `issue_ids`, as rows, in upload order."""
+        queryset = IssueAttachment.objects.filter(issue_id__in=issue_ids).order_by("pk")
+        if self.attachments == "ids":
+            return queryset.values("issue_id", "id")
+        columns = [column for _, column, _ in ATTACHMENT_PLAN + UPLOADER_PLAN]
+        return queryset.values("issue_id", "file", *columns)
+
+    def render_attachment(self, row, tz):
+        data = build_object(row, ATTACHMENT_PLAN, tz)
+        name = row["file"]
+        if name:
+            url = IssueAttachment._meta.get_field("file").storage.url(name)
+            request = self.context.get("request")
+            data["file"] = request.build_absolute_uri(url) if request is not None else url
+        else:
+            data["file"] = None
+        data["uploaded_by"] = build_object(row, UPLOADER_PLAN, tz) if row["uploaded_by__id"] is not None else None
+        # IssueAttachmentSerializer's key order
+        return {key: data[key] for key in IssueAttachmentSerializer.Meta.fields}
+
+    def render(self, rows, attachment_rows=None):
+        # looked up once: it is a context-local read per call
+        tz = timezone.get_current_timezone()
+        by_issue = None
+        if self.attachments is not None:
+            by_issue = {row["id"]: [] for row in rows}
+            if attachment_rows is None:
+                attachment_rows = self.attachment_queryset(list(by_issue)) if by_issue else []
+            for attachment in attachment_rows:
+                rendered = attachment["id"] if self.attachments == "ids" else self.render_attachment(attachment, tz)
+                by_issue[attachment["issue_id"]].append(rendered)
+
+        data = []
+        for row in rows:
+            item = {}
+            for key, getter in self.plan:
+                item[key] = by_issue[row["id"]] if getter is None else getter(row, tz)
+            data.append(item)
+        return data
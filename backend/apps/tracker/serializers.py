@@ -1,6 +1,27 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Organization, Membership, Project, Issue, IssueAttachment
+from django.db.models import Prefetch
+from .models import Organization, Membership, Project, Issue, IssueAttachment, UploadSession
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField that resolves ids from `context["prefetched"][Model]`
+    when the view supplies it, so validating a bulk payload costs one query per
+    related model instead of one per row. Ids missing from the map are invalid.
+    """
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get("prefetched", {}).get(self.get_queryset().model)
+        if prefetched is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return prefetched[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -30,19 +51,42 @@ class IssueAttachmentSerializer(serializers.ModelSerializer):
     uploaded_by = UserSerializer(read_only=True)
     class Meta:
         model = IssueAttachment
-        fields = ("id","file","uploaded_by","uploaded_at")
+        fields = ("id","file","filename","content_type","size","sha256","uploaded_by","uploaded_at")
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    size = serializers.IntegerField(min_value=1)
+
+    class Meta:
+        model = UploadSession
+        fields = ("id","filename","content_type","size","offset","created_at")
+        read_only_fields = ("id","offset","created_at")
 
 class IssueSerializer(serializers.ModelSerializer):
     attachments = IssueAttachmentSerializer(many=True, read_only=True)
     assigned_to = UserSerializer(read_only=True)
-    assigned_to_id = serializers.PrimaryKeyRelatedField(source='assigned_to', queryset=User.objects.all(), write_only=True, required=False, allow_null=True)
-    project = serializers.PrimaryKeyRelatedField(queryset=Project.objects.all())
+    assigned_to_id = PrefetchedPrimaryKeyRelatedField(source='assigned_to', queryset=User.objects.all(), write_only=True, required=False, allow_null=True)
+    project = PrefetchedPrimaryKeyRelatedField(queryset=Project.objects.all())
 
     class Meta:
         model = Issue
         fields = ("id","project","title","description","status","priority","due_date","assigned_to","assigned_to_id","attachments","created_by","created_at","updated_at")
         read_only_fields = ("created_by","created_at","updated_at")
 
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        """
+        Join/prefetch the relations rendered by `fields` (all serializer fields by default)
+        so a list renders in a fixed number of queries regardless of its length.
+        """
+        fields = set(cls.Meta.fields if fields is None else fields)
+        if "assigned_to" in fields:
+            queryset = queryset.select_related("assigned_to")
+        if "attachments" in fields:
+            queryset = queryset.prefetch_related(
+                Prefetch("attachments", queryset=IssueAttachment.objects.select_related("uploaded_by"))
+            )
+        return queryset
+
     def create(self, validated_data):
         request = self.context.get("request")
         if request and request.user and validated_data.get("project"):
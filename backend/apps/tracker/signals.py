@@ -0,0 +1,87 @@
+from django.contrib.auth.models import User
+from django.db.models.functions import Now
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_orgs, project_membership_cache, token_user_cache
+from .changes import record_moves
+from .models import Issue, IssueAttachment, IssueTombstone, Membership, Project
+from . import stats
+
+
+@receiver([post_save, post_delete], sender=Membership)
+def invalidate_membership_cache(sender, instance, **kwargs):
+    project_membership_cache.invalidate(lambda key, _: key[0] == instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Project)
+def invalidate_project_membership_cache(sender, instance, **kwargs):
+    project_membership_cache.invalidate(lambda key, _: key[1] == instance.pk)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_token_user_cache(sender, instance, **kwargs):
+    # e.g. a deactivated user must not keep authenticating sockets
+    token_user_cache.invalidate(lambda _, user: user.pk == instance.pk)
+
+
+@receiver(pre_save, sender=Project)
+def remember_project_organization(sender, instance, **kwargs):
+    if not instance._state.adding:
+        instance._previous_organization_id = (
+            Project.objects.filter(pk=instance.pk).values_list("organization_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Project)
+def move_project_issues(sender, instance, created, **kwargs):
+    # issues keep a copy of their project's organization
+    previous = getattr(instance, "_previous_organization_id", None)
+    if created or previous in (None, instance.organization_id):
+        return
+    moved = Issue.objects.filter(project=instance).exclude(organization_id=instance.organization_id)
+    record_moves(moved.values_list("id", "project_id", "organization_id"))
+    # updated_at moves too, so delta sync sends the issues to the new organization
+    moved.update(organization_id=instance.organization_id, updated_at=Now())
+    invalidate_orgs([previous])
+
+
+@receiver([post_save, post_delete], sender=Issue)
+def invalidate_issue_reads(sender, instance, **kwargs):
+    # an issue moved to another organization leaves the old one's cached lists too
+    invalidate_orgs([instance.organization_id, getattr(instance, "_loaded_organization_id", None)])
+
+
+@receiver([post_save, post_delete], sender=IssueAttachment)
+def invalidate_attachment_reads(sender, instance, **kwargs):
+    invalidate_orgs(Issue.objects.filter(pk=instance.issue_id).values_list("organization_id", flat=True))
+
+
+@receiver([post_save, post_delete], sender=Project)
+@receiver([post_save, post_delete], sender=Membership)
+def invalidate_org_reads(sender, instance, **kwargs):
+    invalidate_orgs([instance.organization_id])
+
+
+@receiver(post_save, sender=Issue)
+def update_summary_on_save(sender, instance, created, **kwargs):
+    stats.issue_saved(instance, created)
+
+
+@receiver(post_delete, sender=Issue)
+def update_summary_on_delete(sender, instance, **kwargs):
+    stats.issue_deleted(instance)
+
+
+@receiver(post_save, sender=Issue)
+def record_issue_move(sender, instance, created, **kwargs):
+    old_org_id = getattr(instance, "_loaded_organization_id", None)
+    if not created and old_org_id is not None and old_org_id != instance.organization_id:
+        record_moves([(instance.pk, instance._loaded_project_id, old_org_id)])
+
+
+@receiver(post_delete, sender=Issue)
+def record_issue_tombstone(sender, instance, **kwargs):
+    IssueTombstone.objects.create(
+        issue_id=instance.pk, project_id=instance.project_id, organization_id=instance.organization_id
+    )
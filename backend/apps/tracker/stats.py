@@ -0,0 +1,140 @@
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Value, When
+from django.utils import timezone
+
+from .models import Issue, IssueSummary
+
+# insert batch size when rebuilding summaries from scratch
+REBUILD_BATCH_SIZE = 1000
+
+
+def summary_key(issue):
+    return (issue.project_id, issue.status, issue.priority)
+
+
+def bucket_filter(key):
+    project_id, status, priority = key
+    return Q(project_id=project_id, status=status, priority=priority)
+
+
+def apply_summary_deltas(deltas):
+    """
+    Add `{(project_id, status, priority): delta}` to the summary counters with
+    one insert for missing buckets and one UPDATE, whatever the batch size.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    IssueSummary.objects.bulk_create(
+        [IssueSummary(project_id=key[0], status=key[1], priority=key[2]) for key, delta in deltas.items() if delta > 0],
+        ignore_conflicts=True,
+    )
+    IssueSummary.objects.filter(reduce(or_, map(bucket_filter, deltas))).update(
+        count=F("count") + Case(
+            *[When(bucket_filter(key), then=Value(delta)) for key, delta in deltas.items()],
+            default=Value(0),
+        )
+    )
+
+
+def issue_saved(issue, created):
+    new = summary_key(issue)
+    old = getattr(issue, "_loaded_summary_key", None)
+    if created:
+        apply_summary_deltas({new: 1})
+    elif old is not None and old != new:
+        apply_summary_deltas({old: -1, new: 1})
+    # an issue saved without having been loaded can't be moved; reconciliation catches it
+    issue._loaded_summary_key = new
+
+
+def issue_deleted(issue):
+    apply_summary_deltas({getattr(issue, "_loaded_summary_key", summary_key(issue)): -1})
+
+
+def moved_deltas(changes):
+    """Deltas for `(old_key, new_key)` pairs, as produced by bulk writes."""
+    deltas = Counter()
+    for old, new in changes:
+        if old != new:
+            deltas[old] -= 1
+            deltas[new] += 1
+    return deltas
+
+
+def overdue_counts(today):
+    return (
+        Issue.objects.filter(due_date__lt=today).exclude(status="done")
+        .values_list("project_id", "status", "priority").annotate(n=Count("id")).order_by()
+    )
+
+
+def refresh_overdue(today=None):
+    """Recompute the `overdue` column; issues cross their due date without any write."""
+    today = today or timezone.localdate()
+    with transaction.atomic():
+        IssueSummary.objects.exclude(overdue=0).update(overdue=0)
+        for project_id, status, priority, n in overdue_counts(today).iterator():
+            IssueSummary.objects.filter(project_id=project_id, status=status, priority=priority).update(overdue=n)
+
+
+def rebuild_summaries(today=None):
+    """Reconcile: rebuild every summary row from the issues table."""
+    today = today or timezone.localdate()
+    rows = (
+        Issue.objects.values_list("project_id", "status", "priority")
+        .annotate(
+            n=Count("id"),
+            overdue=Count("id", filter=Q(due_date__lt=today) & ~Q(status="done")),
+        )
+        .order_by()
+    )
+    with transaction.atomic():
+        IssueSummary.objects.all().delete()
+        batch = []
+        for project_id, status, priority, n, overdue in rows.iterator():
+            batch.append(IssueSummary(project_id=project_id, status=status, priority=priority, count=n, overdue=overdue))
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                IssueSummary.objects.bulk_create(batch)
+                batch = []
+        IssueSummary.objects.bulk_create(batch)
+
+
+def summarize(rows):
+    """Fold `(status, priority, count, overdue)` rows into the stats payload."""
+    by_status = {choice: 0 for choice, _ in Issue.STATUS_CHOICES}
+    by_priority = {choice: 0 for choice, _ in Issue.PRIORITY_CHOICES}
+    total = overdue = 0
+    for status, priority, count, late in rows:
+        by_status[status] = by_status.get(status, 0) + count
+        by_priority[priority] = by_priority.get(priority, 0) + count
+        total += count
+        overdue += late
+    return {"total": total, "by_status": by_status, "by_priority": by_priority, "overdue": overdue}
+
+
+def project_stats(project_id):
+    rows = IssueSummary.objects.filter(project_id=project_id).values_list("status", "priority", "count", "overdue")
+    return {"project": project_id, **summarize(rows)}
+
+
+def organization_stats(org_id):
+    rows = list(
+        IssueSummary.objects.filter(project__organization_id=org_id)
+        .values_list("project_id", "status", "priority", "count", "overdue")
+    )
+    projects = {}
+    for project_id, *row in rows:
+        projects.setdefault(project_id, []).append(row)
+    return {
+        "organization": org_id,
+        **summarize(row[1:] for row in rows),
+        "projects": [
+            {"project": project_id, "total": sum(r[2] for r in bucket), "overdue": sum(r[3] for r in bucket)}
+            for project_id, bucket in sorted(projects.items())
+        ],
+    }
@@ -1,19 +1,170 @@
-from celery import shared_task
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from celery import chord, shared_task
 from django.utils import timezone
-from .models import Issue
-from django.core.mail import send_mail
+from django.db.models import Count, F, Q
+import os
+from .models import Issue, IssueTombstone, TaskWatermark, UploadSession
+from .changes import TOMBSTONE_RETENTION
+from .attachments import attachment_storage
+from .events import dispatch_pending
+from . import stats
+from django.core.mail import EmailMessage, get_connection
 from django.conf import settings
 
-@shared_task
+# rows fetched per round trip while streaming overdue issues
+REMINDER_CHUNK_SIZE = 2000
+# digests handed to the mail connection at once
+REMINDER_SEND_BATCH = 100
+# issues listed in one digest; the rest are summarized
+REMINDER_MAX_LINES = 50
+# organizations with at least this many overdue issues get their own subtask
+REMINDER_FANOUT_THRESHOLD = 5000
+REMINDER_WATERMARK = "overdue-reminders"
+# changes committed shortly before the watermark may carry an earlier updated_at
+REMINDER_OVERLAP = timedelta(minutes=5)
+# resumable uploads untouched for this long are abandoned
+UPLOAD_SESSION_TTL = timedelta(days=1)
+
+def overdue_issues(today):
+    """Overdue, unfinished issues whose assignee has an email address."""
+    return (
+        Issue.objects.filter(due_date__lt=today, assigned_to__isnull=False)
+        .exclude(status="done")
+        .exclude(assigned_to__email="")
+    )
+
+def reminder_candidates(today, since=None):
+    """
+    Overdue issues that still need a reminder: never reminded, or changed since
+    their last one. Given the previous run's watermark `since`, only issues that
+    became overdue or changed after it are considered, so a run is O(delta).
+    """
+    qs = overdue_issues(today).filter(Q(last_reminded_at__isnull=True) | Q(last_reminded_at__lt=F("updated_at")))
+    if since is not None:
+        qs = qs.filter(Q(due_date__gte=timezone.localdate(since)) | Q(updated_at__gt=since - REMINDER_OVERLAP))
+    return qs
+
+def build_digest(email, rows):
+    """Build one reminder for all of an assignee's overdue `(title, due_date, project)` rows."""
+    lines, total = [], 0
+    for title, due_date, project_name in rows:
+        total += 1
+        if total <= REMINDER_MAX_LINES:
+            lines.append(f"- '{title}' (project: {project_name}) is overdue (due {due_date}).")
+    if total == 1:
+        subject = f"[Reminder] Overdue issue: {title}"
+    else:
+        subject = f"[Reminder] {total} overdue issues"
+    if total > REMINDER_MAX_LINES:
+        lines.append(f"... and {total - REMINDER_MAX_LINES} more.")
+    return EmailMessage(subject=subject, body="\n".join(lines), from_email=settings.DEFAULT_FROM_EMAIL, to=[email])
+
+def send_digests(queryset):
+    """
+    Stream `queryset` ordered by assignee and send one digest per assignee over a
+    single mail connection. Rows are read in chunks as plain tuples and only one
+    assignee's digest is held at a time, so memory stays flat however many
+    issues are overdue. Issues are marked reminded batch by batch, right after
+    their digests went out, so a retried run does not email them twice.
+    Returns the number of digests sent.
+    """
+    rows = (
+        queryset.order_by("assigned_to_id", "due_date", "id")
+        .values_list("assigned_to_id", "assigned_to__email", "id", "organization_id", "title", "due_date", "project__name")
+        .iterator(chunk_size=REMINDER_CHUNK_SIZE)
+    )
+    sent, batch, issue_ids, org_ids = 0, [], [], set()
+
+    def flush():
+        connection.send_messages(batch)
+        Issue.objects.filter(organization_id__in=org_ids, id__in=issue_ids).update(last_reminded_at=timezone.now())
+        return len(batch)
+
+    with get_connection() as connection:
+        for (_, email), group in groupby(rows, key=lambda row: row[:2]):
+            batch.append(build_digest(email, _collect_ids(group, issue_ids, org_ids)))
+            if len(batch) >= REMINDER_SEND_BATCH:
+                sent += flush()
+                batch, issue_ids, org_ids = [], [], set()
+        if batch:
+            sent += flush()
+    return sent
+
+def _collect_ids(group, issue_ids, org_ids):
+    for row in group:
+        issue_ids.append(row[2])
+        org_ids.add(row[3])
+        yield row[4:]
+
+@shared_task(autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
 def send_overdue_reminders():
-    today = timezone.localdate()
-    overdue = Issue.objects.filter(due_date__lt=today).exclude(status="done")
-    for issue in overdue:
-        if issue.assigned_to and issue.assigned_to.email:
-            send_mail(
-                subject=f"[Reminder] Overdue issue: {issue.title}",
-                message=f"The issue '{issue.title}' (project: {issue.project.name}) is overdue (due {issue.due_date}).",
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[issue.assigned_to.email],
-                fail_silently=True,
-            )
+    started = timezone.now()
+    today = timezone.localdate(started)
+    watermark, _ = TaskWatermark.objects.get_or_create(name=REMINDER_WATERMARK)
+    since = watermark.value
+    candidates = reminder_candidates(today, since)
+
+    small_orgs, subtasks = [], []
+    # grouped and filtered on the issue's own organization, so partitions are pruned
+    per_org = candidates.values_list("organization_id").annotate(n=Count("id")).order_by()
+    for org_id, count in per_org.iterator():
+        if count >= REMINDER_FANOUT_THRESHOLD:
+            subtasks.append(send_org_overdue_reminders.si(org_id, today.isoformat(), since.isoformat() if since else None))
+        else:
+            small_orgs.append(org_id)
+    sent = send_digests(candidates.filter(organization_id__in=small_orgs)) if small_orgs else 0
+
+    # only a completed run moves the watermark; a failed one is retried over the same window.
+    # With subtasks, that is once all of them succeeded: if one fails for good, the
+    # callback never runs and the next run rescans the window for that organization.
+    if subtasks:
+        chord(subtasks)(advance_reminder_watermark.si(started.isoformat()))
+    else:
+        advance_reminder_watermark(started.isoformat())
+    return sent
+
+@shared_task(ignore_result=True)
+def advance_reminder_watermark(started):
+    """Move the reminder watermark to `started`, never backwards past a later run."""
+    started = datetime.fromisoformat(started)
+    TaskWatermark.objects.filter(Q(value__isnull=True) | Q(value__lt=started), name=REMINDER_WATERMARK).update(
+        value=started, updated_at=timezone.now()
+    )
+
+@shared_task(autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def send_org_overdue_reminders(org_id, today, since=None):
+    """Send the digests of one large organization for the window of the parent run."""
+    since = datetime.fromisoformat(since) if since else None
+    candidates = reminder_candidates(date.fromisoformat(today), since)
+    return send_digests(candidates.filter(organization_id=org_id))
+
+@shared_task(ignore_result=True)
+def dispatch_outbox():
+    """Broadcast committed outbox events; also scheduled periodically as a sweep."""
+    return dispatch_pending()
+
+@shared_task(ignore_result=True)
+def refresh_issue_summary_overdue():
+    """Recompute overdue counts in the project summaries."""
+    stats.refresh_overdue()
+
+@shared_task(ignore_result=True)
+def rebuild_issue_summaries():
+    """Reconcile the project summaries with the issues table."""
+    stats.rebuild_summaries()
+
+@shared_task(ignore_result=True)
+def expire_upload_sessions():
+    """Delete upload sessions that received no chunk for a day, and their partial files."""
+    stale = UploadSession.objects.filter(updated_at__lt=timezone.now() - UPLOAD_SESSION_TTL)
+    for session_id in stale.values_list("id", flat=True).iterator():
+        path = attachment_storage.partial_path(session_id)
+        if os.path.exists(path):
+            os.remove(path)
+    return stale.delete()[0]
+
+@shared_task(ignore_result=True)
+def purge_issue_tombstones():
+    """Drop deletion-log rows older than the delta sync retention."""
+    return IssueTombstone.objects.filter(deleted_at__lt=timezone.now() - TOMBSTONE_RETENTION).delete()[0]
@@ -1,9 +1,52 @@
-from django.test import TestCase
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+from datetime import date, timedelta
+from django.core import mail
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, connections, transaction
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.test import AsyncClient, AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.request import Request
 from rest_framework import status
-from .models import Organization, Membership, Project, Issue
+from rest_framework_simplejwt.tokens import AccessToken
+from .models import Organization, Membership, Project, Issue, IssueAttachment, IssueSummary, IssueTombstone, OutboxEvent, TaskWatermark, UploadSession
+from .tasks import advance_reminder_watermark, dispatch_outbox, expire_upload_sessions, rebuild_issue_summaries, reminder_candidates, send_org_overdue_reminders, send_overdue_reminders
+from .views import IssueViewSet, ProjectViewSet
+from .events import issue_event, record_events
+from .cache import RECENT_WRITE_KEY, TTLCache, get_org_versions, project_membership_cache, token_user_cache
+from .stats import project_stats, rebuild_summaries, refresh_overdue
+from .consumers import ProjectConsumer, _is_project_member, _member_project_ids
+from .middlewares import JWTAuthMiddlewareStack, jwt_authentication
+from .routing import websocket_urlpatterns
+from .instrumentation import MetricsRegistry, registry, shared_redis
+from .benchmarks.suite import compare
+from .serializers import IssueSerializer
+from .partitioning import ReferencedByForeignKeys, conversion_statements, partition_bounds
+from .pooling import ConnectionPool, PoolTimeout
+from .replicas import PrimaryReplicaRouter, ReplicaRoutingMiddleware, finish_task_routing, replica_reads, start_task_routing, sticky_key
+from rest_framework.renderers import JSONRenderer
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.urls import reverse
+from django.utils import timezone
 
 class TeamIssueTrackerTests(TestCase):
     """
@@ -97,14 +140,14 @@ class TeamIssueTrackerTests(TestCase):
         self._login_user(self.user_member)
         response = self.client.get(reverse("project-list"))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["id"], self.project.id)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["id"], self.project.id)
         
         # Test unrelated user sees no projects
         self._login_user(self.user_unrelated)
         response = self.client.get(reverse("project-list"))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 0)
+        self.assertEqual(len(response.data["results"]), 0)
 
     ##
     # Issue Tests
@@ -129,21 +172,21 @@ class TeamIssueTrackerTests(TestCase):
         # Test filtering by status
         response = self.client.get(reverse("issue-list"), {"status": "in_progress"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["title"], "Another Bug")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["title"], "Another Bug")
         
         # Test searching by title
         response = self.client.get(reverse("issue-list"), {"search": "Test Issue"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["title"], "Test Issue")
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["title"], "Test Issue")
 
     def test_unrelated_user_cannot_access_issues(self):
         """Test that a user from a different organization cannot access issues."""
         self._login_user(self.user_unrelated)
         response = self.client.get(reverse("issue-list"))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 0) # Should be an empty list due to `IsOrgMember` permission
+        self.assertEqual(len(response.data["results"]), 0) # Should be an empty list due to `IsOrgMember` permission
         
         response = self.client.get(reverse("issue-detail", kwargs={"pk": self.issue.id}))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND) # Object not found due to filtering in queryset
@@ -182,4 +225,1742 @@ class TeamIssueTrackerTests(TestCase):
         self.assertEqual(response.data["uploaded_by"]["username"], self.user_member.username)
         
         self.issue.refresh_from_db()
-        self.assertEqual(self.issue.attachments.count(), 1)
\ No newline at end of file
+        self.assertEqual(self.issue.attachments.count(), 1)
+
+class MembershipScopingTests(TestCase):
+    """
+    Regression tests for the membership scoping of project and issue list queries.
+    """
+
+    ISSUES_PER_ORG = 2000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="scoped_user", password="password123")
+        cls.orgs = [Organization.objects.create(name=f"Org {i}") for i in range(5)]
+        # the user belongs to two of the five organizations
+        for org in cls.orgs[:2]:
+            Membership.objects.create(user=cls.user, organization=org)
+        for org in cls.orgs:
+            project = Project.objects.create(organization=org, name=f"{org.name} project")
+            Issue.objects.bulk_create(
+                Issue(project=project, title=f"Issue {n}") for n in range(cls.ISSUES_PER_ORG)
+            )
+
+    def _view(self, viewset_class):
+        view = viewset_class(action="list", format_kwarg=None)
+        view.request = Request(APIRequestFactory().get("/"))
+        view.request.user = self.user
+        return view
+
+    def test_issue_queryset_has_no_membership_join_or_distinct(self):
+        """Test that the issue queryset filters on pre-resolved org ids."""
+        view = self._view(IssueViewSet)
+        sql = str(view.get_queryset().query)
+        self.assertNotIn("DISTINCT", sql)
+        self.assertNotIn("tracker_membership", sql)
+
+    def test_issue_queryset_does_not_join_projects(self):
+        """Test that issues are scoped on their own organization column."""
+        view = self._view(IssueViewSet)
+        self.assertNotIn("tracker_project", str(view.get_queryset().query))
+
+    def test_project_queryset_has_no_join(self):
+        """Test that the project queryset needs neither a join nor DISTINCT."""
+        view = self._view(ProjectViewSet)
+        sql = str(view.get_queryset().query)
+        self.assertNotIn("DISTINCT", sql)
+        self.assertNotIn("JOIN", sql)
+
+    def test_membership_resolved_once_per_request(self):
+        """Test that org ids are fetched once, however often the queryset is built."""
+        view = self._view(IssueViewSet)
+        with self.assertNumQueries(2):
+            view.get_queryset()
+            ids = list(view.get_queryset().values_list("id", flat=True))
+        self.assertEqual(len(ids), 2 * self.ISSUES_PER_ORG)
+
+    def test_issue_scoping_query_shape(self):
+        """Test that scoping issues runs one flat filter on the issue table."""
+        view = self._view(IssueViewSet)
+        with CaptureQueriesContext(connection) as ctx:
+            ids = list(view.get_queryset().values_list("id", flat=True))
+        self.assertEqual(len(ids), 2 * self.ISSUES_PER_ORG)
+        membership_sql, issue_sql = (query["sql"] for query in ctx.captured_queries)
+        self.assertIn("tracker_membership", membership_sql)
+        self.assertIn('"tracker_issue"."organization_id" IN', issue_sql)
+        for fragment in ("JOIN", "DISTINCT", "tracker_project", "tracker_membership"):
+            self.assertNotIn(fragment, issue_sql)
+
+
+class IssueQueryBudgetTests(TestCase):
+    """
+    Guard the issue list against N+1 queries on nested assignees and attachments.
+    """
+
+    # membership lookup + issues joined with assignees + attachments joined with uploaders
+    LIST_QUERY_BUDGET = 3
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="budget_user", password="password123")
+        self.org = Organization.objects.create(name="Budget Org")
+        Membership.objects.create(user=self.user, organization=self.org)
+        self.project = Project.objects.create(organization=self.org, name="Budget Project")
+        self.client.force_authenticate(user=self.user)
+
+    def _create_issues(self, count):
+        for n in range(count):
+            assignee = User.objects.create(username=f"assignee_{self.project.issues.count()}")
+            issue = Issue.objects.create(project=self.project, title=f"Issue {n}", assigned_to=assignee)
+            IssueAttachment.objects.create(
+                issue=issue,
+                file=SimpleUploadedFile(f"file_{issue.id}.txt", b"content"),
+                uploaded_by=assignee,
+            )
+
+    def assertQueryBudget(self, url, budget, sizes=(1, 5, 20)):
+        """Assert that listing `url` costs exactly `budget` queries for every list size."""
+        created = 0
+        for size in sizes:
+            self._create_issues(size - created)
+            created = size
+            # measure the uncached path
+            cache.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.data["results"]), size)
+            self.assertEqual(
+                len(ctx.captured_queries), budget,
+                f"{len(ctx.captured_queries)} queries for {size} rows, expected {budget}",
+            )
+
+    def test_issue_list_query_count_is_constant(self):
+        """Test that the issue list query count does not grow with the number of rows."""
+        self.assertQueryBudget(reverse("issue-list"), self.LIST_QUERY_BUDGET)
+
+
+class KeysetPaginationTests(TestCase):
+    """
+    Tests for keyset pagination of the issue and project lists.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="pager_user", password="password123")
+        org = Organization.objects.create(name="Pager Org")
+        Membership.objects.create(user=self.user, organization=org)
+        self.project = Project.objects.create(organization=org, name="Pager Project")
+        today = date.today()
+        # plenty of ties and NULLs in both ordering columns
+        self.issues = [
+            Issue.objects.create(
+                project=self.project,
+                title=f"Issue {n}",
+                due_date=None if n % 4 == 0 else today + timedelta(days=n % 3),
+                priority=Issue.PRIORITY_CHOICES[n % 2][0],
+            )
+            for n in range(23)
+        ]
+        self.client.force_authenticate(user=self.user)
+
+    def _walk(self, params, link="next"):
+        ids, url, pages = [], reverse("issue-list"), 0
+        response = self.client.get(url, params)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(row["id"] for row in response.data["results"])
+            pages += 1
+            if not response.data[link]:
+                return ids, pages, response
+            response = self.client.get(response.data[link])
+
+    def test_walks_every_issue_once_in_due_date_order(self):
+        """Test that paging by due_date visits each issue once with NULLs last and id tie-breaks."""
+        ids, pages, _ = self._walk({"ordering": "due_date", "page_size": 4})
+        expected = sorted(self.issues, key=lambda i: (i.due_date is None, i.due_date or date.min, i.id))
+        self.assertEqual(ids, [i.id for i in expected])
+        self.assertEqual(pages, 6)
+
+    def test_descending_ordering_and_previous_links(self):
+        """Test that previous links walk back over the same pages in the same order."""
+        forward, _, last = self._walk({"ordering": "-priority", "page_size": 5})
+        expected = sorted(self.issues, key=lambda i: i.id, reverse=True)
+        expected = sorted(expected, key=lambda i: i.priority, reverse=True)
+        self.assertEqual(forward, [i.id for i in expected])
+
+        backward = list(reversed([row["id"] for row in last.data["results"]]))
+        response = last
+        while response.data["previous"]:
+            response = self.client.get(response.data["previous"])
+            backward.extend(reversed([row["id"] for row in response.data["results"]]))
+        self.assertEqual(backward, list(reversed(forward)))
+
+    def test_page_queries_do_not_grow(self):
+        """Test that a deep page costs the same number of queries as the first."""
+        with CaptureQueriesContext(connection) as first:
+            response = self.client.get(reverse("issue-list"), {"page_size": 2})
+        for _ in range(5):
+            response = self.client.get(response.data["next"])
+        with CaptureQueriesContext(connection) as deep:
+            self.client.get(response.data["next"])
+        self.assertEqual(len(first.captured_queries), len(deep.captured_queries))
+
+    def test_invalid_cursor(self):
+        """Test that a tampered cursor is rejected."""
+        response = self.client.get(reverse("issue-list"), {"cursor": "bogus"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_project_list_is_paginated(self):
+        """Test that the project list is paginated too."""
+        response = self.client.get(reverse("project-list"), {"page_size": 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["id"] for row in response.data["results"]], [self.project.id])
+        self.assertIsNone(response.data["next"])
+
+
+@skipUnless(connection.vendor == "postgresql", "full-text search needs PostgreSQL")
+class IssueFullTextSearchTests(TestCase):
+    """
+    Tests for the tsvector/trigram backed issue search.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="search_user", password="password123")
+        org = Organization.objects.create(name="Search Org")
+        Membership.objects.create(user=self.user, organization=org)
+        project = Project.objects.create(organization=org, name="Search Project")
+        self.title_hit = Issue.objects.create(project=project, title="Login crashes", description="stack trace")
+        self.body_hit = Issue.objects.create(project=project, title="Flaky test", description="login page crashes sometimes")
+        Issue.objects.create(project=project, title="Unrelated", description="nothing to see")
+        self.client.force_authenticate(user=self.user)
+
+    def test_search_vector_is_maintained(self):
+        """Test that the trigger fills the search vector on insert and update."""
+        self.title_hit.title = "Signup crashes"
+        self.title_hit.save()
+        vector = Issue.objects.values_list("search_vector", flat=True).get(pk=self.title_hit.pk)
+        self.assertIn("signup", vector)
+
+    def test_fulltext_search_ranks_title_matches_first(self):
+        """Test that stemmed matches are found and title matches outrank description matches."""
+        response = self.client.get(reverse("issue-list"), {"search": "crash login"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["id"] for row in response.data["results"]], [self.title_hit.id, self.body_hit.id])
+
+    def test_trigram_search_matches_typos(self):
+        """Test that trigram mode tolerates typos."""
+        response = self.client.get(reverse("issue-list"), {"search": "crashs", "search_mode": "trigram"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(self.title_hit.id, [row["id"] for row in response.data["results"]])
+
+
+class MembershipLookupTests(TestCase):
+    """
+    Scoping and permission checks share one membership lookup per request.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.manager = User.objects.create_user(username="lookup_manager", password="password123")
+        self.org = Organization.objects.create(name="Lookup Org")
+        Membership.objects.create(user=self.manager, organization=self.org, role=Membership.ROLE_MANAGER)
+        self.project = Project.objects.create(organization=self.org, name="Lookup Project")
+        self.issue = Issue.objects.create(project=self.project, title="Lookup Issue")
+        self.client.force_authenticate(user=self.manager)
+
+    def _membership_queries(self, captured):
+        return [q for q in captured if "tracker_membership" in q["sql"]]
+
+    def test_issue_detail_uses_single_membership_lookup(self):
+        """Test that retrieving an issue checks membership once and never lazy-loads the project."""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("issue-detail", kwargs={"pk": self.issue.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self._membership_queries(ctx.captured_queries)), 1)
+        # membership + issue joined with project/assignee + attachments
+        self.assertEqual(len(ctx.captured_queries), 3)
+
+    def test_project_update_uses_single_membership_lookup(self):
+        """Test that RolePermission, IsOrgMember and scoping share the membership map."""
+        url = reverse("project-detail", kwargs={"pk": self.project.id})
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.patch(url, {"organization": self.org.id, "name": "Renamed"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(self._membership_queries(ctx.captured_queries)), 1)
+
+    def test_role_permission_rejects_invalid_organization(self):
+        """Test that a malformed organization id is denied instead of erroring."""
+        response = self.client.post(reverse("project-list"), {"organization": "abc", "name": "X"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class BulkIssueTests(TestCase):
+    """
+    Tests for the bulk issue create/update/transition endpoints.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="bulk_user", password="password123")
+        self.org = Organization.objects.create(name="Bulk Org")
+        Membership.objects.create(user=self.user, organization=self.org)
+        self.project_a = Project.objects.create(organization=self.org, name="A")
+        self.project_b = Project.objects.create(organization=self.org, name="B")
+        self.foreign_project = Project.objects.create(organization=Organization.objects.create(name="Other"), name="C")
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_create_records_events_per_issue(self):
+        """Test that a bulk create writes every issue and records its events in the outbox."""
+        rows = [{"project": self.project_a.id, "title": f"A{n}"} for n in range(5)]
+        rows += [{"project": self.project_b.id, "title": "B0", "assigned_to_id": self.user.id}]
+        response = self.client.post(reverse("issue-bulk"), rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 6)
+        self.assertEqual(response.data[-1]["assigned_to"]["id"], self.user.id)
+        self.assertTrue(all(row["created_by"] == self.user.id for row in response.data))
+        self.assertEqual(OutboxEvent.objects.filter(project_id=self.project_a.id).count(), 5)
+        self.assertEqual(OutboxEvent.objects.filter(project_id=self.project_b.id).count(), 1)
+
+    def test_bulk_create_query_count_is_flat(self):
+        """Test that validation and writes do not issue per-row queries."""
+        counts = []
+        for size in (2, 20):
+            rows = [{"project": self.project_a.id, "title": f"T{n}", "assigned_to_id": self.user.id} for n in range(size)]
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.post(reverse("issue-bulk"), rows, format="json")
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_bulk_create_rejects_foreign_projects(self):
+        """Test that the whole batch fails if one row targets another organization."""
+        rows = [{"project": self.project_a.id, "title": "ok"}, {"project": self.foreign_project.id, "title": "nope"}]
+        response = self.client.post(reverse("issue-bulk"), rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Issue.objects.exists())
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_bulk_update(self):
+        """Test that a bulk PATCH updates each issue with its own fields."""
+        first = Issue.objects.create(project=self.project_a, title="first")
+        second = Issue.objects.create(project=self.project_b, title="second")
+        rows = [{"id": first.id, "title": "renamed"}, {"id": second.id, "priority": "high"}]
+        response = self.client.patch(reverse("issue-bulk"), rows, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual((first.title, second.priority), ("renamed", "high"))
+
+    def test_bulk_transition(self):
+        """Test that a bulk transition only touches issues the caller can see."""
+        mine = [Issue.objects.create(project=self.project_a, title=f"m{n}") for n in range(3)]
+        foreign = Issue.objects.create(project=self.foreign_project, title="f")
+        ids = [i.id for i in mine] + [foreign.id]
+        response = self.client.post(reverse("issue-bulk-transition"), {"ids": ids, "status": "done"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(response.data["updated"]), sorted(i.id for i in mine))
+        self.assertEqual(Issue.objects.filter(status="done").count(), 3)
+        self.assertEqual(OutboxEvent.objects.count(), 3)
+
+        response = self.client.post(reverse("issue-bulk-transition"), {"ids": ids, "status": "bogus"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_endpoints_reject_boolean_ids(self):
+        """Test that JSON true/false are not accepted as issue ids."""
+        issue = Issue.objects.create(project=self.project_a, title="one")
+        response = self.client.patch(reverse("issue-bulk"), [{"id": True, "title": "renamed"}], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(reverse("issue-bulk-transition"), {"ids": [issue.id, True], "status": "done"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        issue.refresh_from_db()
+        self.assertEqual((issue.title, issue.status), ("one", "open"))
+
+    def test_bulk_create_rejects_non_decimal_ids(self):
+        """Test that digit characters int() can't parse are a 400, not a 500."""
+        response = self.client.post(reverse("issue-bulk"), [{"project": "²", "title": "one"}], format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Issue.objects.filter(title="one").exists())
+
+
+class OutboxTests(TestCase):
+    """
+    Tests for recording issue events in the outbox and dispatching them after commit.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="outbox_user", password="password123")
+        org = Organization.objects.create(name="Outbox Org")
+        Membership.objects.create(user=self.user, organization=org)
+        self.project = Project.objects.create(organization=org, name="Outbox Project")
+        self.other_project = Project.objects.create(organization=org, name="Other Project")
+        self.client.force_authenticate(user=self.user)
+
+    @mock.patch("apps.tracker.tasks.dispatch_outbox.delay")
+    def test_writes_schedule_dispatch_after_commit(self, delay):
+        """Test that create, update and delete record events and schedule a dispatch on commit."""
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("issue-list"), {"project": self.project.id, "title": "New"}, format="json")
+        issue_id = response.data["id"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(reverse("issue-detail", kwargs={"pk": issue_id}), {"status": "done"}, format="json")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("issue-detail", kwargs={"pk": issue_id}))
+        types = [e.payload["type"] for e in OutboxEvent.objects.order_by("id")]
+        self.assertEqual(types, ["issue.created", "issue.updated", "issue.deleted"])
+        self.assertEqual(delay.call_count, 3)
+
+    @mock.patch("apps.tracker.tasks.dispatch_outbox.delay")
+    def test_rolled_back_write_sends_nothing(self, delay):
+        """Test that an event recorded in a rolled-back transaction is never dispatched."""
+        issue = Issue.objects.create(project=self.project, title="Doomed")
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    record_events([issue_event("issue.updated", issue)])
+                    raise RuntimeError("rollback")
+            except RuntimeError:
+                pass
+        self.assertFalse(OutboxEvent.objects.exists())
+        delay.assert_not_called()
+
+    @mock.patch("apps.tracker.events.get_channel_layer")
+    def test_dispatch_batches_per_project(self, get_channel_layer):
+        """Test that dispatch sends one message per project and clears the outbox."""
+        layer = get_channel_layer.return_value
+        layer.group_send = mock.AsyncMock()
+        issues = [Issue.objects.create(project=self.project, title=f"I{n}") for n in range(3)]
+        lone = Issue.objects.create(project=self.other_project, title="Lone")
+        record_events([issue_event("issue.created", issue) for issue in issues + [lone]])
+
+        self.assertEqual(dispatch_outbox(), 4)
+        messages = {call.args[0]: call.args[1] for call in layer.group_send.await_args_list}
+        self.assertEqual(messages[f"project_{self.project.id}"]["type"], "issue.batch")
+        self.assertEqual(len(messages[f"project_{self.project.id}"]["events"]), 3)
+        self.assertEqual(messages[f"project_{self.other_project.id}"]["issue_id"], lone.id)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+
+class WebSocketAuthCacheTests(TransactionTestCase):
+    """
+    Tests for the cached JWT and membership checks on WebSocket connect.
+    """
+
+    def setUp(self):
+        token_user_cache.clear()
+        project_membership_cache.clear()
+        self.user = User.objects.create_user(username="socket_user", password="password123")
+        self.org = Organization.objects.create(name="Socket Org")
+        self.membership = Membership.objects.create(user=self.user, organization=self.org)
+        self.project = Project.objects.create(organization=self.org, name="Socket Project")
+        self.token = str(AccessToken.for_user(self.user))
+        self.application = JWTAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+
+    def _connect(self, token=None):
+        async def connect():
+            communicator = WebsocketCommunicator(
+                self.application, f"/ws/projects/{self.project.id}/?token={token or self.token}"
+            )
+            connected, _ = await communicator.connect()
+            await communicator.disconnect()
+            return connected
+        return async_to_sync(connect)()
+
+    def test_reconnect_reuses_cached_user_and_membership(self):
+        """Test that a reconnect with the same token hits neither the user nor the membership query."""
+        with mock.patch.object(jwt_authentication, "get_user", wraps=jwt_authentication.get_user) as get_user, \
+                mock.patch("apps.tracker.consumers._is_project_member", wraps=_is_project_member) as is_member:
+            self.assertTrue(self._connect())
+            self.assertTrue(self._connect())
+        self.assertEqual(get_user.call_count, 1)
+        self.assertEqual(is_member.call_count, 1)
+
+    def test_membership_change_invalidates_cache(self):
+        """Test that removing a membership takes effect on the next connect."""
+        self.assertTrue(self._connect())
+        self.membership.delete()
+        self.assertFalse(self._connect())
+
+    def test_invalid_token_is_rejected(self):
+        """Test that a bad token connects as anonymous and is refused."""
+        self.assertFalse(self._connect(token="not-a-jwt"))
+
+    def test_invalidation_reaches_other_processes(self):
+        """Test that an invalidation drops the entries of caches in other processes."""
+        cache.delete("localcache:test")
+        mine = TTLCache(version_key="localcache:test", check_interval=0)
+        other = TTLCache(version_key="localcache:test", check_interval=0)
+        self.assertIsNone(async_to_sync(other.aget)("token"))
+        other.set("token", self.user)
+        mine.invalidate(lambda token, _: token == "token")
+        self.assertIsNone(async_to_sync(other.aget)("token"))
+
+
+class OverdueReminderTests(TestCase):
+    """
+    Tests for the streaming, per-assignee overdue reminder digests.
+    """
+
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", password="password123", email="alice@example.com")
+        self.bob = User.objects.create_user(username="bob", password="password123", email="bob@example.com")
+        no_email = User.objects.create_user(username="ghost", password="password123")
+        self.org = Organization.objects.create(name="Reminder Org")
+        self.project = Project.objects.create(organization=self.org, name="Reminder Project")
+        past = date.today() - timedelta(days=3)
+        for n in range(3):
+            Issue.objects.create(project=self.project, title=f"Alice {n}", assigned_to=self.alice, due_date=past)
+        Issue.objects.create(project=self.project, title="Bob late", assigned_to=self.bob, due_date=past)
+        # none of these should be reminded
+        Issue.objects.create(project=self.project, title="Done", assigned_to=self.bob, due_date=past, status="done")
+        Issue.objects.create(project=self.project, title="Future", assigned_to=self.bob, due_date=date.today() + timedelta(days=3))
+        Issue.objects.create(project=self.project, title="Unassigned", due_date=past)
+        Issue.objects.create(project=self.project, title="No email", assigned_to=no_email, due_date=past)
+
+    def test_one_digest_per_assignee(self):
+        """Test that each assignee gets a single digest listing all their overdue issues."""
+        self.assertEqual(send_overdue_reminders(), 2)
+        by_recipient = {message.to[0]: message for message in mail.outbox}
+        self.assertEqual(set(by_recipient), {"alice@example.com", "bob@example.com"})
+        self.assertEqual(by_recipient["alice@example.com"].subject, "[Reminder] 3 overdue issues")
+        self.assertEqual(len(by_recipient["alice@example.com"].body.splitlines()), 3)
+        self.assertEqual(by_recipient["bob@example.com"].subject, "[Reminder] Overdue issue: Bob late")
+
+    def test_query_count_does_not_grow_with_overdue_issues(self):
+        """Test that the task streams rows without per-issue queries."""
+        send_overdue_reminders()
+        counts = []
+        for size in (5, 50):
+            past = date.today() - timedelta(days=1)
+            Issue.objects.bulk_create(
+                Issue(project=self.project, title=f"Extra {n}", assigned_to=self.bob, due_date=past) for n in range(size)
+            )
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(send_overdue_reminders(), 1)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_rerun_is_idempotent(self):
+        """Test that a second run does not email the same issues again."""
+        self.assertEqual(send_overdue_reminders(), 2)
+        self.assertEqual(send_overdue_reminders(), 0)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertFalse(Issue.objects.filter(title__startswith="Alice", last_reminded_at__isnull=True).exists())
+
+    def test_only_changed_or_newly_overdue_issues_are_reminded(self):
+        """Test that later runs pick up changed and newly overdue issues only."""
+        send_overdue_reminders()
+        mail.outbox = []
+        changed = Issue.objects.get(title="Alice 0")
+        changed.assigned_to = self.bob
+        changed.save()
+        future = Issue.objects.get(title="Future")
+        future.due_date = date.today() - timedelta(days=1)
+        future.save()
+
+        self.assertEqual(send_overdue_reminders(), 1)
+        self.assertEqual(mail.outbox[0].to, ["bob@example.com"])
+        self.assertEqual(mail.outbox[0].subject, "[Reminder] 2 overdue issues")
+
+    def test_watermark_limits_the_scan_window(self):
+        """Test that issues overdue before the watermark and unchanged since are not rescanned."""
+        send_overdue_reminders()
+        # an issue that was already overdue at the last run and has not changed since
+        stale = Issue.objects.create(project=self.project, title="Stale", assigned_to=self.alice,
+                                     due_date=date.today() - timedelta(days=30))
+        Issue.objects.filter(pk=stale.pk).update(updated_at=timezone.now() - timedelta(days=30))
+        watermark = TaskWatermark.objects.get(name="overdue-reminders")
+        self.assertNotIn(stale, reminder_candidates(date.today(), watermark.value))
+        self.assertIn(stale, reminder_candidates(date.today()))
+
+    @mock.patch("apps.tracker.tasks.chord")
+    @mock.patch("apps.tracker.tasks.REMINDER_FANOUT_THRESHOLD", 2)
+    def test_large_organizations_fan_out(self, chord):
+        """Test that organizations over the threshold are handed to a subtask."""
+        self.assertEqual(send_overdue_reminders(), 0)
+        (subtasks,), _ = chord.call_args
+        self.assertEqual([subtask.args for subtask in subtasks], [(self.org.id, date.today().isoformat(), None)])
+        self.assertEqual(send_org_overdue_reminders(self.org.id, date.today().isoformat()), 2)
+
+    @mock.patch("apps.tracker.tasks.chord")
+    @mock.patch("apps.tracker.tasks.REMINDER_FANOUT_THRESHOLD", 2)
+    def test_watermark_waits_for_subtasks(self, chord):
+        """Test that a fanned-out run moves the watermark only from the chord callback."""
+        send_overdue_reminders()
+        watermark = TaskWatermark.objects.get(name="overdue-reminders")
+        # a subtask that fails for good never triggers the callback
+        self.assertIsNone(watermark.value)
+        (callback,), _ = chord.return_value.call_args
+        callback()
+        watermark.refresh_from_db()
+        self.assertIsNotNone(watermark.value)
+
+    def test_watermark_never_moves_backwards(self):
+        """Test that a late callback from an older run keeps the newer watermark."""
+        send_overdue_reminders()
+        watermark = TaskWatermark.objects.get(name="overdue-reminders")
+        advance_reminder_watermark((watermark.value - timedelta(hours=1)).isoformat())
+        self.assertEqual(TaskWatermark.objects.get(name="overdue-reminders").value, watermark.value)
+
+
+class ResponseCacheTests(TestCase):
+    """
+    Tests for the versioned list response cache and conditional requests.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="cache_user", password="password123")
+        self.org = Organization.objects.create(name="Cache Org")
+        Membership.objects.create(user=self.user, organization=self.org)
+        self.project = Project.objects.create(organization=self.org, name="Cache Project")
+        self.issue = Issue.objects.create(project=self.project, title="Cached", status="open")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("issue-list")
+
+    def test_repeated_list_is_served_from_cache(self):
+        """Test that a repeated poll only resolves memberships."""
+        first = self.client.get(self.url, {"status": "open"})
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url, {"status": "open"})
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_writes_invalidate_after_commit(self):
+        """Test that saving an issue bumps its organization's version once committed."""
+        before = self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Issue.objects.create(project=self.project, title="Fresh")
+        after = self.client.get(self.url)
+        self.assertNotEqual(before["ETag"], after["ETag"])
+        self.assertEqual(len(after.data["results"]), 2)
+
+    def test_other_organizations_keep_their_cache(self):
+        """Test that a write in one organization leaves other organizations' entries alone."""
+        other = Organization.objects.create(name="Elsewhere")
+        versions = get_org_versions([self.org.id, other.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            Issue.objects.create(project=Project.objects.create(organization=other, name="P"), title="x")
+        self.assertEqual(get_org_versions([self.org.id])[self.org.id], versions[self.org.id])
+        self.assertNotEqual(get_org_versions([other.id])[other.id], versions[other.id])
+
+    def test_conditional_requests(self):
+        """Test that a matching ETag gets a 304."""
+        response = self.client.get(self.url)
+        self.assertEqual(
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+        detail = self.client.get(reverse("issue-detail", kwargs={"pk": self.issue.id}))
+        self.assertEqual(
+            self.client.get(reverse("issue-detail", kwargs={"pk": self.issue.id}), HTTP_IF_NONE_MATCH=detail["ETag"]).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+    def test_delete_is_not_hidden_by_if_modified_since(self):
+        """Test that lists carry no Last-Modified that a delete would leave unchanged."""
+        response = self.client.get(self.url)
+        self.assertNotIn("Last-Modified", response)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.issue.delete()
+        after = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE="Wed, 01 Jan 2031 00:00:00 GMT")
+        self.assertEqual(after.status_code, status.HTTP_200_OK)
+        self.assertEqual(after.data["results"], [])
+
+
+class ProjectStatsTests(TestCase):
+    """
+    Tests for the incrementally maintained issue summaries behind the stats endpoints.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="stats_user", password="password123")
+        self.org = Organization.objects.create(name="Stats Org")
+        Membership.objects.create(user=self.user, organization=self.org)
+        self.project = Project.objects.create(organization=self.org, name="Stats Project")
+        self.client.force_authenticate(user=self.user)
+        past = date.today() - timedelta(days=2)
+        self.issues = [
+            Issue.objects.create(project=self.project, title="a", status="open", priority="high", due_date=past),
+            Issue.objects.create(project=self.project, title="b", status="open", priority="low"),
+            Issue.objects.create(project=self.project, title="c", status="done", priority="low", due_date=past),
+        ]
+
+    def summary_rows(self):
+        return sorted(
+            IssueSummary.objects.filter(count__gt=0).values_list("project_id", "status", "priority", "count", "overdue")
+        )
+
+    def test_project_stats_endpoint(self):
+        """Test that the stats endpoint reports counts by status and priority."""
+        refresh_overdue()
+        response = self.client.get(reverse("project-stats", kwargs={"pk": self.project.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total"], 3)
+        self.assertEqual(response.data["by_status"]["open"], 2)
+        self.assertEqual(response.data["by_priority"]["low"], 2)
+        self.assertEqual(response.data["overdue"], 1)
+
+    def test_writes_keep_summary_current(self):
+        """Test that API and ORM writes, including bulk ones, match a rebuild from scratch."""
+        issue = Issue.objects.get(pk=self.issues[1].pk)
+        issue.status = "in_progress"
+        issue.save()
+        self.issues[0].delete()
+        self.client.post(reverse("issue-list"), {"project": self.project.id, "title": "new", "priority": "critical"}, format="json")
+        self.client.post(reverse("issue-bulk"), [{"project": self.project.id, "title": f"bulk {n}"} for n in range(3)], format="json")
+        self.client.patch(reverse("issue-bulk"), [{"id": self.issues[2].id, "priority": "high"}], format="json")
+        self.client.post(reverse("issue-bulk-transition"), {"ids": [issue.id], "status": "blocked"}, format="json")
+        self.assertEqual(project_stats(self.project.id)["total"], 6)
+
+        incremental = self.summary_rows()
+        rebuild_summaries()
+        self.assertEqual([row[:4] for row in incremental], [row[:4] for row in self.summary_rows()])
+
+    def test_organization_rollup(self):
+        """Test that the organization stats add up its projects and hide other organizations."""
+        other = Project.objects.create(organization=self.org, name="Second")
+        Issue.objects.create(project=other, title="x", status="blocked")
+        response = self.client.get(reverse("organization-stats", kwargs={"pk": self.org.id}))
+        self.assertEqual(response.data["total"], 4)
+        self.assertEqual(response.data["by_status"]["blocked"], 1)
+        self.assertEqual([p["total"] for p in response.data["projects"]], [3, 1])
+
+        stranger = Organization.objects.create(name="Stranger")
+        response = self.client.get(reverse("organization-stats", kwargs={"pk": stranger.id}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stats_query_count_is_constant(self):
+        """Test that reading stats does not scan issues."""
+        url = reverse("project-stats", kwargs={"pk": self.project.id})
+        self.client.get(url)
+        Issue.objects.bulk_create(Issue(project=self.project, title=f"more {n}") for n in range(50))
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        tables = [q["sql"].split(" FROM ")[1].split()[0].strip('"') for q in ctx.captured_queries if " FROM " in q["sql"]]
+        self.assertNotIn("tracker_issue", tables)
+
+    def test_project_delete_query_count_is_constant(self):
+        """Test that deleting a project costs the same queries for 3 issues and 60, and leaves tombstones."""
+        big = Project.objects.create(organization=self.org, name="Big Project")
+        Issue.objects.bulk_create(Issue(project=big, title=f"bulk {n}") for n in range(60))
+        for project in (self.project, big):
+            IssueAttachment.objects.create(issue=project.issues.first(), file="attachments/note.txt", filename="note.txt")
+        issue_ids = {project.pk: set(project.issues.values_list("id", flat=True)) for project in (self.project, big)}
+
+        counts = []
+        for project in (self.project, big):
+            with CaptureQueriesContext(connection) as ctx:
+                project.delete()
+            counts.append(len(ctx))
+            self.assertEqual(set(IssueTombstone.objects.filter(project_id=project.pk).values_list("issue_id", flat=True)), issue_ids[project.pk])
+        self.assertEqual(counts[0], counts[1])
+        self.assertFalse(Issue.objects.exists())
+        self.assertFalse(IssueAttachment.objects.exists())
+        self.assertFalse(IssueSummary.objects.exists())
+
+    def test_organization_delete_removes_issues_in_bulk(self):
+        """Test that deleting an organization deletes its issues in bulk and leaves tombstones."""
+        Issue.objects.bulk_create(Issue(project=self.project, title=f"bulk {n}") for n in range(30))
+        with CaptureQueriesContext(connection) as ctx:
+            self.org.delete()
+        # per-issue signals would cost at least two queries for each of the 33 issues
+        self.assertLess(len(ctx), 30)
+        self.assertEqual(IssueTombstone.objects.filter(organization_id=self.org.pk).count(), 33)
+        self.assertFalse(Issue.objects.exists())
+
+
+class IssueExportTests(TestCase):
+    """
+    Tests for the streaming issue export.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="export_user", password="password123")
+        self.org = Organization.objects.create(name="Export Org")
+        Membership.objects.create(user=self.user, organization=self.org)
+        self.project = Project.objects.create(organization=self.org, name="Export Project")
+        for n in range(5):
+            Issue.objects.create(project=self.project, title=f"Issue, {n}", status="done" if n % 2 else "open", due_date=date(2026, 1, n + 1))
+        foreign = Project.objects.create(organization=Organization.objects.create(name="Other"), name="Foreign")
+        Issue.objects.create(project=foreign, title="Not mine")
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("issue-export")
+
+    def read(self, response):
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content)
+
+    def test_csv_export_is_scoped_and_filtered(self):
+        """Test that the CSV export streams the caller's issues and honors filters."""
+        response = self.client.get(self.url, {"status": "open"})
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(io.StringIO(self.read(response).decode())))
+        self.assertEqual([row["title"] for row in rows], ["Issue, 0", "Issue, 2", "Issue, 4"])
+        self.assertEqual(rows[0]["due_date"], "2026-01-01")
+
+    def test_ndjson_gzip_export(self):
+        """Test that NDJSON can be gzipped and follows the requested ordering."""
+        response = self.client.get(self.url, {"export_format": "ndjson", "compress": "gzip", "ordering": "-due_date"})
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertIn("issues.ndjson.gz", response["Content-Disposition"])
+        lines = gzip.decompress(self.read(response)).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(len(records), 5)
+        self.assertEqual(records[0]["title"], "Issue, 4")
+        self.assertEqual(records[0]["project"], self.project.id)
+
+    async def test_export_streams_under_asgi(self):
+        """Test that under ASGI the export is an async iterator that Django does not buffer."""
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        with mock.patch("apps.tracker.export.EXPORT_WRITE_BATCH", 1):
+            response = await AsyncClient().get(self.url, {"status": "open"}, headers=headers)
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        # header line plus one chunk per row
+        self.assertEqual(len(chunks), 4)
+        rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+        self.assertEqual([row["title"] for row in rows], ["Issue, 0", "Issue, 2", "Issue, 4"])
+
+    def test_unknown_format_is_rejected(self):
+        """Test that unsupported formats get a 400 instead of an empty stream."""
+        response = self.client.get(self.url, {"export_format": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AttachmentStorageTests(TestCase):
+    """
+    Tests for content-addressed attachment storage, resumable uploads and downloads.
+    """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="files_user", password="password123")
+        org = Organization.objects.create(name="Files Org")
+        Membership.objects.create(user=self.user, organization=org)
+        self.issue = Issue.objects.create(project=Project.objects.create(organization=org, name="Files"), title="Files")
+        self.client.force_authenticate(user=self.user)
+
+    def upload(self, content, name="notes.txt"):
+        url = reverse("issue-upload", kwargs={"pk": self.issue.id})
+        return self.client.post(url, {"file": SimpleUploadedFile(name, content, content_type="text/plain")}, format="multipart")
+
+    def download_url(self, attachment_id):
+        return reverse("issue-download", kwargs={"pk": self.issue.id, "attachment_id": attachment_id})
+
+    def test_identical_uploads_share_one_blob(self):
+        """Test that uploads are stored under their SHA-256 and deduplicated."""
+        first = self.upload(b"same bytes")
+        second = self.upload(b"same bytes", name="copy.txt")
+        self.assertEqual((first.status_code, second.status_code), (status.HTTP_201_CREATED, status.HTTP_201_CREATED))
+        self.assertEqual(first.data["sha256"], hashlib.sha256(b"same bytes").hexdigest())
+        self.assertEqual(second.data["sha256"], first.data["sha256"])
+        a, b = IssueAttachment.objects.order_by("pk")
+        self.assertEqual(a.file.name, b.file.name)
+        self.assertEqual(b.filename, "copy.txt")
+        blobs = [f for _, _, files in os.walk(os.path.join(self.media_root, "blobs")) for f in files]
+        self.assertEqual(blobs, [first.data["sha256"]])
+
+    def test_resumable_upload(self):
+        """Test that chunks append at the session offset and the last one creates the attachment."""
+        content = b"0123456789" * 10
+        url = reverse("issue-start-upload", kwargs={"pk": self.issue.id})
+        session = self.client.post(url, {"filename": "big.bin", "size": len(content)}, format="json").data
+        chunk_url = reverse("issue-upload-chunk", kwargs={"pk": self.issue.id, "session_id": session["id"]})
+
+        def send(offset, data):
+            return self.client.generic("PATCH", chunk_url, data, content_type="application/offset+octet-stream", HTTP_UPLOAD_OFFSET=str(offset))
+
+        self.assertEqual(send(0, content[:40]).data["offset"], 40)
+        conflict = send(0, content[40:])
+        self.assertEqual(conflict.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(self.client.get(chunk_url).data["offset"], 40)
+        done = send(40, content[40:])
+        self.assertEqual(done.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(done.data["sha256"], hashlib.sha256(content).hexdigest())
+        self.assertFalse(UploadSession.objects.exists())
+        download = self.client.get(self.download_url(done.data["id"]))
+        self.assertEqual(b"".join(download.streaming_content), content)
+
+    def test_range_and_conditional_downloads(self):
+        """Test that downloads honor Range and answer If-None-Match with 304."""
+        attachment_id = self.upload(b"abcdefghij").data["id"]
+        url = self.download_url(attachment_id)
+        partial = self.client.get(url, HTTP_RANGE="bytes=2-4")
+        self.assertEqual(partial.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b"".join(partial.streaming_content), b"cde")
+        self.assertEqual(partial["Content-Range"], "bytes 2-4/10")
+        self.assertEqual(self.client.get(url, HTTP_RANGE="bytes=-3").getvalue(), b"hij")
+        self.assertEqual(self.client.get(url, HTTP_RANGE="bytes=20-").status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        full = self.client.get(url)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=full["ETag"]).status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(ATTACHMENT_SERVE_MODE="x-accel")
+    def test_x_accel_redirect(self):
+        """Test that the web server can be asked to send the blob."""
+        data = self.upload(b"served by nginx").data
+        response = self.client.get(self.download_url(data["id"]))
+        self.assertTrue(response["X-Accel-Redirect"].endswith(data["sha256"]))
+        self.assertEqual(response.content, b"")
+
+    async def test_downloads_stream_under_asgi(self):
+        """Test that under ASGI whole and partial downloads are async iterators."""
+        data = (await sync_to_async(self.upload)(b"abcdefghij")).data
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        client = AsyncClient()
+        full = await client.get(self.download_url(data["id"]), headers=headers)
+        self.assertTrue(full.is_async)
+        self.assertEqual(full["Content-Length"], "10")
+        self.assertEqual(b"".join([block async for block in full.streaming_content]), b"abcdefghij")
+        partial = await client.get(self.download_url(data["id"]), headers={**headers, "Range": "bytes=2-4"})
+        self.assertEqual(partial.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(b"".join([block async for block in partial.streaming_content]), b"cde")
+
+    def test_content_disposition_escapes_filename(self):
+        """Test that quotes and non-ASCII characters in filenames cannot break the header."""
+        data = self.upload(b"x").data
+        IssueAttachment.objects.filter(pk=data["id"]).update(filename='re"port\u00e9.txt')
+        response = self.client.get(self.download_url(data["id"]))
+        self.assertEqual(response["Content-Disposition"], "attachment; filename*=utf-8''re%22port%C3%A9.txt")
+
+    def test_sessions_expire_after_the_last_chunk(self):
+        """Test that only sessions without a chunk for a day are expired."""
+        url = reverse("issue-start-upload", kwargs={"pk": self.issue.id})
+        active = self.client.post(url, {"filename": "a.bin", "size": 10}, format="json").data["id"]
+        idle = self.client.post(url, {"filename": "b.bin", "size": 10}, format="json").data["id"]
+        long_ago = timezone.now() - timedelta(days=2)
+        UploadSession.objects.update(created_at=long_ago)
+        UploadSession.objects.filter(pk=idle).update(updated_at=long_ago)
+        self.assertEqual(expire_upload_sessions(), 1)
+        self.assertEqual(list(UploadSession.objects.values_list("id", flat=True)), [uuid.UUID(active)])
+
+
+class AsyncIssueApiTests(TestCase):
+    """
+    Tests for the ASGI-native issue list and detail endpoints.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="async_user", password="password123")
+        self.org = Organization.objects.create(name="Async Org")
+        Membership.objects.create(user=self.user, organization=self.org)
+        self.project = Project.objects.create(organization=self.org, name="Async Project")
+        for n in range(5):
+            Issue.objects.create(project=self.project, title=f"Async {n}", priority="high" if n % 2 else "low", due_date=date(2026, 2, n + 1))
+        IssueAttachment.objects.create(
+            issue=Issue.objects.first(), file=SimpleUploadedFile("a.txt", b"a"), uploaded_by=self.user
+        )
+        self.foreign = Issue.objects.create(
+            project=Project.objects.create(organization=Organization.objects.create(name="Other"), name="Foreign"), title="Foreign"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    async def test_list_matches_sync_viewset(self):
+        """Test that the async list returns the same page and links as IssueViewSet."""
+        params = {"priority": "high", "ordering": "-due_date", "page_size": 1}
+        sync = await sync_to_async(self.client.get)(reverse("issue-list"), params)
+        response = await AsyncClient().get(reverse("async-issue-list"), params, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["results"], json.loads(json.dumps(sync.data["results"])))
+        self.assertEqual(data["next"].split("cursor=")[1], sync.data["next"].split("cursor=")[1])
+
+        following = await AsyncClient().get(data["next"], headers=self.headers)
+        self.assertEqual([row["title"] for row in following.json()["results"]], ["Async 1"])
+
+    async def test_detail_scoping_and_auth(self):
+        """Test that detail includes attachments, hides other organizations and requires a token."""
+        first = await Issue.objects.order_by("pk").afirst()
+        response = await AsyncClient().get(reverse("async-issue-detail", kwargs={"pk": first.pk}), headers=self.headers)
+        self.assertEqual(len(response.json()["attachments"]), 1)
+        foreign = await AsyncClient().get(reverse("async-issue-detail", kwargs={"pk": self.foreign.pk}), headers=self.headers)
+        self.assertEqual(foreign.status_code, status.HTTP_404_NOT_FOUND)
+        anonymous = await AsyncClient().get(reverse("async-issue-list"))
+        self.assertEqual(anonymous.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_invalid_filter_is_rejected(self):
+        """Test that invalid filter values get a 400 like django-filter's."""
+        response = await AsyncClient().get(reverse("async-issue-list"), {"status": "nope"}, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("status", response.json())
+        response = await AsyncClient().get(reverse("async-issue-list"), {"assigned_to": "²"}, headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("assigned_to", response.json())
+
+
+@mock.patch("apps.tracker.changes.CHANGES_SAFETY_LAG", timedelta(0))
+class DeltaSyncTests(TestCase):
+    """
+    Tests for the issue delta sync endpoint.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="sync_user", password="password123")
+        self.org = Organization.objects.create(name="Sync Org")
+        Membership.objects.create(user=self.user, organization=self.org)
+        self.project = Project.objects.create(organization=self.org, name="Sync Project")
+        self.issues = [Issue.objects.create(project=self.project, title=f"Sync {n}") for n in range(5)]
+        self.foreign = Issue.objects.create(
+            project=Project.objects.create(organization=Organization.objects.create(name="Other"), name="Foreign"), title="Foreign"
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("issue-changes")
+
+    def sync(self, cursor=None, limit=2):
+        """Follow `has_more` to the end; return (upserted ids, deleted ids, cursor)."""
+        upserts, deletes = [], []
+        while True:
+            params = {"limit": limit, **({"since": cursor} if cursor else {})}
+            data = self.client.get(self.url, params).data
+            upserts += [row["id"] for row in data["upserts"]]
+            deletes += [row["id"] for row in data["deletes"]]
+            cursor = data["cursor"]
+            if not data["has_more"]:
+                return upserts, deletes, cursor
+
+    def test_initial_then_incremental_sync(self):
+        """Test that a follow-up sync only carries what changed, deletions included."""
+        upserts, deletes, cursor = self.sync()
+        self.assertEqual(upserts, [issue.id for issue in self.issues])
+        self.assertEqual(deletes, [])
+
+        self.assertEqual(self.sync(cursor)[:2], ([], []))
+
+        self.issues[1].title = "Renamed"
+        self.issues[1].save()
+        doomed = self.issues[3].id
+        self.issues[3].delete()
+        self.foreign.delete()
+        upserts, deletes, cursor = self.sync(cursor)
+        self.assertEqual(upserts, [self.issues[1].id])
+        self.assertEqual(deletes, [doomed])
+        self.assertEqual(IssueTombstone.objects.count(), 2)
+
+    def test_recent_changes_wait_for_the_safety_lag(self):
+        """Test that changes younger than the lag are held back until a later sync."""
+        with mock.patch("apps.tracker.changes.CHANGES_SAFETY_LAG", timedelta(minutes=1)):
+            upserts, _, cursor = self.sync()
+        self.assertEqual(upserts, [])
+        self.assertEqual(len(self.sync(cursor)[0]), 5)
+
+    def test_bad_and_expired_cursors(self):
+        """Test that malformed cursors get a 400 and cursors past tombstone retention a 410."""
+        self.assertEqual(self.client.get(self.url, {"since": "garbage"}).status_code, status.HTTP_400_BAD_REQUEST)
+        cursor = self.client.get(self.url).data["cursor"]
+        with mock.patch("django.utils.timezone.now", return_value=timezone.now() + timedelta(days=60)):
+            response = self.client.get(self.url, {"since": cursor})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_issue_moved_out_is_deleted_for_the_old_organization(self):
+        """Test that moving an issue to an organization the caller can't see sends a delete."""
+        cursor = self.sync()[2]
+        moved = self.issues[0]
+        moved.project = self.foreign.project
+        moved.save()
+        upserts, deletes, _ = self.sync(cursor)
+        self.assertEqual((upserts, deletes), ([], [moved.id]))
+
+    def test_issue_moved_between_visible_organizations_is_an_upsert(self):
+        """Test that a caller in both organizations gets the moved issue as an upsert only."""
+        Membership.objects.create(user=self.user, organization=self.foreign.organization)
+        cursor = self.sync()[2]
+        moved = self.issues[0]
+        moved.project = self.foreign.project
+        moved.save()
+        upserts, deletes, _ = self.sync(cursor)
+        self.assertEqual((upserts, deletes), ([moved.id], []))
+
+    def test_project_move_leaves_tombstones(self):
+        """Test that moving a project records a tombstone per issue in the old organization."""
+        self.project.organization = self.foreign.organization
+        self.project.save()
+        self.assertEqual(
+            sorted(IssueTombstone.objects.filter(organization_id=self.org.id).values_list("issue_id", flat=True)),
+            [issue.id for issue in self.issues],
+        )
+
+    def test_membership_change_expires_the_cursor(self):
+        """Test that a cursor issued for another set of organizations forces a full resync."""
+        cursor = self.sync()[2]
+        membership = Membership.objects.create(user=self.user, organization=self.foreign.organization)
+        self.assertEqual(self.client.get(self.url, {"since": cursor}).status_code, status.HTTP_410_GONE)
+        membership.delete()
+        self.assertEqual(self.client.get(self.url, {"since": cursor}).status_code, status.HTTP_200_OK)
+
+
+class EventCoalescingTests(TransactionTestCase):
+    """
+    Tests for per-connection event coalescing and backpressure in ProjectConsumer.
+    """
+
+    def setUp(self):
+        token_user_cache.clear()
+        project_membership_cache.clear()
+        self.user = User.objects.create_user(username="coalesce_user", password="password123")
+        org = Organization.objects.create(name="Coalesce Org")
+        Membership.objects.create(user=self.user, organization=org)
+        self.project = Project.objects.create(organization=org, name="Coalesce Project")
+        self.path = f"/ws/projects/{self.project.id}/?token={AccessToken.for_user(self.user)}"
+        self.application = JWTAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+
+    def receive(self, events):
+        """Connect, send `events` to the project group, return the frames received."""
+        async def run():
+            communicator = WebsocketCommunicator(self.application, self.path)
+            await communicator.connect()
+            layer = get_channel_layer()
+            for event in events:
+                await layer.group_send(f"project_{self.project.id}", event)
+            frames = []
+            # receive_nothing waits without cancelling the consumer, unlike a receive timeout
+            while not await communicator.receive_nothing(timeout=0.3):
+                frames.append(await communicator.receive_json_from())
+            await communicator.disconnect()
+            return frames
+        return async_to_sync(run)()
+
+    def test_updates_are_merged_into_one_frame(self):
+        """Test that updates to one issue collapse and a burst arrives as one batch."""
+        events = [{"type": "issue.updated", "issue_id": 1, "title": f"v{n}", "status": "open"} for n in range(10)]
+        events.append({"type": "issue.created", "issue_id": 2, "title": "new"})
+        events.append({"type": "issue.deleted", "issue_id": 2})
+        events.append({"type": "issue.deleted", "issue_id": 3})
+        frames = self.receive(events)
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(frames[0]["type"], "issue.batch")
+        self.assertEqual(
+            [(e["type"], e["issue_id"]) for e in frames[0]["events"]], [("issue.updated", 1), ("issue.deleted", 3)]
+        )
+        self.assertEqual(frames[0]["events"][0]["title"], "v9")
+
+    def test_single_event_keeps_its_shape(self):
+        """Test that a lone event is sent as-is, not wrapped in a batch."""
+        frames = self.receive([{"type": "issue.created", "issue_id": 7, "title": "Solo"}])
+        self.assertEqual(frames, [{"type": "issue.created", "issue_id": 7, "title": "Solo"}])
+
+    def test_overflow_asks_for_resync(self):
+        """Test that a backlog past the bound is replaced by a resync message."""
+        events = [{"type": "issue.updated", "issue_id": n, "title": "x"} for n in range(5)]
+        with mock.patch.object(ProjectConsumer, "max_pending_events", 3):
+            frames = self.receive(events)
+        self.assertEqual([frame["type"] for frame in frames], ["resync.required"])
+
+
+class MultiplexedSubscriptionTests(TransactionTestCase):
+    """
+    Tests for subscribing one notifications socket to many projects.
+    """
+
+    def setUp(self):
+        project_membership_cache.clear()
+        self.user = User.objects.create_user(username="multiplex_user", password="password123")
+        org = Organization.objects.create(name="Multiplex Org")
+        Membership.objects.create(user=self.user, organization=org)
+        self.projects = [Project.objects.create(organization=org, name=f"P{n}") for n in range(3)]
+        self.foreign = Project.objects.create(organization=Organization.objects.create(name="Other"), name="Foreign")
+        self.path = f"/ws/notifications/?token={AccessToken.for_user(self.user)}"
+        self.application = JWTAuthMiddlewareStack(URLRouter(websocket_urlpatterns))
+
+    def test_subscribe_checks_membership_in_one_query(self):
+        """Test that a subscription to many projects runs one membership query and routes their events."""
+        ids = [project.id for project in self.projects]
+
+        async def run():
+            communicator = WebsocketCommunicator(self.application, self.path)
+            await communicator.connect()
+            await communicator.receive_json_from()  # greeting
+            await communicator.send_json_to({"action": "subscribe", "projects": ids + [self.foreign.id]})
+            subscribed = await communicator.receive_json_from()
+            layer = get_channel_layer()
+            await layer.group_send(f"project_{ids[1]}", {"type": "issue.created", "issue_id": 5, "project_id": ids[1], "title": "Hi"})
+            await layer.group_send(f"project_{self.foreign.id}", {"type": "issue.created", "issue_id": 6, "project_id": self.foreign.id, "title": "No"})
+            event = await communicator.receive_json_from()
+            await communicator.send_json_to({"action": "unsubscribe", "projects": [ids[1]]})
+            unsubscribed = await communicator.receive_json_from()
+            await layer.group_send(f"project_{ids[1]}", {"type": "issue.created", "issue_id": 7, "project_id": ids[1], "title": "Late"})
+            quiet = await communicator.receive_nothing(timeout=0.3)
+            await communicator.disconnect()
+            return subscribed, event, unsubscribed, quiet
+
+        with mock.patch("apps.tracker.consumers._member_project_ids", wraps=_member_project_ids) as lookup:
+            subscribed, event, unsubscribed, quiet = async_to_sync(run)()
+        self.assertEqual(lookup.call_count, 1)
+        self.assertEqual(subscribed, {"type": "subscribed", "projects": ids, "denied": [self.foreign.id]})
+        self.assertEqual(event, {"type": "issue.created", "issue_id": 5, "project_id": ids[1], "title": "Hi"})
+        self.assertEqual(unsubscribed["projects"], [ids[1]])
+        self.assertTrue(quiet)
+
+    def test_anonymous_cannot_subscribe(self):
+        """Test that subscribing requires a token."""
+        async def run():
+            communicator = WebsocketCommunicator(self.application, "/ws/notifications/")
+            await communicator.connect()
+            await communicator.receive_json_from()
+            await communicator.send_json_to({"action": "subscribe", "projects": [self.projects[0].id]})
+            reply = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return reply
+        self.assertEqual(async_to_sync(run)()["type"], "error")
+
+    def test_malformed_project_ids_are_ignored(self):
+        """Test that ids int() can't parse, such as "²", neither crash the socket nor subscribe."""
+        async def run():
+            communicator = WebsocketCommunicator(self.application, self.path)
+            await communicator.connect()
+            await communicator.receive_json_from()
+            await communicator.send_json_to({"action": "subscribe", "projects": ["²", True, str(self.projects[0].id)]})
+            reply = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return reply
+        self.assertEqual(async_to_sync(run)(), {"type": "subscribed", "projects": [self.projects[0].id], "denied": []})
+
+
+@override_settings(
+    INSTRUMENTATION_ENABLED=True,
+    METRICS_TOKEN="scrape-secret",
+    MIDDLEWARE=["apps.tracker.instrumentation.InstrumentationMiddleware", *settings.MIDDLEWARE],
+)
+class InstrumentationTests(TestCase):
+    """
+    Tests for the opt-in request, task and consumer instrumentation.
+    """
+
+    def setUp(self):
+        registry.clear()
+        shared_redis().delete(registry.shared_key)
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="timed_user", password="password123")
+        self.org = Organization.objects.create(name="Timed Org")
+        Membership.objects.create(user=self.user, organization=self.org)
+        self.project = Project.objects.create(organization=self.org, name="Timed Project")
+        Issue.objects.create(project=self.project, title="Timed")
+        self.client.force_authenticate(user=self.user)
+
+    def server_timing(self, response):
+        return dict(part.split(";", 1) for part in response["Server-Timing"].split(", "))
+
+    def scrape(self):
+        return self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-secret")
+
+    def test_response_has_server_timing(self):
+        """Test that a request reports its query count and SQL, serializer, permission and total time."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("issue-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timing = self.server_timing(response)
+        self.assertEqual(set(timing), {"db", "serialize", "permissions", "total"})
+        self.assertIn(f'desc="{len(queries)} queries"', timing["db"])
+
+    def test_metrics_aggregate_per_view(self):
+        """Test that the metrics endpoint sums requests per view in the Prometheus text format."""
+        self.client.get(reverse("issue-list"))
+        self.client.get(reverse("issue-list"))
+        body = self.scrape().content.decode()
+        self.assertIn("# TYPE tracker_http_request_seconds summary", body)
+        self.assertIn('tracker_http_request_seconds_count{method="GET",status="200",view="issue-list"} 2', body)
+        self.assertIn('tracker_http_serialize_seconds_total{view="issue-list"}', body)
+
+    def test_metrics_sum_every_process(self):
+        """Test that a scrape includes what other processes, e.g. Celery workers, flushed."""
+        worker = MetricsRegistry()
+        worker.observe("tracker_task_seconds", 0.5, task="apps.tracker.tasks.dispatch_outbox", state="SUCCESS")
+        worker.flush()
+        worker.observe("tracker_task_seconds", 0.25, task="apps.tracker.tasks.dispatch_outbox", state="SUCCESS")
+        worker.flush()
+        body = self.scrape().content.decode()
+        self.assertIn('tracker_task_seconds_count{state="SUCCESS",task="apps.tracker.tasks.dispatch_outbox"} 2', body)
+        self.assertIn('tracker_task_seconds_sum{state="SUCCESS",task="apps.tracker.tasks.dispatch_outbox"} 0.75', body)
+
+    def test_metrics_token(self):
+        """Test that the metrics endpoint requires the configured bearer token."""
+        self.assertEqual(self.client.get("/metrics").status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.scrape().status_code, status.HTTP_200_OK)
+        with override_settings(METRICS_TOKEN=""):
+            # no token configured: never served
+            self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer ").status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_celery_task_is_measured(self):
+        """Test that Celery task runs record their time and queries."""
+        rebuild_issue_summaries.apply()
+        body = registry.render()
+        self.assertIn('tracker_task_seconds_count{state="SUCCESS",task="apps.tracker.tasks.rebuild_issue_summaries"} 1', body)
+        self.assertRegex(body, r'tracker_task_db_queries_total\{task="apps.tracker.tasks.rebuild_issue_summaries"\} [1-9]')
+
+    @override_settings(INSTRUMENTATION_ENABLED=False)
+    def test_disabled_by_default(self):
+        """Test that nothing is recorded or added to responses when instrumentation is off."""
+        response = self.client.get(reverse("issue-list"))
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(registry.render(), "\n")
+
+
+class BenchmarkSuiteTests(TransactionTestCase):
+    """
+    Tests for the benchmark suite command on a tiny synthetic data set.
+    """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.output = os.path.join(self.media_root, "report.json")
+
+    def run_suite(self, *args):
+        call_command(
+            "benchmark_suite", "--orgs", "2", "--projects-per-org", "2", "--users", "10", "--members-per-org", "3",
+            "--issues", "60", "--attachments", "20", "--repeat", "2", "--ws-clients", "2", *args, stdout=io.StringIO(),
+        )
+
+    def test_report_covers_every_scenario(self):
+        """Test that the suite loads the data and records latency, queries and memory per scenario."""
+        self.run_suite("--output", self.output)
+        self.assertEqual(IssueAttachment.objects.count(), 20)
+        self.assertTrue(Membership.objects.filter(role=Membership.ROLE_OWNER).exists())
+        with open(self.output) as fh:
+            report = json.load(fh)
+        self.assertEqual(report["meta"]["issues"], 60)
+        self.assertEqual(set(report["scenarios"]), {
+            "issue_list", "issue_filter", "issue_search", "project_list", "permission_checks",
+            "ws_connect", "ws_broadcast", "send_overdue_reminders",
+        })
+        issue_list = report["scenarios"]["issue_list"]
+        self.assertEqual(set(issue_list["latency_ms"]), {"p50", "p90", "p95", "p99", "mean", "min", "max"})
+        self.assertGreater(issue_list["queries"], 0)
+        self.assertGreater(issue_list["peak_memory_kb"], 0)
+
+    def test_baseline_regressions(self):
+        """Test that slower p95 latency beyond the tolerance and extra queries count as regressions."""
+        result = {"latency_ms": {"p95": 10.0}, "queries": 3}
+        baseline = {"scenarios": {"fast": result, "lean": result}}
+        report = {"scenarios": {
+            "fast": {"latency_ms": {"p95": 11.0}, "queries": 3},
+            "lean": {"latency_ms": {"p95": 9.0}, "queries": 4},
+            "new": {"latency_ms": {"p95": 1.0}, "queries": 1},
+        }}
+        rows, regressions = compare(report, baseline, tolerance=0.2)
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(regressions, ["lean: 3 -> 4 queries"])
+        self.assertEqual(len(compare(report, baseline, tolerance=0.05)[1]), 2)
+
+    def test_fail_on_regression(self):
+        """Test that the command fails against a baseline it regresses from."""
+        with open(self.output, "w") as fh:
+            json.dump({"meta": {}, "scenarios": {"project_list": {"latency_ms": {"p95": 0.0}, "queries": 0}}}, fh)
+        with self.assertRaises(CommandError):
+            self.run_suite("--scenario", "project_list", "--baseline", self.output, "--fail-on-regression")
+
+
+class IssueRowSerializerTests(TestCase):
+    """
+    Tests for the values()-based issue list rendering and sparse fieldsets.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="rows_user", password="password123", email="rows@example.com", first_name="Row")
+        org = Organization.objects.create(name="Rows Org")
+        Membership.objects.create(user=self.user, organization=org)
+        project = Project.objects.create(organization=org, name="Rows")
+        assigned = Issue.objects.create(
+            project=project, title="Assigned", description="Details", priority="high",
+            due_date=date(2026, 3, 1), assigned_to=self.user, created_by=self.user,
+        )
+        Issue.objects.create(project=project, title="Unassigned")
+        for name, uploader in (("a.txt", self.user), ("b.txt", None)):
+            IssueAttachment.objects.create(
+                issue=assigned, file=f"blobs/aa/bb/{name}", filename=name, content_type="text/plain",
+                size=1, sha256="0" * 64, uploaded_by=uploader,
+            )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("issue-list")
+
+    def test_same_json_as_issue_serializer(self):
+        """Test that list rows render exactly like IssueSerializer, nested users and file URLs included."""
+        response = self.client.get(self.url)
+        request = Request(APIRequestFactory().get(self.url))
+        expected = IssueSerializer(Issue.objects.order_by("-created_at", "-id"), many=True, context={"request": request}).data
+        self.assertEqual(json.loads(response.content)["results"], json.loads(JSONRenderer().render(expected)))
+        self.assertEqual(list(response.data["results"][0]), list(expected[0]))
+
+    def test_sparse_fieldsets(self):
+        """Test that ?fields= picks keys and ?expand= decides which relations are nested."""
+        with CaptureQueriesContext(connection) as queries:
+            rows = self.client.get(self.url, {"fields": "id,title,assigned_to", "expand": ""}).data["results"]
+        self.assertEqual(rows[1], {"id": rows[1]["id"], "title": "Assigned", "assigned_to": self.user.id})
+        self.assertFalse(any("tracker_issueattachment" in query["sql"] for query in queries.captured_queries))
+        rows = self.client.get(self.url, {"fields": "title,attachments", "expand": "assigned_to"}).data["results"]
+        self.assertEqual(len(rows[1]["attachments"]), 2)
+        self.assertTrue(all(isinstance(pk, int) for pk in rows[1]["attachments"]))
+
+    def test_unknown_fields_are_rejected(self):
+        """Test that unknown sparse fieldset names get a 400."""
+        response = self.client.get(self.url, {"fields": "title,secret", "expand": "project"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(response.data), {"fields", "expand"})
+
+    async def test_async_list_fieldsets(self):
+        """Test that the async list honours the same sparse fieldsets."""
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        response = await AsyncClient().get(reverse("async-issue-list"), {"fields": "title,attachments"}, headers=headers)
+        rows = response.json()["results"]
+        self.assertEqual(list(rows[1]), ["title", "attachments"])
+        self.assertEqual(rows[1]["attachments"][0]["file"], "http://testserver/media/blobs/aa/bb/a.txt")
+
+
+class IssueOrganizationTests(TestCase):
+    """
+    Tests for the organization denormalized onto issues and the partitioning plan.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="org_user", password="password123")
+        self.org, self.other_org = Organization.objects.create(name="Org A"), Organization.objects.create(name="Org B")
+        for org in (self.org, self.other_org):
+            Membership.objects.create(user=self.user, organization=org)
+        self.project = Project.objects.create(organization=self.org, name="A")
+        self.other_project = Project.objects.create(organization=self.other_org, name="B")
+        self.client.force_authenticate(user=self.user)
+
+    def test_organization_follows_the_project(self):
+        """Test that create, bulk create, moving an issue and moving a project keep organization_id in sync."""
+        response = self.client.post(reverse("issue-list"), {"project": self.project.id, "title": "Created"}, format="json")
+        issue = Issue.objects.get(pk=response.data["id"])
+        self.assertEqual(issue.organization_id, self.org.id)
+        Issue.objects.bulk_create([Issue(project_id=self.other_project.id, title="Bulk")])
+        self.assertEqual(Issue.objects.get(title="Bulk").organization_id, self.other_org.id)
+
+        self.client.patch(reverse("issue-detail", kwargs={"pk": issue.id}), {"project": self.other_project.id}, format="json")
+        issue.refresh_from_db()
+        self.assertEqual(issue.organization_id, self.other_org.id)
+
+        self.other_project.organization = self.org
+        self.other_project.save()
+        self.assertEqual(set(Issue.objects.values_list("organization_id", flat=True)), {self.org.id})
+
+    def test_moves_invalidate_both_organizations(self):
+        """Test that moving an issue or a project bumps the old and the new organization's version."""
+        issue = Issue.objects.create(project=self.project, title="Moving")
+        orgs = [self.org.id, self.other_org.id]
+        before = get_org_versions(orgs)
+        with self.captureOnCommitCallbacks(execute=True):
+            issue.project = self.other_project
+            issue.save()
+        after = get_org_versions(orgs)
+        self.assertTrue(all(after[org_id] != before[org_id] for org_id in orgs))
+
+        stamp = Issue.objects.get(pk=issue.pk).updated_at
+        with self.captureOnCommitCallbacks(execute=True):
+            self.other_project.organization = self.org
+            self.other_project.save()
+        moved = get_org_versions(orgs)
+        self.assertTrue(all(moved[org_id] != after[org_id] for org_id in orgs))
+        self.assertGreater(Issue.objects.get(pk=issue.pk).updated_at, stamp)
+
+    def test_bulk_update_moves_the_organization(self):
+        """Test that a bulk PATCH moving issues to another project updates their organization."""
+        issue = Issue.objects.create(project=self.project, title="Bulk moved")
+        response = self.client.patch(
+            reverse("issue-bulk"), [{"id": issue.id, "project": self.other_project.id}], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        issue.refresh_from_db()
+        self.assertEqual(issue.organization_id, self.other_org.id)
+
+    def test_partition_plan(self):
+        """Test the hash and list partition layouts and that unique indexes are refused."""
+        self.assertEqual(
+            partition_bounds("hash", 2),
+            [("tracker_issue_p0", "FOR VALUES WITH (MODULUS 2, REMAINDER 0)"),
+             ("tracker_issue_p1", "FOR VALUES WITH (MODULUS 2, REMAINDER 1)")],
+        )
+        bounds = partition_bounds("list", org_ids=[7, 3])
+        self.assertEqual([name for name, _ in bounds], ["tracker_issue_org_3", "tracker_issue_org_7", "tracker_issue_default"])
+
+        referencing = [("tracker_issueattachment", "attachment_issue_fk")]
+        with self.assertRaises(ReferencedByForeignKeys):
+            conversion_statements("list", bounds, referencing=referencing)
+        statements = conversion_statements("list", bounds, referencing=referencing, drop_foreign_keys=True)
+        self.assertIn("INCLUDING CONSTRAINTS", statements[3])
+        self.assertIn("PARTITION BY LIST (organization_id)", statements[3])
+        self.assertIn("PRIMARY KEY (id, organization_id)", statements[5])
+        self.assertIn("ALTER TABLE tracker_issueattachment DROP CONSTRAINT attachment_issue_fk", statements)
+        with self.assertRaises(ValueError):
+            conversion_statements("hash", bounds, indexes=["CREATE UNIQUE INDEX u ON public.tracker_issue (title)"])
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"], REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTests(TestCase):
+    """
+    Tests for read-replica routing. Only the chosen aliases are checked, so no
+    second database is needed.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="replica_user", password="password123")
+        self.router = PrimaryReplicaRouter()
+
+    def routed_request(self, method):
+        """Run a request through the middleware; return the aliases its reads went to, before and after a write."""
+        request = getattr(RequestFactory(), method)("/api/v1/issues/")
+        request.user = self.user
+        seen = []
+
+        def get_response(request):
+            seen.append(Issue.objects.all().db)
+            if method == "post":
+                self.router.db_for_write(Issue)
+                seen.append(Issue.objects.all().db)
+            return mock.Mock()
+
+        ReplicaRoutingMiddleware(get_response)(request)
+        return seen
+
+    def test_reads_outside_a_unit_of_work_use_the_primary(self):
+        """Test that reads default to the primary and migrations only run there."""
+        self.assertEqual(Issue.objects.all().db, "default")
+        self.assertFalse(self.router.allow_migrate("replica1", "tracker"))
+
+    def test_safe_requests_read_from_replicas_and_writes_pin(self):
+        """Test that GETs read from a replica and a write pins its request and then its user to the primary."""
+        self.assertEqual(self.routed_request("get"), ["replica1"])
+        self.assertEqual(self.routed_request("post"), ["default", "default"])
+        self.assertTrue(cache.get(sticky_key(self.user.id)))
+
+        with replica_reads():
+            self.assertEqual(Issue.objects.all().db, "replica1")
+            self.router.db_for_write(Issue)
+            self.assertEqual(Issue.objects.all().db, "default")
+
+    def test_sticky_window_keeps_drf_reads_on_the_primary(self):
+        """Test that a user who just wrote reads from the primary through the API."""
+        view = IssueViewSet(action="list", format_kwarg=None)
+        request = Request(APIRequestFactory().get("/"))
+        request.user = self.user
+        with replica_reads():
+            view.perform_authentication(request)
+            self.assertEqual(Issue.objects.all().db, "replica1")
+        cache.set(sticky_key(self.user.id), 1, 5)
+        with replica_reads():
+            view.perform_authentication(request)
+            self.assertEqual(Issue.objects.all().db, "default")
+
+    @override_settings(REPLICA_READ_TASKS=["apps.tracker.tasks.weekly_report"])
+    def test_read_only_tasks_read_from_replicas(self):
+        """Test that tasks in REPLICA_READ_TASKS read from a replica even after writing."""
+        task = SimpleNamespace(name="apps.tracker.tasks.weekly_report")
+        start_task_routing(task_id="t1", task=task)
+        try:
+            self.router.db_for_write(Issue)
+            self.assertEqual(Issue.objects.all().db, "replica1")
+        finally:
+            finish_task_routing(task_id="t1")
+        self.assertEqual(Issue.objects.all().db, "default")
+
+    def test_reminder_and_summary_tasks_read_from_the_primary(self):
+        """Test that tasks whose writes depend on their reads are not routed to a replica."""
+        for name in ("send_overdue_reminders", "send_org_overdue_reminders", "refresh_issue_summary_overdue"):
+            start_task_routing(task_id="t1", task=SimpleNamespace(name=f"apps.tracker.tasks.{name}"))
+            try:
+                self.assertEqual(Issue.objects.all().db, "default")
+            finally:
+                finish_task_routing(task_id="t1")
+
+
+class ReplicaAliasMixin:
+    """
+    Registers `replica1`, the alias POSTGRES_REPLICAS would add, as a second
+    connection to the test database for the duration of the class only.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # before super(), which checks `databases` against the registered aliases
+        primary = connections["default"].settings_dict
+        connections.settings["replica1"] = {**primary, "TEST": {**primary["TEST"], "MIRROR": "default"}}
+        cls.addClassCleanup(cls.remove_replica_alias)
+        super().setUpClass()
+
+    @classmethod
+    def remove_replica_alias(cls):
+        connections["replica1"].close()
+        del connections["replica1"]
+        del connections.settings["replica1"]
+
+
+@override_settings(
+    DATABASE_REPLICAS=["replica1"],
+    REPLICA_STICKY_SECONDS=5,
+    MIDDLEWARE=[*settings.MIDDLEWARE, "apps.tracker.replicas.ReplicaRoutingMiddleware"],
+)
+class ReplicaRoutingAPITests(ReplicaAliasMixin, TransactionTestCase):
+    """
+    Tests for read-replica routing through the middleware and viewsets, with
+    `replica1` mirroring the primary.
+    """
+
+    databases = {"default", "replica1"}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="reader", password="password123")
+        self.writer = User.objects.create_user(username="writer", password="password123")
+        self.org = Organization.objects.create(name="Replica Org")
+        Membership.objects.create(user=self.user, organization=self.org)
+        Membership.objects.create(user=self.writer, organization=self.org)
+        self.project = Project.objects.create(organization=self.org, name="Replica Project")
+        Issue.objects.create(project=self.project, title="Existing", created_by=self.user)
+        cache.clear()
+
+    def api(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        return client
+
+    def issue_reads(self, client, **extra):
+        """GET the issue list; return the response and the aliases its issue queries went to."""
+        with CaptureQueriesContext(connection) as primary, CaptureQueriesContext(connections["replica1"]) as replica:
+            response = client.get(reverse("issue-list"), **extra)
+        aliases = [
+            alias for alias, queries in (("default", primary), ("replica1", replica))
+            if any('"tracker_issue"' in query["sql"] for query in queries)
+        ]
+        return response, aliases
+
+    def test_reads_use_the_replica_until_the_user_writes(self):
+        """Test that list reads go to the replica, and to the primary for a while after the user's write."""
+        client = self.api(self.user)
+        response, aliases = self.issue_reads(client)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(aliases, ["replica1"])
+
+        with CaptureQueriesContext(connections["replica1"]) as replica:
+            response = client.post(reverse("issue-list"), {"project": self.project.id, "title": "New"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(replica), 0)
+        self.assertTrue(cache.get(sticky_key(self.user.id)))
+
+        response, aliases = self.issue_reads(client)
+        self.assertEqual(aliases, ["default"])
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_replica_pages_after_a_write_are_not_cached(self):
+        """Test that a page read from a replica right after a write is neither cached nor given an ETag."""
+        response = self.api(self.writer).post(
+            reverse("issue-list"), {"project": self.project.id, "title": "New"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        client = self.api(self.user)
+        for _ in range(2):
+            response, aliases = self.issue_reads(client)
+            self.assertEqual(aliases, ["replica1"])
+            self.assertNotIn("ETag", response)
+
+        # once replicas have caught up, pages are cached and revalidated again
+        cache.delete(RECENT_WRITE_KEY.format(self.org.id))
+        response, aliases = self.issue_reads(client)
+        self.assertEqual(aliases, ["replica1"])
+        etag = response["ETag"]
+        response, aliases = self.issue_reads(client, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(aliases, [])
+
+    def test_async_middleware_routes_reads(self):
+        """Test that the middleware runs natively in an async chain and still routes reads."""
+        middleware = ReplicaRoutingMiddleware(self.async_get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        request = AsyncRequestFactory().get("/api/v1/issues/")
+        request.user = self.user
+        self.assertEqual(async_to_sync(middleware)(request), "replica1")
+        request = AsyncRequestFactory().post("/api/v1/issues/")
+        request.user = self.user
+        self.assertEqual(async_to_sync(middleware)(request), "default")
+        self.assertTrue(cache.get(sticky_key(self.user.id)))
+
+    async def async_get_response(self, request):
+        if request.method == "POST":
+            PrimaryReplicaRouter().db_for_write(Issue)
+        return Issue.objects.all().db
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """
+    Tests for the per-process connection pool behind the pooled PostgreSQL backend.
+    """
+
+    def test_connections_are_reused_up_to_max_size(self):
+        """Test that released connections are handed out again and a full pool times out."""
+        pool = ConnectionPool(max_size=2, timeout=0.05)
+        first = pool.acquire(FakeConnection)
+        pool.acquire(FakeConnection)
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(FakeConnection)
+        pool.release(first)
+        self.assertIs(pool.acquire(FakeConnection), first)
+        self.assertEqual(pool.stats()["opened"], 2)
+
+    def test_waiting_acquire_gets_a_released_connection(self):
+        """Test that a caller blocked on a full pool gets the next released connection."""
+        pool = ConnectionPool(max_size=1, timeout=5)
+        held = pool.acquire(FakeConnection)
+        threading.Timer(0.05, pool.release, [held]).start()
+        self.assertIs(pool.acquire(FakeConnection), held)
+        self.assertEqual(pool.stats()["waits"], 1)
+
+    def test_broken_and_expired_connections_are_replaced(self):
+        """Test that idle connections failing the check, or past max_lifetime, are closed and replaced."""
+        pool = ConnectionPool(max_size=1, check_after=0)
+        broken = pool.acquire(FakeConnection)
+        pool.release(broken)
+        replacement = pool.acquire(FakeConnection, check=lambda connection: False)
+        self.assertTrue(broken.closed)
+        self.assertIsNot(replacement, broken)
+
+        pool.max_lifetime = 0
+        pool.release(replacement)
+        self.assertIsNot(pool.acquire(FakeConnection), replacement)
+        self.assertTrue(replacement.closed)
+        self.assertEqual(pool.stats()["size"], 1)
+
+
+class DatabaseHealthTests(ReplicaAliasMixin, TestCase):
+    """
+    Tests for the database health endpoint.
+    """
+
+    databases = {"default", "replica1"}
+
+    def test_reports_every_database(self):
+        """Test that the endpoint reports the primary and the replica as reachable."""
+        response = self.client.get(reverse("health-db"))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data["ok"])
+        self.assertTrue(data["databases"]["default"]["ok"])
+        self.assertTrue(data["databases"]["replica1"]["ok"])
@@ -1,4 +1,6 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import OrganizationViewSet, ProjectViewSet, IssueViewSet, MembershipViewSet
 
 router = DefaultRouter()
@@ -7,4 +9,7 @@ router.register(r'projects', ProjectViewSet, basename="project")
 router.register(r'issues', IssueViewSet, basename="issue")
 router.register(r'memberships', MembershipViewSet, basename="membership")
 
-urlpatterns = router.urls
+urlpatterns = router.urls + [
+    path("async/issues/", async_views.issue_list, name="async-issue-list"),
+    path("async/issues/<int:pk>/", async_views.issue_detail, name="async-issue-detail"),
+]
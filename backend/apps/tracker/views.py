@@ -3,15 +3,41 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Organization, Membership, Project, Issue, IssueAttachment
-from .serializers import OrganizationSerializer, MembershipSerializer, ProjectSerializer, IssueSerializer, IssueAttachmentSerializer
-from .permissions import IsOrgMember, RolePermission
+from .models import Organization, Membership, Project, Issue, IssueAttachment, IssueTombstone, UploadSession
+from .serializers import OrganizationSerializer, MembershipSerializer, ProjectSerializer, IssueSerializer, IssueAttachmentSerializer, UploadSessionSerializer
+from .permissions import IsOrgMember, RolePermission, get_membership_roles, get_user_org_ids
+from .pagination import KeysetPagination
+from .filters import IssueSearchFilter
 from django.contrib.auth.models import User
+from collections import Counter
+from django.db import transaction
+from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated
-from asgiref.sync import async_to_sync
-from channels.layers import get_channel_layer
+from .events import issue_event, record_events
+from .cache import invalidate_orgs
+from .mixins import CachedListMixin, RowListMixin
+from .row_serializers import IssueRowSerializer
+from .instrumentation import InstrumentedViewMixin
+from .replicas import ReplicaRoutingViewMixin
+from . import stats
+from rest_framework.exceptions import NotFound
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from .export import EXPORT_FORMATS, aiter_chunks, export_chunks
+from .changes import CHANGES_MAX_PAGE_SIZE, CHANGES_PAGE_SIZE, CursorExpired, changes_page, decode_changes_cursor, org_scope, record_moves
+from .attachments import HashingUploadHandler, append_chunk, attachment_storage, file_sha256, serve_attachment
+from django.shortcuts import get_object_or_404
 
-class OrganizationViewSet(viewsets.ModelViewSet):
+def is_int_id(value):
+    """True for a JSON integer id; bools are ints in Python but never ids."""
+    return not isinstance(value, bool) and isinstance(value, int)
+
+def pk_list(values):
+    """Keep the values that look like primary keys, as ints."""
+    # isdecimal, not isdigit: "²" is a digit that int() rejects
+    return [int(v) for v in values if not isinstance(v, bool) and isinstance(v, (int, str)) and str(v).isdecimal()]
+
+class OrganizationViewSet(InstrumentedViewMixin, ReplicaRoutingViewMixin, viewsets.ModelViewSet):
     queryset = Organization.objects.all()
     serializer_class = OrganizationSerializer
 
@@ -20,50 +46,314 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         # create membership owner
         Membership.objects.create(user=self.request.user, organization=org, role=Membership.ROLE_OWNER)
 
-class ProjectViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=["get"])
+    def stats(self, request, pk=None):
+        """Issue counts rolled up over the organization's projects, read from IssueSummary."""
+        org_id = pk_list([pk])
+        if not org_id or org_id[0] not in get_membership_roles(request):
+            raise NotFound()
+        return Response(stats.organization_stats(org_id[0]))
+
+class ProjectViewSet(InstrumentedViewMixin, ReplicaRoutingViewMixin, CachedListMixin, viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
     permission_classes = [IsAuthenticated, IsOrgMember, RolePermission]
     allowed_roles = ["owner","manager"]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         # restrict to organizations where user is a member
-        qs = Project.objects.filter(organization__members__user=self.request.user).distinct()
+        qs = Project.objects.filter(organization_id__in=get_user_org_ids(self.request))
         org_id = self.request.query_params.get("organization")
         if org_id:
             qs = qs.filter(organization_id=org_id)
         return qs
 
-class IssueViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=["get"])
+    def stats(self, request, pk=None):
+        """Issue counts by status and priority plus overdue, read from IssueSummary."""
+        project = self.get_object()
+        return Response(stats.project_stats(project.pk))
+
+class IssueViewSet(InstrumentedViewMixin, ReplicaRoutingViewMixin, CachedListMixin, RowListMixin, viewsets.ModelViewSet):
     serializer_class = IssueSerializer
+    row_serializer_class = IssueRowSerializer
     permission_classes = [IsAuthenticated, IsOrgMember]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, IssueSearchFilter, filters.OrderingFilter]
     filterset_fields = ["status", "priority", "due_date", "assigned_to"]
     search_fields = ["title", "description"]
     ordering_fields = ["due_date", "priority", "created_at"]
+    bulk_max_size = 500
+    # a cursor must not move past rows a lagging replica doesn't show yet
+    primary_read_actions = ("changes",)
 
     def get_queryset(self):
-        return Issue.objects.filter(project__organization__members__user=self.request.user).distinct()
+        # scope by pre-resolved org ids on the issue's own organization column:
+        # no join, and on a partitioned table only those organizations' partitions are read
+        qs = Issue.objects.filter(organization_id__in=get_user_org_ids(self.request))
+        return self.get_serializer_class().setup_eager_loading(qs)
 
     def perform_create(self, serializer):
-        issue = serializer.save(created_by=self.request.user)
-        # Broadcast notification to project group
-        channel_layer = get_channel_layer()
-        async_to_sync(channel_layer.group_send)(
-            f"project_{issue.project_id}",
-            {"type": "issue.created", "issue_id": issue.id, "title": issue.title}
-        )
+        # the outbox row commits with the issue; the broadcast happens after commit
+        with transaction.atomic():
+            issue = serializer.save(created_by=self.request.user)
+            record_events([issue_event("issue.created", issue)])
         return issue
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            issue = serializer.save()
+            record_events([issue_event("issue.updated", issue, status=issue.status)])
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            record_events([issue_event("issue.deleted", instance)])
+            instance.delete()
+
+    def get_bulk_serializer(self, rows, **kwargs):
+        """
+        IssueSerializer(many=True) whose project/assignee ids resolve from two
+        prefetched maps; projects are limited to the caller's organizations.
+        """
+        project_ids, user_ids = set(), set()
+        for row in rows:
+            if isinstance(row, dict):
+                project_ids.add(row.get("project"))
+                user_ids.add(row.get("assigned_to_id"))
+        prefetched = {
+            Project: Project.objects.filter(organization_id__in=get_user_org_ids(self.request)).in_bulk(
+                pk_list(project_ids)
+            ),
+            User: User.objects.in_bulk(pk_list(user_ids)),
+        }
+        context = {**self.get_serializer_context(), "prefetched": prefetched}
+        return self.get_serializer(data=rows, many=True, context=context, **kwargs)
+
+    def validate_bulk_rows(self, rows):
+        if not isinstance(rows, list) or not rows:
+            return "expected a non-empty list"
+        if len(rows) > self.bulk_max_size:
+            return f"at most {self.bulk_max_size} issues per request"
+        return None
+
+    @action(detail=False, methods=["post", "patch"], url_path="bulk")
+    def bulk(self, request):
+        """POST creates a list of issues; PATCH partially updates a list of issues identified by `id`."""
+        error = self.validate_bulk_rows(request.data)
+        if error:
+            return Response({"detail": error}, status=status.HTTP_400_BAD_REQUEST)
+        if request.method == "POST":
+            return self.bulk_create(request.data)
+        return self.bulk_update(request.data)
+
+    def bulk_create(self, rows):
+        serializer = self.get_bulk_serializer(rows)
+        serializer.is_valid(raise_exception=True)
+        issues = [Issue(created_by=self.request.user, **attrs) for attrs in serializer.validated_data]
+        with transaction.atomic():
+            Issue.objects.bulk_create(issues)
+            stats.apply_summary_deltas(Counter(stats.summary_key(issue) for issue in issues))
+            record_events([issue_event("issue.created", issue) for issue in issues])
+            # bulk writes skip model signals
+            invalidate_orgs(issue.organization_id for issue in issues)
+
+        created = self.get_queryset().filter(pk__in=[issue.pk for issue in issues]).order_by("pk")
+        return Response(self.get_serializer(created, many=True).data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, rows):
+        ids = [row.get("id") if isinstance(row, dict) else None for row in rows]
+        if not all(is_int_id(pk) for pk in ids) or len(set(ids)) != len(ids):
+            return Response({"detail": "every item needs a unique integer id"}, status=status.HTTP_400_BAD_REQUEST)
+        instances = Issue.objects.filter(organization_id__in=get_user_org_ids(self.request)).in_bulk(ids)
+        missing = [pk for pk in ids if pk not in instances]
+        if missing:
+            return Response({"detail": "issues not found", "ids": missing}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = self.get_bulk_serializer(rows, partial=True)
+        serializer.is_valid(raise_exception=True)
+        now = timezone.now()
+        changed_fields = {"updated_at"}
+        moves = []
+        for pk, attrs in zip(ids, serializer.validated_data):
+            issue = instances[pk]
+            left = (issue.pk, issue.project_id, issue.organization_id)
+            for field, value in attrs.items():
+                setattr(issue, field, value)
+                changed_fields.add(field)
+            if "project" in attrs:
+                # bulk_update skips save(), which keeps the organization in step
+                issue.organization_id = issue.project.organization_id
+                changed_fields.add("organization")
+                if issue.organization_id != left[2]:
+                    moves.append(left)
+            issue.updated_at = now
+        with transaction.atomic():
+            Issue.objects.bulk_update(list(instances.values()), sorted(changed_fields))
+            record_moves(moves)
+            stats.apply_summary_deltas(stats.moved_deltas(
+                (issue._loaded_summary_key, stats.summary_key(issue)) for issue in instances.values()
+            ))
+            record_events([issue_event("issue.updated", issue, status=issue.status) for issue in instances.values()])
+            invalidate_orgs(get_user_org_ids(self.request))
+
+        updated = self.get_queryset().filter(pk__in=ids).order_by("pk")
+        return Response(self.get_serializer(updated, many=True).data)
+
+    @action(detail=False, methods=["post"], url_path="bulk/transition")
+    def bulk_transition(self, request):
+        """Move the issues in `ids` to `status` with a single UPDATE."""
+        data = request.data if isinstance(request.data, dict) else {}
+        ids, new_status = data.get("ids"), data.get("status")
+        if new_status not in dict(Issue.STATUS_CHOICES):
+            return Response({"detail": "invalid status"}, status=status.HTTP_400_BAD_REQUEST)
+        error = self.validate_bulk_rows(ids)
+        if error or not all(is_int_id(pk) for pk in ids):
+            return Response({"detail": error or "ids must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+
+        org_ids = get_user_org_ids(request)
+        scoped = Issue.objects.filter(pk__in=ids, organization_id__in=org_ids)
+        with transaction.atomic():
+            rows = list(scoped.select_for_update(of=("self",)).values_list("id", "project_id", "title", "status", "priority"))
+            Issue.objects.filter(pk__in=[row[0] for row in rows], organization_id__in=org_ids).update(
+                status=new_status, updated_at=timezone.now()
+            )
+            stats.apply_summary_deltas(stats.moved_deltas(
+                ((project_id, old_status, priority), (project_id, new_status, priority))
+                for _, project_id, _, old_status, priority in rows
+            ))
+            record_events([
+                (project_id, {"type": "issue.updated", "issue_id": pk, "project_id": project_id, "title": title, "status": new_status})
+                for pk, project_id, title, _, _ in rows
+            ])
+            invalidate_orgs(org_ids)
+        return Response({"updated": [row[0] for row in rows], "status": new_status})
+
+    @action(detail=False, methods=["get"], url_path="changes")
+    def changes(self, request):
+        """
+        Delta sync: issues created or updated (`upserts`) and deleted (`deletes`)
+        since the `?since=` cursor of a previous response, oldest first, up to
+        `?limit=`. Apply upserts, then deletes; repeat while `has_more`.
+        """
+        org_ids = get_user_org_ids(request)
+        scope = org_scope(org_ids)
+        try:
+            position = decode_changes_cursor(request.query_params.get("since"), scope)
+        except CursorExpired:
+            return Response({"detail": "cursor expired; sync from scratch"}, status=status.HTTP_410_GONE)
+        except ValueError:
+            return Response({"detail": "invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = pk_list([request.query_params.get("limit", CHANGES_PAGE_SIZE)])
+        limit = min(max(limit[0] if limit else CHANGES_PAGE_SIZE, 1), CHANGES_MAX_PAGE_SIZE)
+
+        tombstones = IssueTombstone.objects.filter(organization_id__in=org_ids)
+        page = changes_page(self.get_queryset(), tombstones, position, limit, scope)
+        return Response({
+            "upserts": self.get_serializer(page.issues, many=True).data,
+            "deletes": [
+                {"id": tombstone.issue_id, "project": tombstone.project_id, "deleted_at": tombstone.deleted_at}
+                for tombstone in page.tombstones
+            ],
+            "cursor": page.cursor,
+            "has_more": page.has_more,
+        })
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """
+        Stream every matching issue as CSV or NDJSON (`?export_format=`, default csv),
+        gzipped with `?compress=gzip`. Honors the list filters, search and ordering.
+        """
+        export_format = request.query_params.get("export_format", "csv")
+        compress = request.query_params.get("compress")
+        if export_format not in EXPORT_FORMATS or compress not in (None, "gzip"):
+            return Response({"detail": "unsupported export format"}, status=status.HTTP_400_BAD_REQUEST)
+        # rows are read as tuples: no serializer, no eager loading
+        qs = self.filter_queryset(self.get_queryset()).select_related(None).prefetch_related(None)
+        if not qs.ordered:
+            qs = qs.order_by("pk")
+        # rows are read while streaming, after the request's replica routing has ended
+        qs = qs.using(qs.db)
+
+        content_type, extension = EXPORT_FORMATS[export_format]
+        filename = f"issues.{extension}"
+        if compress:
+            content_type, filename = "application/gzip", filename + ".gz"
+        chunks = export_chunks(qs, export_format, bool(compress))
+        if isinstance(request._request, ASGIRequest):
+            chunks = aiter_chunks(chunks)
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
     @action(detail=True, methods=["post"], parser_classes=[MultiPartParser, FormParser])
     def upload(self, request, pk=None):
         issue = self.get_object()
+        # hash while spooling to disk, before the multipart body is parsed
+        request._request.upload_handlers = [HashingUploadHandler(request._request)]
         file_obj = request.FILES.get("file")
         if not file_obj:
             return Response({"detail": "file required"}, status=status.HTTP_400_BAD_REQUEST)
-        att = IssueAttachment.objects.create(issue=issue, file=file_obj, uploaded_by=request.user)
+        name = attachment_storage.store_file(file_obj.temporary_file_path(), file_obj.sha256)
+        att = IssueAttachment.objects.create(
+            issue=issue, file=name, filename=file_obj.name, content_type=file_obj.content_type or "",
+            size=file_obj.size, sha256=file_obj.sha256, uploaded_by=request.user,
+        )
         return Response(IssueAttachmentSerializer(att, context={"request": request}).data, status=status.HTTP_201_CREATED)
 
-class MembershipViewSet(viewsets.ReadOnlyModelViewSet):
+    @action(detail=True, methods=["post"], url_path="uploads")
+    def start_upload(self, request, pk=None):
+        """Open a resumable upload of `size` bytes; chunks are then PATCHed to the session."""
+        issue = self.get_object()
+        serializer = UploadSessionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(issue=issue, uploaded_by=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["get", "patch"], url_path=r"uploads/(?P<session_id>[0-9a-f-]{36})")
+    def upload_chunk(self, request, pk=None, session_id=None):
+        """
+        GET reports the offset to resume from. PATCH appends the raw request body
+        at the `Upload-Offset` header, which must equal the session offset; the
+        chunk that completes the file returns the new attachment.
+        """
+        issue = self.get_object()
+        sessions = UploadSession.objects.filter(issue=issue, uploaded_by=request.user)
+        if request.method == "GET":
+            return Response(UploadSessionSerializer(get_object_or_404(sessions, pk=session_id)).data)
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            length = int(request.headers.get("Content-Length") or 0)
+        except (KeyError, ValueError):
+            return Response({"detail": "Upload-Offset and Content-Length are required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            # serializes chunks of one session; other sessions are unaffected
+            session = get_object_or_404(sessions.select_for_update(), pk=session_id)
+            if offset != session.offset:
+                return Response({"detail": "offset mismatch", "offset": session.offset}, status=status.HTTP_409_CONFLICT)
+            if offset + length > session.size:
+                return Response({"detail": "chunk exceeds the declared size"}, status=status.HTTP_400_BAD_REQUEST)
+            path = attachment_storage.partial_path(session.pk)
+            session.offset = append_chunk(path, request._request, offset, length)
+            if session.offset < session.size:
+                session.save(update_fields=["offset", "updated_at"])
+                return Response(UploadSessionSerializer(session).data)
+            digest = file_sha256(path)
+            att = IssueAttachment.objects.create(
+                issue=issue, file=attachment_storage.store_file(path, digest), filename=session.filename,
+                content_type=session.content_type, size=session.size, sha256=digest, uploaded_by=request.user,
+            )
+            session.delete()
+        return Response(IssueAttachmentSerializer(att, context={"request": request}).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["get"], url_path=r"attachments/(?P<attachment_id>\d+)/download")
+    def download(self, request, pk=None, attachment_id=None):
+        issue = self.get_object()
+        attachment = get_object_or_404(IssueAttachment, pk=attachment_id, issue=issue)
+        return serve_attachment(request._request, attachment)
+
+class MembershipViewSet(InstrumentedViewMixin, ReplicaRoutingViewMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Membership.objects.all()
     serializer_class = MembershipSerializer
 
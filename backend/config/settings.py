@@ -13,6 +13,7 @@ ALLOWED_HOSTS = os.getenv("DJANGO_ALLOWED_HOSTS", "localhost").split(",")
 INSTALLED_APPS = [
     "django.contrib.admin", "django.contrib.auth", "django.contrib.contenttypes",
     "django.contrib.sessions", "django.contrib.messages", "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework.authtoken",
     "drf_spectacular",
@@ -31,6 +32,15 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
 ]
 
+# per-request query count, SQL/serializer/permission time as Server-Timing
+# headers, summed over all processes in METRICS_REDIS_URL for Prometheus at
+# /metrics (Bearer METRICS_TOKEN; refused while no token is set)
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "0") == "1"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+METRICS_REDIS_URL = os.getenv("METRICS_REDIS_URL", os.getenv("REDIS_URL", "redis://redis:6379/0"))
+if INSTRUMENTATION_ENABLED:
+    MIDDLEWARE.insert(0, "apps.tracker.instrumentation.InstrumentationMiddleware")
+
 ROOT_URLCONF = "config.urls"
 ASGI_APPLICATION = "config.asgi.application"
 
@@ -42,17 +52,71 @@ CHANNEL_LAYERS = {
     },
 }
 
+# Shared cache (Redis): list responses and their per-organization version counters
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("CACHE_URL", os.getenv("REDIS_URL", "redis://redis:6379/0")),
+        "KEY_PREFIX": "tracker",
+    }
+}
+
+# Connection reuse. Sync code under daphne runs in short-lived threads and
+# Django's persistent connections are per thread, so web processes should use
+# DB_POOL=1: a per-process pool (apps/tracker/pooled_postgresql) that gets each
+# connection back after every request, task and database_sync_to_async call.
+# CONN_MAX_AGE must stay 0 with it. Without the pool, DB_CONN_MAX_AGE keeps
+# per-thread connections open, which suits Celery prefork workers.
+DB_POOL = os.getenv("DB_POOL", "0") == "1"
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "apps.tracker.pooled_postgresql" if DB_POOL else "django.db.backends.postgresql",
         "HOST": os.getenv("POSTGRES_HOST", "db"),
         "NAME": os.getenv("POSTGRES_DB", "postgres"),
         "USER": os.getenv("POSTGRES_USER", "postgres"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", "postgres"),
         "PORT": int(os.getenv("POSTGRES_PORT", 5432)),
+        "CONN_MAX_AGE": 0 if DB_POOL else int(os.getenv("DB_CONN_MAX_AGE", 0)),
+        # a reused connection is checked with SELECT 1 before its first query of a request
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "1") == "1",
+        "POOL": {
+            # per process; size it so processes x DB_POOL_MAX_SIZE fits max_connections
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", 10)),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+            "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", 300)),
+            "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", 1800)),
+            "check_after": float(os.getenv("DB_POOL_CHECK_AFTER", 30)),
+        },
     }
 }
 
+# Read replicas: POSTGRES_REPLICAS="host[:port][/dbname],..." adds aliases
+# replica1, replica2, ... with the primary's credentials. Safe-method requests
+# and REPLICA_READ_TASKS read from them; writes, and a user's requests for
+# REPLICA_STICKY_SECONDS after a write, stay on the primary (apps/tracker/replicas.py).
+DATABASE_REPLICAS = []
+for n, spec in enumerate(filter(None, os.getenv("POSTGRES_REPLICAS", "").split(",")), start=1):
+    address, _, name = spec.strip().partition("/")
+    host, _, port = address.partition(":")
+    DATABASES[f"replica{n}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": int(port or DATABASES["default"]["PORT"]),
+        "NAME": name or DATABASES["default"]["NAME"],
+        # tests run every alias against the test primary
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{n}")
+if DATABASE_REPLICAS:
+    MIDDLEWARE.append("apps.tracker.replicas.ReplicaRoutingMiddleware")
+DATABASE_ROUTERS = ["apps.tracker.replicas.PrimaryReplicaRouter"]
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 5))
+# report-style tasks whose reads may lag the primary by a few seconds. Tasks
+# whose writes depend on what they read stay off it: the reminder tasks pick
+# the issues they then mark reminded, so a lagging replica would resend
+# digests on retry, and the overdue refresh overwrites counts with what it read.
+REPLICA_READ_TASKS = []
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -79,6 +143,12 @@ STATIC_URL = "/static/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# how attachment downloads are sent: "django" (streams, honors Range),
+# "x-accel" (nginx internal location at ATTACHMENT_ACCEL_PREFIX, aliased to
+# MEDIA_ROOT) or "sendfile" (X-Sendfile, Apache/lighttpd)
+ATTACHMENT_SERVE_MODE = os.getenv("ATTACHMENT_SERVE_MODE", "django")
+ATTACHMENT_ACCEL_PREFIX = os.getenv("ATTACHMENT_ACCEL_PREFIX", "/protected-media/")
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
@@ -104,6 +174,16 @@ SPECTACULAR_SETTINGS = {
 # Celery / Redis
 CELERY_BROKER_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
 CELERY_RESULT_BACKEND = os.getenv("REDIS_URL", "redis://redis:6379/0")
+CELERY_BEAT_SCHEDULE = {
+    # sweep outbox events whose post-commit dispatch could not be scheduled
+    "dispatch-outbox": {"task": "apps.tracker.tasks.dispatch_outbox", "schedule": 30.0},
+    # incremental and idempotent, so it is cheap to run often
+    "send-overdue-reminders": {"task": "apps.tracker.tasks.send_overdue_reminders", "schedule": 3600.0},
+    "refresh-issue-summary-overdue": {"task": "apps.tracker.tasks.refresh_issue_summary_overdue", "schedule": 900.0},
+    "rebuild-issue-summaries": {"task": "apps.tracker.tasks.rebuild_issue_summaries", "schedule": 86400.0},
+    "expire-upload-sessions": {"task": "apps.tracker.tasks.expire_upload_sessions", "schedule": 3600.0},
+    "purge-issue-tombstones": {"task": "apps.tracker.tasks.purge_issue_tombstones", "schedule": 86400.0},
+}
 
 # Email (console backend for dev)
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"